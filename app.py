@@ -1,8 +1,20 @@
 from flask import Flask, render_template, request, session, redirect, url_for
 from flask_babel import Babel, _, get_locale, gettext, ngettext
 import os
-from utils import SEOTitleManager, get_seo_title, get_seo_description
+import logging
+from utils import SEOTitleManager, get_seo_title, get_seo_description, get_seo_context, SEOLookupTable
 from utils.seo import LanguageAwareSEOTitleManager
+from utils.logs import configure_logging, parse_levels
+from utils.page_cache import PageCache
+from utils.fragment_cache import FragmentCache
+from utils.assets import AssetManifest, CriticalCSS
+from utils.static_files import StaticFiles
+from utils.templates import configure_templates, render_page
+from utils.catalogs import CatalogStore
+from utils.locales import LocaleNegotiator
+from utils.images import ResponsiveImages
+from utils.profiler import Profiler
+from utils.metrics import RequestMetrics, PHASE_CONTEXT, PHASE_LOCALE, PHASE_SEO
 from flask import jsonify
 from datetime import datetime
 
@@ -19,92 +31,182 @@ app.config['BABEL_DEFAULT_LOCALE'] = 'ro'
 app.config['BABEL_DEFAULT_TIMEZONE'] = 'UTC'
 app.config['BABEL_TRANSLATION_DIRECTORIES'] = './translations'
 
+# Shared directory for SEO usage counters, so stats are aggregated across worker processes
+app.config['SEO_STATS_DIR'] = os.environ.get('SEO_STATS_DIR')
+
+# Logging: JSON lines written by a background thread, per-module levels
+# (e.g. LOG_LEVELS="utils.seo=DEBUG,werkzeug=WARNING") and sampling of hot events
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO')
+app.config['LOG_LEVELS'] = parse_levels(os.environ.get('LOG_LEVELS', ''))
+app.config['LOG_SAMPLE_RATES'] = {'seo.title_selected': 0.01}
+configure_logging(app)
+logger = logging.getLogger(__name__)
+
+# Per-phase request timings: Server-Timing headers and histograms served by /admin/metrics;
+# METRICS_DIR aggregates them across worker processes (like SEO_STATS_DIR)
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') == '1'
+app.config['METRICS_SERVER_TIMING'] = os.environ.get('METRICS_SERVER_TIMING', '1') == '1'
+app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR', app.config['SEO_STATS_DIR'])
+metrics = RequestMetrics(app)
+
+# Admin-only profiling (/admin/profile and the X-Profile request header), disabled
+# unless PROFILER_TOKEN is set
+app.config['PROFILER_TOKEN'] = os.environ.get('PROFILER_TOKEN')
+app.config['PROFILER_MAX_SECONDS'] = int(os.environ.get('PROFILER_MAX_SECONDS', 60))
+profiler = Profiler(app)
+
+# Full-page cache (bypassed in debug mode); PAGE_CACHE_DB shares pages between workers
+app.config['PAGE_CACHE_ENABLED'] = os.environ.get('PAGE_CACHE_ENABLED', '1') == '1'
+app.config['PAGE_CACHE_TTL'] = int(os.environ.get('PAGE_CACHE_TTL', 300))
+app.config['PAGE_CACHE_MAX_ENTRIES'] = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 256))
+app.config['PAGE_CACHE_DB'] = os.environ.get('PAGE_CACHE_DB')
+
+# {% cache %} fragments (footer, language switcher), per language and year
+app.config['FRAGMENT_CACHE_ENABLED'] = os.environ.get('FRAGMENT_CACHE_ENABLED', '1') == '1'
+app.config['FRAGMENT_CACHE_TTL'] = int(os.environ.get('FRAGMENT_CACHE_TTL', 3600))
+app.config['FRAGMENT_CACHE_MAX_ENTRIES'] = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 128))
+
+# Self-hosted files announced with <link rel=preload> and a Link header (103 Early Hints);
+# entries are static filenames or names from utils.assets.THIRD_PARTY_ASSETS
+app.config['PRELOAD_ASSETS'] = ['bootstrap.css', 'css/main.css', 'webfonts/subset/fa-solid-900.woff2']
+
+# Static files: Cache-Control per path prefix (see utils.static_files.DEFAULT_CACHE_CONTROL);
+# STATIC_ACCEL_REDIRECT="/_static/" lets nginx send the files (internal location)
+app.config['STATIC_ACCEL_REDIRECT'] = os.environ.get('STATIC_ACCEL_REDIRECT')
+
+# Compiled templates are shared between workers through an on-disk bytecode cache
+# (filled by `python build_templates.py`, which can also flatten static includes)
+app.config['TEMPLATE_BYTECODE_DIR'] = os.environ.get('TEMPLATE_BYTECODE_DIR',
+                                                     os.path.join(app.root_path, 'cache', 'jinja'))
+app.config['TEMPLATE_FLATTEN_DIR'] = os.environ.get('TEMPLATE_FLATTEN_DIR',
+                                                    os.path.join(app.root_path, 'cache', 'templates'))
+configure_templates(app)
+
+# Pages can be streamed while they render (the <head> leaves first); only worth it when
+# a slow client doesn't hold a worker thread, so asgi.py turns it on
+app.config['STREAM_TEMPLATES'] = os.environ.get('STREAM_TEMPLATES', '0') == '1'
+app.config['STREAM_CHUNK_SIZE'] = int(os.environ.get('STREAM_CHUNK_SIZE', 8192))
+
+# Resized WebP/AVIF image variants are written here on first request
+app.config['IMAGE_CACHE_DIR'] = os.environ.get('IMAGE_CACHE_DIR')
+
+# Pages live under /ro/ and /en/; elsewhere the language comes from ?lang=, the `lang`
+# cookie or Accept-Language. Resolved once per request.
+locales = LocaleNegotiator(app)
+
+@metrics.timed(PHASE_LOCALE)
 def get_locale():
-    # 1. If language is specified in URL args (?lang=en)
-    if 'lang' in request.args:
-        lang = request.args['lang']
-        if lang in app.config['LANGUAGES']:
-            session['language'] = lang
-            return lang
-    
-    # 2. If language is stored in session
-    if 'language' in session:
-        lang = session['language']
-        if lang in app.config['LANGUAGES']:
-            return lang
-        
-    # 3. Fallback to Romanian
-    return 'ro'
+    return locales.resolve()
+
+# Static file serving with ranges, conditional requests and optional X-Accel-Redirect
+static_files = StaticFiles(app)
+
+# Fingerprinted, pre-compressed static files built by `python build_assets.py`
+assets = AssetManifest(app)
+
+# Inlined above-the-fold CSS built by `python critical_css.py`
+critical_css = CriticalCSS(app)
+
+# Correctly sized image variants for the responsive_image() template helper
+images = ResponsiveImages(app)
 
 # Initialize Babel with the locale selector function (Flask-Babel 4.0.0 style)
 babel = Babel(app, locale_selector=get_locale)
 
+# gettext catalogs are mmapped (shared between forked workers), resolved strings are
+# cached per locale and a recompiled .mo is picked up by mtime
+catalogs = CatalogStore(os.path.join(app.root_path, app.config['BABEL_TRANSLATION_DIRECTORIES'])).init_app(app, babel)
+
 # # Initialize SEO manager 
 # seo_manager = SEOTitleManager(strategy='random')
 
 # Initialize Language-aware SEO manager 
-seo_manager = LanguageAwareSEOTitleManager(strategy='random')
+seo_manager = LanguageAwareSEOTitleManager(strategy='random',
+                                           stats_dir=app.config['SEO_STATS_DIR'])
+
+# Translated SEO titles/descriptions, compiled once from the .mo catalogs
+seo_table = SEOLookupTable(app.config['BABEL_TRANSLATION_DIRECTORIES'],
+                           locales=list(app.config['LANGUAGES']),
+                           extra_msgids=seo_manager.titles).init_app(app)
+
+@app.before_request
+def reload_changed_translations():
+    """Pick up catalogs recompiled by `manage_translations.py compile` without a restart"""
+    if seo_table.refresh_if_changed():
+        # The catalogs reload themselves; pages and fragments rendered with the old strings go
+        page_cache.clear()
+        fragment_cache.clear()
+
+def page_variant(page_key):
+    """Everything besides the URL that a cached page's HTML depends on"""
+    current_lang = get_locale()
+    # Resolving the title here picks the SEO variant; the render reuses it via the SEO context
+    title = metrics.timed(PHASE_SEO)(get_seo_context(seo_manager, current_lang).title)(page_key)
+    return (current_lang, title, datetime.now().year, assets.version)
 
-@app.route('/')
+page_cache = PageCache.from_config(app, page_variant)
+
+def fragment_variant(context):
+    """What a `{% cache %}` fragment depends on besides its name (see inject_current_year)"""
+    return (context.get('CURRENT_LANGUAGE'), context.get('current_year'), assets.version)
+
+# Header/footer partials rendered once per language instead of once per request
+fragment_cache = FragmentCache.from_config(app, fragment_variant)
+
+@locales.route('/')
+@page_cache.cached('home')
 def home():
     """Home page with dynamic SEO title"""
-    return render_template('index.html', 
+    return render_page('index.html', 
                          page_title=None,  # Will use SEO rotation system
                          page_key='home')
 
-@app.route('/about')
+@locales.route('/about')
+@page_cache.cached('about')
 def about():
-    return render_template('about.html',
+    return render_page('about.html',
                          page_title=None,
                          page_key='about')
 
-@app.route('/privacy')
+@locales.route('/privacy')
+@page_cache.cached('privacy')
 def privacy():
-    return render_template('privacy.html',
+    return render_page('privacy.html',
                          page_title=None,
                          page_key='privacy')
 
 @app.route('/set_language/<language>')
 def set_language(language=None):
-    if language in app.config['LANGUAGES']:
-        session['language'] = language
-        # Update SEO manager language when user switches
-        seo_manager.set_language(language)
-    return redirect(request.referrer or url_for('home'))
+    locales.remember(language)
+    if language not in app.config['LANGUAGES']:
+        language = get_locale()
+    # Same page in the new language (only the path is kept, never another site)
+    path = locales.translate_path(request.referrer, language) if request.referrer else None
+    if path:
+        return redirect(path)
+    return redirect(url_for('home', lang_code=language))
 
 @app.context_processor
+@metrics.timed(PHASE_CONTEXT)
 def inject_conf_vars():
     """Make variables available in all templates"""
     
-    # Ensure SEO manager matches current language
-    current_lang = session.get('language', get_locale())
-    seo_manager.set_language(current_lang)
-    
-    # Create wrapper functions that pass the seo_manager to the utils functions
-    def template_get_seo_title(page_key='home', custom_title=None, use_seo_rotation=True):
-        print(f"🔧 template_get_seo_title called with: page_key={page_key}, use_seo_rotation={use_seo_rotation}, language={current_lang}")
-        try:
-            result = get_seo_title(page_key, custom_title, use_seo_rotation, seo_manager)
-            print(f"📝 template_get_seo_title result: {result}")
-            return result
-        except Exception as e:
-            print(f"❌ Error in template_get_seo_title: {e}")
-            # Fallback to basic translation
-            return _('Modus Vivendi Oradea - FTC Robotics Team')
+    # The language is passed explicitly to the SEO manager (never stored on it),
+    # so concurrent requests in different languages don't interfere
+    current_lang = get_locale()
     
-    def template_get_seo_description(page_key='home', custom_description=None):
-        try:
-            return get_seo_description(page_key, custom_description)
-        except Exception as e:
-            print(f"❌ Error in template_get_seo_description: {e}")
-            return _('seo_description_default')
+    # Title and description are resolved once per request and shared by every tag
+    seo = get_seo_context(seo_manager, current_lang)
+    timed_seo = metrics.timed(PHASE_SEO)
     
     return {
         'LANGUAGES': app.config['LANGUAGES'],
         'CURRENT_LANGUAGE': current_lang,
+        # Icon subset generated by subset_icons.py, or the full Font Awesome bundle
+        'FONT_AWESOME_CSS': assets.first_available('css/fa-subset.css', 'css/all.css'),
         'session': session,
-        'get_seo_title': template_get_seo_title,
-        'get_seo_description': template_get_seo_description,
+        'get_seo_title': timed_seo(seo.title),
+        'get_seo_description': timed_seo(seo.description),
         'seo_manager': seo_manager,
         '_': gettext,
         'ngettext': ngettext
@@ -117,19 +219,53 @@ def inject_conf_vars():
 @app.route('/admin/seo-stats')
 def seo_stats():
     """Admin endpoint to monitor title performance"""
+    title_usage = seo_manager.get_performance_stats()
     return jsonify({
         'strategy': seo_manager.strategy,
-        'current_language': seo_manager.current_language,
-        'title_usage': seo_manager.get_performance_stats(),
-        'total_requests': seo_manager.get_total_requests(),
+        'default_language': seo_manager.default_language,
+        'languages': list(seo_manager.languages),
+        'title_usage': title_usage,
+        'total_requests': sum(title_usage.values()),
+        'scope': 'site' if app.config['SEO_STATS_DIR'] else 'process',
+        'page_cache': page_cache.get_stats(),
+        'fragment_cache': fragment_cache.get_stats(),
+        'catalogs': catalogs.get_stats(),
+        'visitor_keys': seo_manager.get_visitor_cache_stats(),
         'available_titles': len(seo_manager.titles)
     })
+
+@app.route('/admin/metrics')
+def admin_metrics():
+    """Prometheus scrape endpoint: request phase histograms plus cache and SEO counters"""
+    page_stats = page_cache.get_stats()
+    fragment_stats = fragment_cache.get_stats()
+    return metrics.prometheus_response({
+        'seo_title_selections_total': ('counter', 'SEO title selections per title', {
+            (('title', title),): count for title, count in seo_manager.get_performance_stats().items()
+        }),
+        'page_cache_requests_total': ('counter', 'Full-page cache lookups by result (this process)', {
+            (('result', 'hit'),): page_stats.get('hits', 0),
+            (('result', 'miss'),): page_stats.get('misses', 0),
+        }),
+        'fragment_cache_requests_total': ('counter', 'Template fragment cache lookups by result (this process)', {
+            (('result', 'hit'),): fragment_stats.get('hits', 0),
+            (('result', 'miss'),): fragment_stats.get('misses', 0),
+        }),
+    })
     
+@app.route('/admin/profile')
+def admin_profile():
+    """Sample this worker's stacks for ?seconds= (flamegraph-ready collapsed stacks)"""
+    return profiler.sample_response(request.args.get('seconds', 10, type=float),
+                                    request.args.get('interval', type=float))
+
 @app.route('/admin/seo-strategy/<strategy>')
 def change_seo_strategy(strategy):
     """Admin endpoint to change SEO strategy"""
     try:
         seo_manager.set_strategy(strategy)
+        # Cached pages carry titles picked by the old strategy
+        page_cache.clear()
         return jsonify({'success': True, 'new_strategy': strategy})
     except ValueError as e:
         return jsonify({'success': False, 'error': str(e)}), 400
@@ -150,7 +286,7 @@ def debug_translations():
     debug_info = f"""
     <h2>Translation Debug</h2>
     <p><strong>Current Locale:</strong> {current_locale}</p>
-    <p><strong>Session Language:</strong> {session.get('language', 'not set')}</p>
+    <p><strong>Language Cookie:</strong> {request.cookies.get(app.config['LANGUAGE_COOKIE'], 'not set')} ({locales.source})</p>
     <p><strong>Available Languages:</strong> {app.config['LANGUAGES']}</p>
     
     <h3>Translation Tests:</h3>
@@ -168,36 +304,36 @@ def debug_translations():
 def debug_seo_calls():
     from utils import get_seo_title, get_seo_description
     
-    print("=== DEBUG SEO CALLS ===")
+    logger.debug("debug_seo_calls started")
     
     # Get current language
-    current_lang = session.get('language', get_locale())
-    seo_manager.set_language(current_lang)
+    current_lang = get_locale()
     
     # Test 1: Direct function call
     try:
-        direct_title = get_seo_title('home', use_seo_rotation=True, seo_manager=seo_manager)
-        print(f"Direct call result: {direct_title}")
+        direct_title = get_seo_title('home', use_seo_rotation=True, seo_manager=seo_manager,
+                                     language=current_lang)
+        logger.debug("Direct call result: %s", direct_title)
     except Exception as e:
-        print(f"Direct call error: {e}")
+        logger.warning("Direct call error: %s", e)
         direct_title = f"ERROR: {e}"
     
     # Test 2: SEO Manager direct call
     try:
-        seo_raw = seo_manager.get_title()
-        print(f"SEO Manager raw title: {seo_raw}")
+        seo_raw = seo_manager.get_title(current_lang)
+        logger.debug("SEO Manager raw title: %s", seo_raw)
     except Exception as e:
-        print(f"SEO Manager error: {e}")
+        logger.warning("SEO Manager error: %s", e)
         seo_raw = f"ERROR: {e}"
     
     # Test 3: SEO Manager with specific language
     try:
         seo_en = seo_manager.get_title('en')
         seo_ro = seo_manager.get_title('ro')
-        print(f"SEO Manager EN: {seo_en}")
-        print(f"SEO Manager RO: {seo_ro}")
+        logger.debug("SEO Manager EN: %s", seo_en)
+        logger.debug("SEO Manager RO: %s", seo_ro)
     except Exception as e:
-        print(f"Language-specific error: {e}")
+        logger.warning("Language-specific error: %s", e)
         seo_en = seo_ro = f"ERROR: {e}"
     
     return f"""
@@ -208,7 +344,7 @@ def debug_seo_calls():
     <p><strong>4. SEO Manager RO:</strong> {seo_ro}</p>
     <hr>
     <p><strong>Current language:</strong> {current_lang}</p>
-    <p><strong>SEO Manager language:</strong> {seo_manager.current_language}</p>
+    <p><strong>SEO Manager default language:</strong> {seo_manager.default_language}</p>
     <p><strong>SEO Strategy:</strong> {seo_manager.strategy}</p>
     <hr>
     <a href="/">Back to Home</a> | 
@@ -240,7 +376,7 @@ def test_babel():
     return f"""
     <h2>Flask-Babel Test</h2>
     <p><strong>Current Locale:</strong> {current_locale}</p>
-    <p><strong>Session Language:</strong> {session.get('language', 'not set')}</p>
+    <p><strong>Language Cookie:</strong> {request.cookies.get(app.config['LANGUAGE_COOKIE'], 'not set')} ({locales.source})</p>
     <p><strong>Translation of 'Stay tuned for updates.':</strong> {translated}</p>
     <p><strong>Romanian .mo exists:</strong> {ro_mo_exists} (size: {ro_size} bytes)</p>
     <p><strong>English .mo exists:</strong> {en_mo_exists} (size: {en_size} bytes)</p>
@@ -250,13 +386,13 @@ def test_babel():
 # Debug route to test SEO rotation + translations
 @app.route('/seo_debug')
 def seo_debug():
-    current = session.get('language', 'ro')
-    seo_manager.set_language(current)
+    current = get_locale()
     
     # Test multiple title generations to see rotation
     titles = []
     for i in range(5):
-        title = get_seo_title('home', use_seo_rotation=True, seo_manager=seo_manager)
+        title = get_seo_title('home', use_seo_rotation=True, seo_manager=seo_manager,
+                              language=current)
         titles.append(title)
     
     # Get SEO manager stats
@@ -266,7 +402,7 @@ def seo_debug():
     return f"""
     <h2>🔧 SEO + Translation Debug</h2>
     <p><strong>Current Language:</strong> {current}</p>
-    <p><strong>SEO Manager Language:</strong> {seo_manager.current_language}</p>
+    <p><strong>SEO Manager Default Language:</strong> {seo_manager.default_language}</p>
     <p><strong>SEO Strategy:</strong> {seo_manager.strategy}</p>
     <p><strong>Total Requests:</strong> {total_requests}</p>
     <hr>
@@ -298,5 +434,7 @@ def seo_debug():
 def inject_current_year():
     return {'current_year': datetime.now().year}
 
+# Development server only; in production run `python wsgi.py` (pre-forked, pre-warmed
+# workers) or an ASGI server on asgi:application
 if __name__ == '__main__':
     app.run(debug=True)
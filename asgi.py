@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for modusvivendioradea.com
+
+Serves the Flask app (every route, unchanged) from an ASGI server, so idle
+keep-alive connections and slow clients wait on the event loop instead of
+holding a worker thread. Pages are streamed while their templates render
+(STREAM_TEMPLATES), so <head> and the critical CSS reach the browser
+before the footer is rendered.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8000 --timeout-keep-alive 75
+    python asgi.py [--host HOST] [--port PORT] [--threads N]     # same, via uvicorn
+
+ASGI_THREADS (default 32) is the number of requests rendering at the same
+time; connections beyond that wait on the event loop, not on a thread.
+Any ASGI server works (uvicorn, hypercorn, daphne); uvicorn is only needed
+for `python asgi.py`.
+"""
+
+import argparse
+import os
+import sys
+
+from app import app
+from utils.asgi import WSGIAdapter
+
+try:
+    import uvicorn
+except ImportError:  # optional - any ASGI server can import `application`
+    uvicorn = None
+
+# Slow clients cost no thread here, so pages are streamed while they render
+app.config['STREAM_TEMPLATES'] = os.environ.get('STREAM_TEMPLATES', '1') == '1'
+
+application = WSGIAdapter(app, threads=int(os.environ.get('ASGI_THREADS', 32)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the site through uvicorn')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--threads', type=int, help='Requests rendering at the same time (ASGI_THREADS)')
+    parser.add_argument('--keep-alive', type=int, default=75, help='Seconds an idle connection stays open')
+    args = parser.parse_args()
+
+    if uvicorn is None:
+        print("❌ uvicorn is not installed (pip install uvicorn), or run another ASGI server on asgi:application")
+        sys.exit(1)
+
+    server_app = WSGIAdapter(app, threads=args.threads) if args.threads else application
+    print(f"🚀 Serving on http://{args.host}:{args.port} ({server_app.threads} render threads)")
+    uvicorn.run(server_app, host=args.host, port=args.port, timeout_keep_alive=args.keep_alive,
+                log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
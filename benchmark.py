@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Render benchmarks for modusvivendioradea.com
+
+Requests every pre-rendered page × language × SEO strategy, either
+in-process through Flask's test client (`client`) or over HTTP against a
+local threaded WSGI server (`server`), and reports per case:
+
+    p50/p95/p99 latency, requests per second, mean template render time
+    and the peak memory allocated while handling one request
+
+The full-page cache is off while measuring (--page-cache keeps it on), so
+every request renders its templates.
+
+Results are compared against a JSON baseline; the run fails (exit 1) when
+a metric is worse than the baseline by more than --threshold percent (and
+by more than --min-delta-ms for latencies). Baselines depend on the
+machine, so keep one per machine/CI runner:
+
+    python benchmark.py --save                     # record the baseline
+    python benchmark.py                            # compare against it
+    python benchmark.py --mode both --threshold 10 --output results.json
+
+Usage:
+  python benchmark.py [--mode client|server|both] [--requests N] [--concurrency N]
+                      [--strategies s1,s2] [--languages ro,en] [--pages home,about]
+                      [--baseline PATH] [--save] [--threshold PCT] [--output PATH]
+"""
+
+import argparse
+import gc
+import http.client
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+
+from flask import before_render_template, template_rendered
+
+DEFAULT_BASELINE = os.path.join('cache', 'benchmarks', 'baseline.json')
+
+# Metric -> True when higher is better
+METRICS = {
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'rps': True,
+    'render_ms': False,
+    'alloc_kib': False,
+}
+DEFAULT_COMPARED = ('p50_ms', 'p95_ms', 'rps', 'render_ms', 'alloc_kib')
+LATENCY_METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'render_ms')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class RenderTimer:
+    """Times render_template() calls through Flask's template signals"""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+        self.durations = []
+        self._lock = threading.Lock()
+
+    def _started(self, sender, template, context, **extra):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        stack.append(time.perf_counter())
+
+    def _finished(self, sender, template, context, **extra):
+        stack = getattr(self.local, 'stack', None)
+        if stack:
+            elapsed = time.perf_counter() - stack.pop()
+            if not stack:
+                with self._lock:
+                    self.durations.append(elapsed)
+
+    def __enter__(self):
+        before_render_template.connect(self._started, self.app)
+        template_rendered.connect(self._finished, self.app)
+        return self
+
+    def __exit__(self, *exc):
+        before_render_template.disconnect(self._started, self.app)
+        template_rendered.disconnect(self._finished, self.app)
+
+    def take(self):
+        with self._lock:
+            durations, self.durations = self.durations, []
+        return durations
+
+
+def summarize(latencies, elapsed, renders, alloc_kib):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'render_ms': round(sum(renders) / len(renders) * 1000, 3) if renders else 0.0,
+        'alloc_kib': round(alloc_kib, 1),
+    }
+
+
+# ============================================
+# DRIVERS
+# ============================================
+
+def measure_allocations(client, path, samples=10):
+    """Peak memory allocated while handling one request (KiB, median of samples)"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            client.get(path, buffered=True).close()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024)
+    finally:
+        tracemalloc.stop()
+    return sorted(peaks)[len(peaks) // 2]
+
+
+def bench_client(app, timer, path, requests, warmup):
+    """In-process: the test client calls the WSGI app directly"""
+    client = app.test_client()
+    for _ in range(warmup):
+        client.get(path, buffered=True).close()
+    timer.take()
+
+    latencies = []
+    gc.collect()
+    started = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        response = client.get(path)
+        response.get_data()
+        latencies.append(time.perf_counter() - t0)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned HTTP {response.status_code}")
+        response.close()
+    elapsed = time.perf_counter() - started
+    renders = timer.take()
+    return summarize(latencies, elapsed, renders, measure_allocations(client, path))
+
+
+class LocalServer:
+    """Threaded werkzeug WSGI server on a free localhost port"""
+
+    def __init__(self, app):
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.thread.join()
+
+
+def bench_server(app, timer, server, path, requests, warmup, concurrency):
+    """Over HTTP: `concurrency` client threads share the requests"""
+    def fetch():
+        conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=30)
+        try:
+            t0 = time.perf_counter()
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"{path} returned HTTP {response.status}")
+            return time.perf_counter() - t0
+        finally:
+            conn.close()
+
+    for _ in range(warmup):
+        fetch()
+    timer.take()
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def worker():
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            try:
+                latency = fetch()
+            except Exception as e:  # reported after the run
+                errors.append(e)
+                return
+            with lock:
+                latencies.append(latency)
+
+    gc.collect()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise RuntimeError(f"{path}: {errors[0]}")
+    renders = timer.take()
+    return summarize(latencies, elapsed, renders, measure_allocations(app.test_client(), path))
+
+
+# ============================================
+# BASELINES
+# ============================================
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def compare(results, baseline, metrics, threshold, min_delta_ms):
+    """[(case, metric, baseline value, current value, change %)] of every regression"""
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if not previous:
+            continue
+        for metric in metrics:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            worse = -change if METRICS[metric] else change
+            if worse <= threshold:
+                continue
+            if metric in LATENCY_METRICS and abs(new - old) < min_delta_ms:
+                continue
+            regressions.append((case, metric, old, new, change))
+    return regressions
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def run(args):
+    from prerender import PAGES, page_paths
+    from app import app, seo_manager
+    from utils.seo import STRATEGIES
+
+    app.config['PAGE_CACHE_ENABLED'] = args.page_cache
+    strategies = args.strategies.split(',') if args.strategies else list(STRATEGIES)
+    languages = args.languages.split(',') if args.languages else list(app.config['LANGUAGES'])
+    pages = args.pages.split(',') if args.pages else list(PAGES)
+    modes = ['client', 'server'] if args.mode == 'both' else [args.mode]
+
+    cases = [(strategy, lang, endpoint, path)
+             for strategy in strategies
+             for lang in languages
+             for endpoint, path in page_paths(lang) if endpoint in pages]
+    print(f"⏱️  Benchmarking {len(cases)} cases × {len(modes)} mode(s), "
+          f"{args.requests} requests each...")
+
+    results = {}
+    original_strategy = seo_manager.strategy
+    try:
+        with RenderTimer(app) as timer:
+            server = LocalServer(app) if 'server' in modes else None
+            if server:
+                server.__enter__()
+            try:
+                for mode in modes:
+                    for strategy, lang, endpoint, path in cases:
+                        seo_manager.set_strategy(strategy)
+                        if mode == 'client':
+                            stats = bench_client(app, timer, path, args.requests, args.warmup)
+                        else:
+                            stats = bench_server(app, timer, server, path, args.requests,
+                                                 args.warmup, args.concurrency)
+                        case = f"{mode}:{strategy}:{lang}:{endpoint}"
+                        results[case] = stats
+                        print(f"   {case:<32} p50 {stats['p50_ms']:7.2f} ms  p95 {stats['p95_ms']:7.2f} ms  "
+                              f"p99 {stats['p99_ms']:7.2f} ms  {stats['rps']:8.1f} req/s  "
+                              f"render {stats['render_ms']:6.2f} ms  alloc {stats['alloc_kib']:7.1f} KiB")
+            finally:
+                if server:
+                    server.__exit__(None, None, None)
+    finally:
+        seo_manager.set_strategy(original_strategy)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every page × language × SEO strategy')
+    parser.add_argument('--mode', choices=['client', 'server', 'both'], default='client')
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per case')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per case')
+    parser.add_argument('--concurrency', type=int, default=4, help='Client threads in server mode')
+    parser.add_argument('--strategies', help='Comma-separated SEO strategies (default: all)')
+    parser.add_argument('--languages', help='Comma-separated languages (default: all)')
+    parser.add_argument('--pages', help='Comma-separated endpoints (default: prerender.PAGES)')
+    parser.add_argument('--page-cache', action='store_true', help='Keep the full-page cache enabled')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help='Allowed regression in percent before the run fails')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                        help='Ignore latency regressions smaller than this (noise)')
+    parser.add_argument('--metrics', default=','.join(DEFAULT_COMPARED),
+                        help=f"Compared metrics ({', '.join(METRICS)})")
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    metrics = [m for m in args.metrics.split(',') if m]
+    unknown = set(metrics) - set(METRICS)
+    if unknown:
+        parser.error(f"unknown metrics: {', '.join(sorted(unknown))}")
+
+    results = run(args)
+    report = {'environment': environment(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'results': results}
+    if args.output:
+        save_json(args.output, report)
+
+    if args.save:
+        save_json(args.baseline, report)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"ℹ️  No baseline at {args.baseline} - run with --save to record one")
+        return 0
+    if baseline.get('environment') != report['environment']:
+        print("⚠️  Baseline was recorded on a different machine/Python - comparisons may be off")
+
+    regressions = compare(results, baseline.get('results', {}), metrics, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) over {args.threshold:g}%:")
+        for case, metric, old, new, change in regressions:
+            print(f"   {case} {metric}: {old} → {new} ({change:+.1f}%)")
+        return 1
+    print(f"✅ No regression over {args.threshold:g}% against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Asset build pipeline for modusvivendioradea.com
+
+First builds the Font Awesome subset (see subset_icons.py),
+pre-generates the responsive_image() variants used by the templates and
+extracts the critical CSS of every page (see critical_css.py), then
+copies every file under static/ into static/dist/ with a content hash in
+its name, minifies CSS/JS, rewrites url(...) references inside CSS (and the critical CSS) to
+the hashed names and pre-compresses text assets to .gz (and .br when the
+`brotli` package is installed). The manifest it writes is picked up by
+utils.assets.AssetManifest, which makes url_for('static', ...) point at
+the hashed files. Finally the templates are flattened and compiled into the
+shared bytecode cache (see build_templates.py).
+
+nginx can serve the same files directly:
+
+    location /static/dist/ {
+        gzip_static on;  brotli_static on;
+        expires max;  add_header Cache-Control "public, immutable";
+    }
+
+Usage:
+  python build_assets.py          # build static/dist
+  python build_assets.py clean    # remove static/dist
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+
+from build_templates import build_templates
+from critical_css import build_critical_css, fingerprint_critical_css
+from subset_icons import subset_icons
+from utils.assets import DIST_DIR, MANIFEST_NAME
+from utils.images import DENSITIES, FALLBACK_FORMATS, template_images
+
+try:
+    import brotli
+except ImportError:  # optional - only .gz variants are produced without it
+    brotli = None
+
+STATIC_DIR = 'static'
+OUTPUT_DIR = os.path.join(STATIC_DIR, DIST_DIR)
+
+# Files worth pre-compressing (images, fonts in woff2 and PDFs are already compressed)
+COMPRESSIBLE = {'.css', '.js', '.svg', '.ttf', '.ico', '.json', '.txt', '.webmanifest'}
+
+_STRING_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+_CSS_URL_RE = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def minify_css(css):
+    """Conservative CSS minifier: drops comments and whitespace, never touches strings"""
+    parts = _STRING_RE.split(css)
+    for i in range(0, len(parts), 2):
+        code = re.sub(r'/\*.*?\*/', '', parts[i], flags=re.S)
+        code = re.sub(r'\s+', ' ', code)
+        code = re.sub(r'\s*([{};,>])\s*', r'\1', code)
+        parts[i] = code.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def minify_js(js):
+    """Conservative JS minifier: drops blank lines, full-line // comments and indentation"""
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+def hashed_name(path, data):
+    root, ext = posixpath.splitext(path)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+def source_files():
+    """Every static file (relative, '/'-separated), except the build output itself"""
+    for dirpath, dirnames, filenames in os.walk(STATIC_DIR):
+        rel_dir = os.path.relpath(dirpath, STATIC_DIR).replace(os.sep, '/')
+        if rel_dir == DIST_DIR or rel_dir.startswith(f"{DIST_DIR}/"):
+            dirnames[:] = []
+            continue
+        for filename in filenames:
+            yield posixpath.normpath(posixpath.join(rel_dir, filename))
+
+
+def rewrite_css_urls(css, css_path, files):
+    """Point relative url(...) references at the hashed copies of the files"""
+    css_dir = posixpath.dirname(css_path)
+
+    def replace(match):
+        quote, url = match.groups()
+        if re.match(r'^(?:[a-z]+:|/|#)', url):
+            return match.group(0)
+        target, _, suffix = url.partition('?')
+        target, _, fragment = target.partition('#')
+        resolved = posixpath.normpath(posixpath.join(css_dir, target))
+        if resolved not in files:
+            return match.group(0)
+        new_url = posixpath.relpath(files[resolved], posixpath.dirname(files[css_path]))
+        if fragment:
+            new_url += f"#{fragment}"
+        return f"url({quote}{new_url}{quote})"
+
+    return _CSS_URL_RE.sub(replace, css)
+
+
+def write_output(rel_path, data, encodings):
+    target = os.path.join(OUTPUT_DIR, rel_path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(data)
+
+    if posixpath.splitext(rel_path)[1] not in COMPRESSIBLE:
+        return
+    variants = [('gzip', '.gz', gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.insert(0, ('br', '.br', brotli.compress(data, quality=11)))
+    for encoding, suffix, compressed in variants:
+        # Only worth serving when it saves at least 10%
+        if len(compressed) < len(data) * 0.9:
+            with open(target + suffix, 'wb') as f:
+                f.write(compressed)
+            encodings.setdefault(rel_path, []).append(encoding)
+
+
+def build_fingerprinted():
+    """Fingerprint, minify and pre-compress every static file"""
+    print("📦 Building fingerprinted assets...")
+    clean(quiet=True)
+
+    sources = sorted(source_files())
+    contents = {}
+    for path in sources:
+        with open(os.path.join(STATIC_DIR, path), 'rb') as f:
+            data = f.read()
+        if path.endswith('.js'):
+            data = minify_js(data.decode('utf-8')).encode('utf-8')
+        contents[path] = data
+
+    # Non-CSS files first, so CSS can reference their hashed names
+    files = {path: hashed_name(path, data) for path, data in contents.items()
+             if not path.endswith('.css')}
+    css_paths = [path for path in sources if path.endswith('.css')]
+    for path in css_paths:
+        # Provisional name so relative URLs resolve from the right directory
+        files[path] = path
+    for path in css_paths:
+        css = minify_css(contents[path].decode('utf-8'))
+        css = rewrite_css_urls(css, path, files)
+        contents[path] = css.encode('utf-8')
+        files[path] = hashed_name(path, contents[path])
+
+    encodings = {}
+    original_size = output_size = 0
+    for path in sources:
+        write_output(files[path], contents[path], encodings)
+        original_size += os.path.getsize(os.path.join(STATIC_DIR, path))
+        output_size += len(contents[path])
+
+    with open(os.path.join(OUTPUT_DIR, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'files': files, 'encodings': encodings}, f, indent=2, sort_keys=True)
+
+    print(f"✅ {len(sources)} files → {OUTPUT_DIR} "
+          f"({original_size / 1024:.0f} KB → {output_size / 1024:.0f} KB minified, "
+          f"{len(encodings)} pre-compressed{'' if brotli else ', brotli not installed'})")
+
+
+def build_images():
+    """Encode every responsive_image() variant the templates use into the image cache"""
+    print("🖼️  Generating responsive image variants...")
+    from app import images
+    if not images.available:
+        print("⚠️  Pillow not installed - templates will use the original images (pip install Pillow)")
+        return
+
+    count = 0
+    for filename, height in sorted(template_images('templates')):
+        fallback = FALLBACK_FORMATS.get(posixpath.splitext(filename)[1].lower())
+        formats = [fmt for fmt, _ in images.formats()] + ([fallback] if fallback else [])
+        for density in DENSITIES:
+            for fmt in formats:
+                target = images.generate(filename, height * density, fmt)
+                print(f"   {filename} @{density}x {fmt:<5} {os.path.getsize(target) / 1024:6.1f} KB")
+                count += 1
+    print(f"✅ {count} image variants in {images.cache_dir}")
+
+
+# Build stages, run in order
+STAGES = [
+    subset_icons,
+    build_images,
+    build_critical_css,
+    build_fingerprinted,
+    fingerprint_critical_css,
+    build_templates,
+]
+
+
+def build():
+    for stage in STAGES:
+        stage()
+
+
+def clean(quiet=False):
+    if os.path.isdir(OUTPUT_DIR):
+        shutil.rmtree(OUTPUT_DIR)
+    if not quiet:
+        print(f"🧹 Removed {OUTPUT_DIR}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'clean':
+        clean()
+    elif len(sys.argv) > 1:
+        print('Usage:')
+        print('  python build_assets.py          # build static/dist')
+        print('  python build_assets.py clean    # remove static/dist')
+        sys.exit(1)
+    else:
+        build()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Template pre-compilation for modusvivendioradea.com
+
+    flatten   inline static {% include %}s into copies of the templates
+              (cache/templates/), so a render needs fewer template lookups
+    warm      compile every template into the shared bytecode cache
+              (cache/jinja/), so new workers skip parsing and compiling
+    clean     remove both
+
+Flattened templates are only used while their sources are unchanged, and
+the bytecode cache is keyed by source checksum, so neither can go stale.
+Runs automatically (flatten, then warm) as the last stage of
+`python build_assets.py`; run it on deploy before starting the workers.
+
+Usage:
+  python build_templates.py [flatten|warm|clean]
+"""
+
+import shutil
+import sys
+import time
+
+from utils.templates import flatten_templates, warm_templates
+
+
+def flatten():
+    from app import app
+    print("🧩 Flattening template includes...")
+    merged = flatten_templates(app)
+    for name, count in sorted(merged.items()):
+        print(f"   {name}: {count} files → 1")
+    print(f"✅ {len(merged)} flattened templates in {app.config['TEMPLATE_FLATTEN_DIR']}")
+
+
+def warm():
+    from app import app
+    print("🔥 Compiling templates into the bytecode cache...")
+    started = time.perf_counter()
+    compiled, errors = warm_templates(app)
+    for name, error in sorted(errors.items()):
+        print(f"⚠️  {name}: {error}")
+    print(f"✅ {len(compiled)} templates compiled in {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"→ {app.config['TEMPLATE_BYTECODE_DIR']}")
+
+
+def build_templates():
+    """Flatten, then compile the result"""
+    flatten()
+    warm()
+
+
+def clean():
+    from app import app
+    for key in ('TEMPLATE_FLATTEN_DIR', 'TEMPLATE_BYTECODE_DIR'):
+        shutil.rmtree(app.config[key], ignore_errors=True)
+    print("🧹 Removed flattened templates and bytecode cache")
+
+
+if __name__ == '__main__':
+    commands = {'flatten': flatten, 'warm': warm, 'clean': clean}
+    if len(sys.argv) == 1:
+        build_templates()
+    elif len(sys.argv) == 2 and sys.argv[1] in commands:
+        commands[sys.argv[1]]()
+    else:
+        print('Usage:')
+        print('  python build_templates.py            # flatten + warm')
+        print('  python build_templates.py flatten    # inline static includes')
+        print('  python build_templates.py warm       # fill the bytecode cache')
+        print('  python build_templates.py clean      # remove both')
+        sys.exit(1)
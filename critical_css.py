@@ -0,0 +1,577 @@
+#!/usr/bin/env python3
+"""
+Critical CSS extraction for modusvivendioradea.com
+
+Renders every page × language through the real Flask app, works out which
+elements are above the fold and which CSS rules can match them, and writes
+
+    static/css/critical/<page>.css     rules needed for the first paint
+    static/css/critical/manifest.json  pages + stylesheets they cover
+    static/css/<name>.purged.css       local stylesheets without dead rules
+
+base.html inlines the page's critical CSS into <head> and loads the covered
+stylesheets asynchronously. A rule is dead when no element on any rendered
+page can match it (classes Bootstrap's JavaScript adds at runtime, like
+.show, are treated as present). Remote stylesheets are downloaded once
+into cache/css/; one that cannot be fetched stays render-blocking, and so
+does every stylesheet after it, so the cascade order never changes.
+
+Runs automatically as a stage of `python build_assets.py`.
+
+Usage:
+  python critical_css.py [--fold N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+import urllib.request
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from utils.assets import CRITICAL_DIR, DIST_DIR, MANIFEST_NAME
+
+STATIC_DIR = 'static'
+OUTPUT_DIR = os.path.join(STATIC_DIR, CRITICAL_DIR)
+DOWNLOAD_DIR = os.path.join('cache', 'css')
+
+# Elements of <body>, in document order, treated as visible without scrolling
+FOLD_ELEMENTS = 120
+
+# Stylesheets that only declare web fonts (font-display: swap) never affect the cascade
+FONT_ONLY_HOSTS = ('fonts.googleapis.com',)
+
+# State Bootstrap's JavaScript adds after the first paint; rules using them are never dead
+RUNTIME_CLASSES = {
+    'show', 'showing', 'hiding', 'collapsing', 'collapse', 'fade', 'active', 'disabled',
+    'dropup', 'dropend', 'dropstart', 'modal-open', 'modal-backdrop', 'modal-static',
+    'offcanvas-backdrop', 'tooltip', 'popover', 'bs-tooltip-auto', 'bs-popover-auto',
+    'was-validated', 'is-valid', 'is-invalid',
+}
+RUNTIME_ATTRIBUTES = {'data-popper-placement', 'data-bs-popper', 'aria-expanded', 'aria-selected'}
+
+# At-rules whose body is a list of rules (filtered recursively)
+GROUPING_AT_RULES = ('@media', '@supports', '@container', '@layer', '@document')
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                 'source', 'track', 'wbr'}
+
+_COMMENT_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+_PSEUDO_RE = re.compile(r'::?[a-zA-Z-]+(?:\((?:[^()]|\([^()]*\))*\))?')
+_COMPOUND_RE = re.compile(r'(\*|[a-zA-Z][\w-]*)|#([\w-]+)|\.([\w-]+)|'
+                          r'\[\s*([\w-]+)\s*(?:([~|^$*]?=)\s*(?:"([^"]*)"|\'([^\']*)\'|([^\]\s]*))\s*[is]?\s*)?\]')
+_CSS_URL_RE = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+_FONT_FAMILY_RE = re.compile(r'font-family:\s*["\']?([^;"\'},]+)', re.I)
+_ANIMATION_RE = re.compile(r'animation(?:-name)?:\s*([^;}]+)', re.I)
+
+
+# ============================================
+# HTML
+# ============================================
+
+class Element:
+    __slots__ = ('tag', 'attrs', 'classes', 'parent', 'children')
+
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = attrs
+        self.classes = set(attrs.get('class', '').split())
+        self.parent = parent
+        self.children = []
+
+
+class PageParser(HTMLParser):
+    """Element tree of a rendered page plus the stylesheets it links, in order"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element('#document', {}, None)
+        self.elements = []
+        self.body = []
+        self.stylesheets = []
+        self._stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or '' for name, value in attrs}
+        element = Element(tag, attrs, self._stack[-1])
+        self._stack[-1].children.append(element)
+        self.elements.append(element)
+        if any(e.tag == 'body' for e in self._stack):
+            self.body.append(element)
+        if tag == 'link' and 'stylesheet' in attrs.get('rel', '').split():
+            self.stylesheets.append(attrs.get('href', ''))
+        if tag not in VOID_ELEMENTS:
+            self._stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self._stack.pop()
+
+    def handle_endtag(self, tag):
+        for i in range(len(self._stack) - 1, 0, -1):
+            if self._stack[i].tag == tag:
+                del self._stack[i:]
+                break
+
+
+# ============================================
+# SELECTORS
+# ============================================
+
+def split_top_level(text, separator=','):
+    """Split on a separator outside of parentheses, brackets and strings"""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote and text[i - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+
+def compile_selector(selector):
+    """
+    Returns [(combinator, compound), ...] from right to left, where compound is
+    (tag, ids, classes, attributes). Pseudo-classes and pseudo-elements are
+    dropped, so matching errs on the side of keeping a rule.
+    """
+    selector = re.sub(r':root\b', 'html', selector)
+    selector = _PSEUDO_RE.sub('', selector)
+    tokens, current, depth = [], '', 0
+    for char in selector + ' ':
+        if char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        if depth == 0 and (char.isspace() or char in '>+~'):
+            if current:
+                tokens.append(current)
+                current = ''
+            if char in '>+~':
+                tokens.append(char)
+            elif tokens and tokens[-1] not in '>+~ ':
+                tokens.append(' ')
+            continue
+        current += char
+
+    parts, combinator = [], None
+    for token in reversed(tokens):
+        if token in '>+~ ':
+            if combinator in (None, ' '):
+                combinator = token
+            continue
+        tag, ids, classes, attributes = None, [], [], []
+        for m in _COMPOUND_RE.finditer(token):
+            if m.group(1):
+                tag = None if m.group(1) == '*' else m.group(1).lower()
+            elif m.group(2):
+                ids.append(m.group(2))
+            elif m.group(3):
+                classes.append(m.group(3))
+            elif m.group(4):
+                value = next((v for v in m.group(6, 7, 8) if v is not None), None)
+                attributes.append((m.group(4).lower(), m.group(5), value))
+        parts.append((combinator, (tag, ids, classes, attributes)))
+        combinator = None
+    # The combinator belongs to the compound on its left
+    return [(parts[i + 1][0] if i + 1 < len(parts) else None, parts[i][1]) for i in range(len(parts))]
+
+
+def _attribute_matches(element, name, op, value):
+    actual = element.attrs.get(name)
+    if actual is None:
+        return False
+    if op is None:
+        return True
+    return {
+        '=': actual == value,
+        '~=': value in actual.split(),
+        '|=': actual == value or actual.startswith(f"{value}-"),
+        '^=': actual.startswith(value),
+        '$=': actual.endswith(value),
+        '*=': value in actual,
+    }.get(op, True)
+
+
+def _compound_matches(element, compound, relaxed):
+    tag, ids, classes, attributes = compound
+    if tag and element.tag != tag:
+        return False
+    if any(element.attrs.get('id') != i for i in ids):
+        return False
+    if any(c not in element.classes and not (relaxed and c in RUNTIME_CLASSES) for c in classes):
+        return False
+    return all(_attribute_matches(element, *attribute) or (relaxed and attribute[0] in RUNTIME_ATTRIBUTES)
+               for attribute in attributes)
+
+
+def _matches(element, parts, i, relaxed):
+    combinator, compound = parts[i]
+    if element is None or element.tag == '#document' or not _compound_matches(element, compound, relaxed):
+        return False
+    if i + 1 == len(parts):
+        return True
+    if combinator == '>':
+        return _matches(element.parent, parts, i + 1, relaxed)
+    if combinator == ' ':
+        ancestor = element.parent
+        while ancestor is not None:
+            if _matches(ancestor, parts, i + 1, relaxed):
+                return True
+            ancestor = ancestor.parent
+        return False
+    siblings = element.parent.children
+    previous = siblings[:siblings.index(element)]
+    if combinator == '+':
+        previous = previous[-1:]
+    return any(_matches(sibling, parts, i + 1, relaxed) for sibling in previous)
+
+
+class SelectorMatcher:
+    """Answers "can this selector match any of these elements?" with a per-selector cache"""
+
+    def __init__(self, elements, relaxed=False):
+        self.elements = elements
+        self.relaxed = relaxed
+        self._cache = {}
+        self._index = {}
+        for element in elements:
+            keys = [('tag', element.tag), ('id', element.attrs.get('id'))]
+            keys.extend(('class', c) for c in element.classes)
+            for key in keys:
+                self._index.setdefault(key, []).append(element)
+
+    def _candidates(self, compound):
+        """Elements that could match the rightmost compound, looked up by its most specific part"""
+        tag, ids, classes, _ = compound
+        if ids:
+            return self._index.get(('id', ids[0]), [])
+        for c in classes:
+            if not (self.relaxed and c in RUNTIME_CLASSES):
+                return self._index.get(('class', c), [])
+        if tag:
+            return self._index.get(('tag', tag), [])
+        return self.elements
+
+    def matches(self, selector):
+        result = self._cache.get(selector)
+        if result is None:
+            parts = compile_selector(selector)
+            result = not parts or any(_matches(element, parts, 0, self.relaxed)
+                                      for element in self._candidates(parts[0][1]))
+            self._cache[selector] = result
+        return result
+
+
+# ============================================
+# CSS
+# ============================================
+
+def parse_css(css):
+    """
+    Parse a stylesheet into nodes: ('statement', text), ('rule', prelude, body)
+    and ('group', prelude, [nodes]) for @media/@supports/...
+    """
+    css = _COMMENT_RE.sub(lambda m: m.group(1) or '', css)
+    nodes, depth, quote, start, block_start, prelude = [], 0, None, 0, 0, ''
+    for i, char in enumerate(css):
+        if quote:
+            if char == quote and css[i - 1] != '\\':
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == ';' and depth == 0:
+            statement = css[start:i].strip()
+            if statement:
+                nodes.append(('statement', statement + ';'))
+            start = i + 1
+        elif char == '{':
+            if depth == 0:
+                prelude, block_start = css[start:i].strip(), i + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                body = css[block_start:i].strip()
+                if prelude.lower().startswith(GROUPING_AT_RULES):
+                    nodes.append(('group', prelude, parse_css(body)))
+                else:
+                    nodes.append(('rule', prelude, body))
+                start = i + 1
+    return nodes
+
+
+def serialize_css(nodes):
+    out = []
+    for node in nodes:
+        if node[0] == 'statement':
+            out.append(node[1])
+        elif node[0] == 'rule':
+            out.append(f"{node[1]}{{{node[2]}}}")
+        else:
+            out.append(f"{node[1]}{{{serialize_css(node[2])}}}")
+    return '\n'.join(out)
+
+
+def filter_rules(nodes, matcher, stats=None):
+    """
+    Keep style rules with at least one selector the matcher accepts
+    (dropping the selectors it rejects); other at-rules are kept as they are
+    """
+    kept = []
+    for node in nodes:
+        if node[0] == 'group':
+            children = filter_rules(node[2], matcher, stats)
+            if children:
+                kept.append(('group', node[1], children))
+        elif node[0] == 'rule' and not node[1].startswith('@'):
+            selectors = split_top_level(node[1])
+            wanted = [s for s in selectors if matcher.matches(s)]
+            if stats is not None:
+                stats['selectors'] += len(selectors)
+                stats['dead'] += len(selectors) - len(wanted)
+            if wanted:
+                kept.append(('rule', ','.join(wanted), node[2]))
+        else:
+            kept.append(node)
+    return kept
+
+
+def critical_rules(nodes, matcher):
+    """Style rules matching the fold, plus the @font-face/@keyframes they use"""
+    styles = filter_rules([n for n in nodes if n[0] != 'statement'], matcher)
+
+    def at_rules_dropped(nodes):
+        return [('group', n[1], at_rules_dropped(n[2])) if n[0] == 'group' else n
+                for n in nodes if n[0] == 'group' or not n[1].startswith('@')]
+
+    def at_rules(nodes, keyword):
+        for node in nodes:
+            if node[0] == 'group':
+                yield from at_rules(node[2], keyword)
+            elif node[0] == 'rule' and node[1].lower().startswith(keyword):
+                yield node
+
+    kept = at_rules_dropped(styles)
+    text = serialize_css(kept)
+    animations = {name for value in _ANIMATION_RE.findall(text) for name in re.findall(r'[\w-]+', value)}
+    for node in at_rules(nodes, '@font-face'):
+        # Families are often referenced through custom properties, so look for the name anywhere
+        family = _FONT_FAMILY_RE.search(node[2])
+        if family and family.group(1).strip().lower() in text.lower():
+            kept.append(node)
+    for node in at_rules(nodes, '@'):
+        if 'keyframes' in node[1].lower() and node[1].split()[-1] in animations:
+            kept.append(node)
+    return kept
+
+
+def absolute_urls(css, base_url):
+    """Resolve relative url(...) references, so the CSS still works inlined into a page"""
+    def replace(match):
+        quote, url = match.groups()
+        if url.startswith(('data:', '#')):
+            return match.group(0)
+        return f"url({quote}{urljoin(base_url, url)}{quote})"
+    return _CSS_URL_RE.sub(replace, css)
+
+
+# ============================================
+# BUILD
+# ============================================
+
+def static_filename(href, static_url_path, assets):
+    """Static file behind a local stylesheet href (undoing fingerprinting), or None"""
+    path = urlsplit(href).path
+    prefix = f"{static_url_path}/"
+    if not path.startswith(prefix):
+        return None
+    filename = path[len(prefix):]
+    originals = {f"{DIST_DIR}/{hashed}": original for original, hashed in assets.files.items()}
+    return originals.get(filename, filename)
+
+
+def download(url):
+    """Remote stylesheet, cached in cache/css/; None when it can't be fetched"""
+    target = os.path.join(DOWNLOAD_DIR, f"{hashlib.sha256(url.encode()).hexdigest()[:16]}.css")
+    if not os.path.exists(target):
+        try:
+            with urllib.request.urlopen(url, timeout=10) as response:
+                data = response.read()
+        except OSError as e:
+            print(f"⚠️  Could not download {url}: {e}")
+            return None
+        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+    with open(target, encoding='utf-8') as f:
+        return f.read()
+
+
+def render_pages():
+    """{(endpoint, lang): PageParser} for every pre-rendered page × language"""
+    from prerender import page_paths
+    from app import app, critical_css
+    # Render with the original, render-blocking stylesheets
+    critical_css.pages, critical_css.stylesheets = {}, {}
+
+    pages = {}
+    client = app.test_client()
+    for lang in app.config['LANGUAGES']:
+        for endpoint, path in page_paths(lang):
+            response = client.get(path)
+            if response.status_code != 200:
+                raise RuntimeError(f"{lang} {path} returned HTTP {response.status_code}")
+            parser = PageParser()
+            parser.feed(response.get_data(as_text=True))
+            pages[endpoint, lang] = parser
+    return app, pages
+
+
+def clean():
+    if os.path.isdir(OUTPUT_DIR):
+        shutil.rmtree(OUTPUT_DIR)
+    for dirpath, _, filenames in os.walk(STATIC_DIR):
+        for filename in filenames:
+            if filename.endswith('.purged.css'):
+                os.remove(os.path.join(dirpath, filename))
+
+
+def build_critical_css(fold=FOLD_ELEMENTS):
+    """Write per-page critical CSS and dead-rule-free copies of the local stylesheets"""
+    print("🎨 Extracting critical CSS...")
+    clean()
+    app, pages = render_pages()
+    from app import assets
+
+    # Stylesheets in the order the pages link them (the same <head> for every page)
+    hrefs = []
+    for parser in pages.values():
+        hrefs.extend(href for href in parser.stylesheets if href not in hrefs)
+
+    everything = SelectorMatcher([e for parser in pages.values() for e in parser.elements], relaxed=True)
+    sources, covered, blocked = [], {}, False
+    referenced = set()
+    for href in hrefs:
+        filename = static_filename(href, app.static_url_path, assets)
+        name = filename or href
+        if urlsplit(href).hostname in FONT_ONLY_HOSTS:
+            covered[name] = name
+            continue
+        if filename:
+            referenced.add(filename)
+            with open(os.path.join(STATIC_DIR, filename), encoding='utf-8') as f:
+                css = f.read()
+            base_url = f"{app.static_url_path}/{filename}"
+        else:
+            css = download(href)
+            base_url = href
+        if css is None or blocked:
+            blocked = True
+            continue
+
+        nodes = parse_css(css)
+        sources.append((nodes, base_url))
+        covered[name] = name
+        if filename:
+            stats = {'selectors': 0, 'dead': 0}
+            purged = serialize_css(filter_rules(nodes, everything, stats))
+            root, ext = posixpath.splitext(filename)
+            covered[name] = f"{root}.purged{ext}"
+            with open(os.path.join(STATIC_DIR, covered[name]), 'w', encoding='utf-8') as f:
+                f.write(purged)
+            print(f"   {filename}: {stats['dead']}/{stats['selectors']} selectors dead, "
+                  f"{len(css.encode('utf-8')) / 1024:.1f} KB → {len(purged.encode('utf-8')) / 1024:.1f} KB")
+
+    from build_assets import minify_css
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    manifest = {'pages': {}, 'stylesheets': covered}
+    for endpoint in dict.fromkeys(endpoint for endpoint, _ in pages):
+        # One file per page, covering the fold of every language
+        fold_elements = [e for (page, _), parser in pages.items() if page == endpoint
+                         for e in [*parser.elements[:parser.elements.index(parser.body[0])],
+                                   *parser.body[:fold]]]
+        matcher = SelectorMatcher(fold_elements)
+        css = '\n'.join(absolute_urls(serialize_css(critical_rules(nodes, matcher)), base_url)
+                        for nodes, base_url in sources)
+        css = minify_css(css)
+        manifest['pages'][endpoint] = f"{endpoint}.css"
+        with open(os.path.join(OUTPUT_DIR, f"{endpoint}.css"), 'w', encoding='utf-8') as f:
+            f.write(css)
+        print(f"   {endpoint}: {len(css.encode('utf-8')) / 1024:.1f} KB inlined")
+
+    with open(os.path.join(OUTPUT_DIR, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    unused = sorted(path for path in os.listdir(os.path.join(STATIC_DIR, 'css'))
+                    if path.endswith('.css') and not path.endswith('.purged.css')
+                    and f"css/{path}" not in referenced)
+    if unused:
+        print(f"   Not linked from any page: {', '.join(unused)}")
+    deferred = [name for name in hrefs if (static_filename(name, app.static_url_path, assets) or name) in covered]
+    print(f"✅ Critical CSS ready ({len(deferred)}/{len(hrefs)} stylesheets deferred)")
+
+
+def fingerprint_critical_css():
+    """
+    Point the url(...)s of the critical CSS at the fingerprinted files in
+    static/dist, like the dist stylesheets (and font preloads) do, so a font
+    is not downloaded twice. Run after build_assets' fingerprinting, which
+    needs the purged stylesheets written above.
+    """
+    manifest_path = os.path.join(STATIC_DIR, DIST_DIR, MANIFEST_NAME)
+    if not os.path.exists(manifest_path) or not os.path.isdir(OUTPUT_DIR):
+        return
+    from app import app
+    with open(manifest_path, encoding='utf-8') as f:
+        files = json.load(f)['files']
+    prefix = f"{app.static_url_path}/"
+
+    def replace(match):
+        quote, url = match.groups()
+        if not url.startswith(prefix):
+            return match.group(0)
+        target, _, fragment = url[len(prefix):].partition('#')
+        target = target.partition('?')[0]
+        if target not in files:
+            return match.group(0)
+        new_url = f"{prefix}{DIST_DIR}/{files[target]}"
+        if fragment:
+            new_url += f"#{fragment}"
+        return f"url({quote}{new_url}{quote})"
+
+    for filename in sorted(os.listdir(OUTPUT_DIR)):
+        if not filename.endswith('.css'):
+            continue
+        path = os.path.join(OUTPUT_DIR, filename)
+        with open(path, encoding='utf-8') as f:
+            css = f.read()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(_CSS_URL_RE.sub(replace, css))
+    print("✅ Critical CSS points at the fingerprinted files")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract critical CSS and remove dead rules')
+    parser.add_argument('--fold', type=int, default=FOLD_ELEMENTS,
+                        help='Elements of <body> treated as above the fold')
+    args = parser.parse_args()
+    build_critical_css(args.fold)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,69 +1,333 @@
 #!/usr/bin/env python3
+"""
+Translation toolchain for modusvivendioradea.com
+
+Drives the Babel API in-process instead of shelling out to pybabel, and
+only redoes work whose inputs changed:
+
+    extract   re-extracts messages only from .py/.html files whose content
+              hash changed (per-file results are kept in cache/translations/),
+              and rewrites messages.pot only if the messages changed
+    update    merges messages.pot into each locale's .po when either changed
+    compile   compiles the .po files that changed since their last compile
+    build     extract + update + compile, locales in parallel (CI / deploy)
+    stats     missing and fuzzy entries per locale (`--check` exits 1 if any)
+
+.mo files are written next to the old ones and renamed over them, since
+running workers mmap them (utils.catalogs).
+
+Usage:
+  python manage_translations.py build [--force] [--workers N]
+  python manage_translations.py extract|update|compile|stats [--check]
+  python manage_translations.py init <language_code>
+  python manage_translations.py setup    # Run initial setup
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
 import os
 import sys
+import time
+from datetime import datetime
+from io import BytesIO
+
+from babel import Locale
+from babel.messages.catalog import Catalog
+from babel.messages.extract import DEFAULT_KEYWORDS, extract_from_file
+from babel.messages.frontend import parse_mapping_cfg
+from babel.messages.mofile import write_mo
+from babel.messages.pofile import read_po, write_po
+from babel.util import LOCALTZ, pathmatch
+
+MAPPING_FILE = 'babel.cfg'
+TEMPLATE_FILE = 'messages.pot'
+TRANSLATIONS_DIR = 'translations'
+DOMAIN = 'messages'
+STATE_FILE = os.path.join('cache', 'translations', 'state.json')
+# Generated output that would otherwise match the templates pattern (flattened copies, pre-rendered pages)
+SKIP_DIRS = {'cache', 'build'}
+SETUP_LANGUAGES = ('ro', 'en')
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_state():
+    try:
+        with open(STATE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'sources': {}, 'catalogs': {}}
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    with open(STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+
 
-def extract_messages():
-    """Extract all messages for translation"""
+def write_atomic(path, data):
+    """Write next to the target and rename over it, so readers never see a partial file"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def po_path(lang):
+    return os.path.join(TRANSLATIONS_DIR, lang, 'LC_MESSAGES', f'{DOMAIN}.po')
+
+
+def locales():
+    if not os.path.isdir(TRANSLATIONS_DIR):
+        return []
+    return sorted(lang for lang in os.listdir(TRANSLATIONS_DIR) if os.path.exists(po_path(lang)))
+
+
+def render_po(catalog, **kwargs):
+    buf = BytesIO()
+    write_po(buf, catalog, **kwargs)
+    return buf.getvalue()
+
+
+# ============================================
+# EXTRACT
+# ============================================
+
+def source_files(method_map):
+    """(relative path, method, pattern) of every file babel.cfg maps, in pybabel's walk order"""
+    for root, dirnames, filenames in os.walk('.'):
+        dirnames[:] = sorted(d for d in dirnames
+                             if not d.startswith(('.', '_')) and not (root == '.' and d in SKIP_DIRS))
+        for filename in sorted(filenames):
+            path = os.path.relpath(os.path.join(root, filename)).replace(os.sep, '/')
+            for pattern, method in method_map:
+                if pathmatch(pattern, path):
+                    if method != 'ignore':
+                        yield path, method, pattern
+                    break
+
+
+def extract_messages(state, force=False):
+    """
+    Bring messages.pot up to date; returns True if it was rewritten
+    Only files whose hash changed are parsed again.
+    """
     print("🔍 Extracting messages...")
-    result = os.system('pybabel extract -F babel.cfg -k _ -o messages.pot .')
-    if result == 0:
-        print("✅ Messages extracted to messages.pot")
+    with open(MAPPING_FILE, encoding='utf-8') as f:
+        method_map, options_map = parse_mapping_cfg(f)
+
+    previous = state['sources']
+    sources, parsed = {}, 0
+    for path, method, pattern in source_files(method_map):
+        digest = file_hash(path)
+        entry = previous.get(path)
+        if force or entry is None or entry['sha256'] != digest:
+            messages = [[lineno, list(msgid) if isinstance(msgid, tuple) else msgid, comments, context]
+                        for lineno, msgid, comments, context in
+                        extract_from_file(method, path, keywords=DEFAULT_KEYWORDS,
+                                          options=options_map.get(pattern, {}))]
+            entry = {'sha256': digest, 'messages': messages}
+            parsed += 1
+        sources[path] = entry
+    removed = len(set(previous) - set(sources))
+    state['sources'] = sources
+
+    template = Catalog(charset='utf-8', fuzzy=True)
+    for path, entry in sources.items():
+        for lineno, msgid, comments, context in entry['messages']:
+            msgid = tuple(msgid) if isinstance(msgid, list) else msgid
+            template.add(msgid, None, [(path, lineno)], auto_comments=comments, context=context)
+
+    if not force and os.path.exists(TEMPLATE_FILE):
+        with open(TEMPLATE_FILE, 'rb') as f:
+            current = read_po(f)
+        # Same messages and locations: keep the file (and its creation date) untouched
+        template.creation_date = current.creation_date
+        if render_po(template) == render_po(current):
+            print(f"✅ {parsed} of {len(sources)} files re-parsed, {removed} removed - "
+                  f"{TEMPLATE_FILE} unchanged")
+            return False
+
+    write_atomic(TEMPLATE_FILE, render_po(template))
+    print(f"✅ {parsed} of {len(sources)} files re-parsed, {removed} removed - "
+          f"{len(template)} messages written to {TEMPLATE_FILE}")
+    return True
+
+
+# ============================================
+# UPDATE / COMPILE (one locale per process)
+# ============================================
+
+def catalog_stats(catalog):
+    messages = [m for m in catalog if m.id]
+    fuzzy = [m for m in messages if m.fuzzy]
+    missing = [m for m in messages if not m.fuzzy and not all(m.string if isinstance(m.string, tuple)
+                                                              else (m.string,))]
+    return {
+        'messages': len(messages),
+        'translated': len(messages) - len(fuzzy) - len(missing),
+        'fuzzy': len(fuzzy),
+        'missing': len(missing),
+        'obsolete': len(catalog.obsolete),
+        'missing_ids': [str(m.id) for m in missing],
+        'fuzzy_ids': [str(m.id) for m in fuzzy],
+    }
+
+
+def process_locale(job):
+    """
+    Update and/or compile one locale; returns (lang, new catalog state, stats, actions)
+    Runs in a worker process, so it only reads its arguments and the files.
+    """
+    lang, cached, template_hash, do_update, do_compile, force = job
+    path = po_path(lang)
+    mo_path = os.path.join(os.path.dirname(path), f'{DOMAIN}.mo')
+    cached = dict(cached or {})
+    actions = []
+
+    with open(path, 'rb') as f:
+        catalog = read_po(f, locale=lang)
+
+    if do_update and template_hash and (force or cached.get('template') != template_hash
+                                        or cached.get('po') != file_hash(path)):
+        with open(TEMPLATE_FILE, 'rb') as f:
+            template = read_po(f)
+        before = render_po(catalog)
+        catalog.update(template)
+        after = render_po(catalog)
+        if after != before:
+            write_atomic(path, after)
+            actions.append('updated')
+        cached['template'] = template_hash
+        cached['po'] = file_hash(path)
+
+    po_hash = file_hash(path)
+    if do_compile and catalog.fuzzy:
+        # Same as pybabel compile without --use-fuzzy
+        actions.append('catalog marked fuzzy, not compiled')
+    elif do_compile and (force or cached.get('compiled') != po_hash or not os.path.exists(mo_path)):
+        errors = [f"{message.id}: {error}" for message, problems in catalog.check() for error in problems]
+        if errors:
+            return lang, cached, catalog_stats(catalog), [f"not compiled ({len(errors)} errors)"] + errors[:5]
+        buf = BytesIO()
+        write_mo(buf, catalog)
+        write_atomic(mo_path, buf.getvalue())
+        cached['compiled'] = po_hash
+        actions.append('compiled')
+
+    return lang, cached, catalog_stats(catalog), actions
+
+
+def run_locales(state, do_update, do_compile, force=False, workers=1):
+    """Update/compile every locale (in parallel); returns {lang: stats}"""
+    template_hash = file_hash(TEMPLATE_FILE) if os.path.exists(TEMPLATE_FILE) else None
+    jobs = [(lang, state['catalogs'].get(lang), template_hash, do_update, do_compile, force)
+            for lang in locales()]
+    workers = max(1, min(workers, len(jobs)))
+    if workers > 1:
+        method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        with multiprocessing.get_context(method).Pool(workers) as pool:
+            results = pool.map(process_locale, jobs)
     else:
-        print("❌ Failed to extract messages")
+        results = [process_locale(job) for job in jobs]
+
+    report = {}
+    for lang, cached, stats, actions in results:
+        state['catalogs'][lang] = cached
+        report[lang] = stats
+        print(f"   {lang}: {', '.join(actions) or 'up to date'}")
+    return report
+
+
+def print_stats(report, verbose=False):
+    print("📊 Translation status:")
+    for lang, stats in sorted(report.items()):
+        print(f"   {lang}: {stats['translated']}/{stats['messages']} translated, "
+              f"{stats['missing']} missing, {stats['fuzzy']} fuzzy, {stats['obsolete']} obsolete")
+        if verbose:
+            for msgid in stats['missing_ids']:
+                print(f"      missing: {msgid}")
+            for msgid in stats['fuzzy_ids']:
+                print(f"      fuzzy:   {msgid}")
+
 
 def init_language(lang):
     """Initialize a new language"""
     print(f"🌍 Initializing {lang} translations...")
-    result = os.system(f'pybabel init -i messages.pot -d translations -l {lang}')
-    if result == 0:
-        print(f"✅ Initialized {lang} translations")
-    else:
-        print(f"❌ Failed to initialize {lang} translations")
-
-def update_translations():
-    """Update all existing translations"""
-    print("🔄 Updating translations...")
-    result = os.system('pybabel update -i messages.pot -d translations')
-    if result == 0:
-        print("✅ Updated all translations")
-    else:
-        print("❌ Failed to update translations")
-
-def compile_translations():
-    """Compile all translations"""
-    print("⚙️  Compiling translations...")
-    result = os.system('pybabel compile -d translations')
-    if result == 0:
-        print("✅ Compiled all translations")
-    else:
-        print("❌ Failed to compile translations")
+    if not os.path.exists(TEMPLATE_FILE):
+        print(f"❌ {TEMPLATE_FILE} not found - run extract first")
+        return 1
+    with open(TEMPLATE_FILE, 'rb') as f:
+        catalog = read_po(f, locale=lang)
+    catalog.locale = Locale.parse(lang)
+    catalog.revision_date = datetime.now(LOCALTZ)
+    catalog.fuzzy = False
+    os.makedirs(os.path.dirname(po_path(lang)), exist_ok=True)
+    write_atomic(po_path(lang), render_po(catalog))
+    print(f"✅ Initialized {lang} translations")
+    return 0
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental translation toolchain (Babel API)')
+    parser.add_argument('command', choices=['build', 'extract', 'update', 'compile', 'stats', 'init', 'setup'])
+    parser.add_argument('language', nargs='?', help='Language code for init')
+    parser.add_argument('--force', action='store_true', help='Ignore the cached hashes and redo everything')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Parallel locale processes')
+    parser.add_argument('--check', action='store_true', help='Exit with 1 if any entry is missing or fuzzy')
+    parser.add_argument('-v', '--verbose', action='store_true', help='List the missing and fuzzy msgids')
+    args = parser.parse_args()
+
+    if args.command == 'init':
+        if not args.language:
+            parser.error('init needs a language code')
+        return init_language(args.language)
+
+    started = time.perf_counter()
+    state = {'sources': {}, 'catalogs': {}} if args.force else load_state()
+    status = 0
+    try:
+        if args.command == 'setup':
+            print("🚀 Setting up translations...")
+            extract_messages(state, force=True)
+            for lang in SETUP_LANGUAGES:
+                if not os.path.exists(po_path(lang)):
+                    init_language(lang)
+            print("\n✅ Translation setup complete!")
+            print("\nNext steps:")
+            print("1. Edit translations/ro/LC_MESSAGES/messages.po")
+            print("2. Edit translations/en/LC_MESSAGES/messages.po")
+            print("3. Run: python manage_translations.py compile")
+            return 0
+
+        if args.command in ('build', 'extract'):
+            extract_messages(state, force=args.force)
+        if args.command != 'extract':
+            do_update = args.command in ('build', 'update')
+            do_compile = args.command in ('build', 'compile')
+            label = {'build': "🔄 Updating and compiling", 'update': "🔄 Updating",
+                     'compile': "⚙️  Compiling", 'stats': "📖 Reading"}[args.command]
+            print(f"{label} {len(locales())} locale(s)...")
+            report = run_locales(state, do_update, do_compile, force=args.force, workers=args.workers)
+            print_stats(report, verbose=args.verbose)
+            if args.check and any(stats['missing'] or stats['fuzzy'] for stats in report.values()):
+                status = 1
+    finally:
+        save_state(state)
+
+    print(f"⏱️  Done in {time.perf_counter() - started:.2f}s")
+    return status
+
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print('🛠️  Translation Management Tool')
-        print('Usage:')
-        print('  python manage_translations.py extract')
-        print('  python manage_translations.py init <language_code>')
-        print('  python manage_translations.py update')
-        print('  python manage_translations.py compile')
-        print('  python manage_translations.py setup    # Run initial setup')
-        sys.exit(1)
-    
-    if sys.argv[1] == 'extract':
-        extract_messages()
-    elif sys.argv[1] == 'init' and len(sys.argv) == 3:
-        init_language(sys.argv[2])
-    elif sys.argv[1] == 'update':
-        update_translations()
-    elif sys.argv[1] == 'compile':
-        compile_translations()
-    elif sys.argv[1] == 'setup':
-        print("🚀 Setting up translations...")
-        extract_messages()
-        init_language('ro')
-        init_language('en')
-        print("\n✅ Translation setup complete!")
-        print("\nNext steps:")
-        print("1. Edit translations/ro/LC_MESSAGES/messages.po")
-        print("2. Edit translations/en/LC_MESSAGES/messages.po") 
-        print("3. Run: python manage_translations.py compile")
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Static pre-rendering for modusvivendioradea.com
+
+Renders every page × language through the real Flask app and writes the
+HTML to disk, so nginx can serve the site without running Python.
+
+With a time-based SEO strategy (daily/weekly/hourly) every title variant
+of every language is rendered into its own directory, and `current/<lang>`
+points at the variant the app would show in that language right now (title
+sets differ in length, so languages move on independently); run
+`python prerender.py activate` from cron (e.g. hourly) to move them along:
+
+    out/
+      variants/<n>/<lang>/index.html
+      variants/<n>/<lang>/about/index.html
+      current/<lang> -> ../variants/<n>/<lang>
+
+Every URL carries its language (/ro/..., /en/...), so nginx maps paths
+straight onto files; unprefixed URLs fall through to Flask, which
+redirects by the `lang` cookie or Accept-Language:
+
+    location ~ ^/(ro|en)(/|$) {
+        root /srv/site/out/current;
+        try_files $uri/index.html @flask;
+    }
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+from utils.seo import STRATEGIES, TIME_BASED_STRATEGIES, get_time_bucket, pinned_time_bucket, select_title
+
+# Endpoints that are baked into static files
+PAGES = ('home', 'about', 'privacy')
+
+_app = None
+
+
+def _get_app():
+    """Import the Flask app once per (worker) process"""
+    global _app
+    if _app is None:
+        from app import app
+        app.config['PAGE_CACHE_ENABLED'] = False
+        _app = app
+    return _app
+
+
+def page_paths(lang):
+    """URL path of every pre-rendered endpoint in a language (/<lang>/...)"""
+    from flask import url_for
+    app = _get_app()
+    with app.test_request_context():
+        return [(endpoint, url_for(endpoint, lang_code=lang)) for endpoint in PAGES]
+
+
+def variant_count(strategy, lang):
+    """Number of distinct title variants a strategy can produce in a language"""
+    if strategy not in TIME_BASED_STRATEGIES:
+        return 1
+    from app import seo_manager
+    return len(seo_manager.titles_for(lang))
+
+
+def live_variant(strategy, lang):
+    """Variant of a language the app shows right now (the index of the title it selects)"""
+    if strategy not in TIME_BASED_STRATEGIES:
+        return 0
+    from app import seo_manager
+    titles = seo_manager.titles_for(lang)
+    return titles.index(select_title(titles, strategy, time_bucket=get_time_bucket(strategy)))
+
+
+def output_file(out_dir, variant, path):
+    return os.path.join(out_dir, 'variants', str(variant), path.strip('/'), 'index.html')
+
+
+def render_job(job):
+    """Render one (variant, language, path) combination; returns (job, seconds, bytes)"""
+    out_dir, base_url, strategy, variant, lang, path = job
+    app = _get_app()
+    from app import seo_manager
+    seo_manager.set_strategy(strategy)
+
+    client = app.test_client()
+    started = time.perf_counter()
+    with pinned_time_bucket(variant):
+        response = client.get(path, base_url=base_url)
+    elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        raise RuntimeError(f"{lang} {path} returned HTTP {response.status_code}")
+
+    target = output_file(out_dir, variant, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(response.data)
+    return job, elapsed, len(response.data)
+
+
+def activate(out_dir, strategy, languages):
+    """Point `current/<lang>` at the title variant of each language that is live right now"""
+    current = os.path.join(out_dir, 'current')
+    if os.path.islink(current):
+        # Single link of earlier builds
+        os.remove(current)
+    os.makedirs(current, exist_ok=True)
+    for lang in languages:
+        variant = live_variant(strategy, lang)
+        link = os.path.join(current, lang)
+        tmp_link = f"{link}.tmp"
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        os.symlink(os.path.join('..', 'variants', str(variant), lang), tmp_link)
+        os.replace(tmp_link, link)
+        print(f"✅ current/{lang} -> variants/{variant}/{lang}")
+
+
+def build(out_dir, base_url, strategy, workers):
+    """Render every page × language × title variant in parallel"""
+    app = _get_app()
+    languages = list(app.config['LANGUAGES'])
+    variants = {lang: variant_count(strategy, lang) for lang in languages}
+    paths = {lang: [path for _, path in page_paths(lang)] for lang in languages}
+    jobs = [(out_dir, base_url, strategy, variant, lang, path)
+            for lang in languages
+            for variant in range(variants[lang])
+            for path in paths[lang]]
+
+    counts = ', '.join(f"{lang}: {count}" for lang, count in variants.items())
+    print(f"🏗️  Pre-rendering {len(jobs)} pages (variants per language {counts}) "
+          f"with {workers} worker(s), strategy '{strategy}'...")
+    started = time.perf_counter()
+
+    if workers > 1:
+        method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        with multiprocessing.get_context(method).Pool(workers) as pool:
+            results = pool.map(render_job, jobs)
+    else:
+        results = [render_job(job) for job in jobs]
+
+    for (_, _, _, variant, lang, path), elapsed, size in sorted(results, key=lambda r: r[0][3:]):
+        print(f"   variants/{variant}{path:<13} {elapsed * 1000:7.1f} ms  {size / 1024:6.1f} KB")
+
+    activate(out_dir, strategy, languages)
+    print(f"✅ Rendered {len(results)} pages in {time.perf_counter() - started:.2f}s → {out_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-render the site into static HTML files')
+    parser.add_argument('command', choices=['build', 'activate'])
+    parser.add_argument('--out', default='build/site', help='Output directory')
+    parser.add_argument('--base-url', default='https://modusvivendioradea.com/',
+                        help='Public URL used for canonical/Open Graph links')
+    parser.add_argument('--strategy', choices=STRATEGIES, help='SEO strategy to render (default: the app\'s)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Parallel render processes')
+    args = parser.parse_args()
+
+    if args.strategy is None:
+        from app import seo_manager
+        args.strategy = seo_manager.strategy
+
+    if args.command == 'build':
+        build(args.out, args.base_url, args.strategy, max(1, args.workers))
+    else:
+        activate(args.out, args.strategy, list(_get_app().config['LANGUAGES']))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Font Awesome subsetting for modusvivendioradea.com
+
+Scans templates/*.html for the Font Awesome icons actually used and writes
+
+    static/css/fa-subset.css               only the base rules + the used icons
+    static/webfonts/subset/*.woff2         fonts holding only the used glyphs
+
+base.html loads fa-subset.css instead of the full all.css when it exists.
+Font subsetting needs fontTools (`pip install fonttools brotli`); without
+it only the CSS is reduced and the full fonts are kept.
+
+Runs automatically as the first stage of `python build_assets.py`.
+
+Usage:
+  python subset_icons.py
+"""
+
+import glob
+import os
+import re
+import sys
+
+try:
+    from fontTools import subset as font_subset
+except ImportError:  # optional - the CSS is still subsetted without it
+    font_subset = None
+
+TEMPLATES_GLOB = os.path.join('templates', '*.html')
+SOURCE_CSS = os.path.join('static', 'css', 'all.css')
+OUTPUT_CSS = os.path.join('static', 'css', 'fa-subset.css')
+WEBFONTS_DIR = os.path.join('static', 'webfonts')
+SUBSET_DIR = os.path.join(WEBFONTS_DIR, 'subset')
+
+# Style classes → font file (without extension)
+STYLE_FONTS = {
+    'solid': 'fa-solid-900',
+    'regular': 'fa-regular-400',
+    'brands': 'fa-brands-400',
+}
+STYLE_CLASSES = {
+    'fas': 'solid', 'fa-solid': 'solid',
+    'far': 'regular', 'fa-regular': 'regular',
+    'fab': 'brands', 'fa-brands': 'brands',
+}
+# @font-face families of the Font Awesome 6 styles (legacy v4/v5 shims are dropped)
+FONT_FACE_STYLES = {
+    ("Font Awesome 6 Free", '900'): 'solid',
+    ("Font Awesome 6 Free", '400'): 'regular',
+    ("Font Awesome 6 Brands", '400'): 'brands',
+}
+
+_CLASS_ATTR_RE = re.compile(r'class\s*=\s*(["\'])(.*?)\1', re.S)
+_ICON_RULE_RE = re.compile(r'^\.(fa-[a-z0-9-]+)::?before$')
+_CONTENT_RE = re.compile(r'content:\s*"\\([0-9a-f]+)"', re.I)
+
+
+def scan_templates(pattern=TEMPLATES_GLOB):
+    """Return {icon_name: set(styles)} for every fa-* icon used in the templates"""
+    used = {}
+    for path in glob.glob(pattern):
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        for _, classes in _CLASS_ATTR_RE.findall(html):
+            tokens = classes.split()
+            styles = {STYLE_CLASSES[t] for t in tokens if t in STYLE_CLASSES} or {'solid'}
+            for token in tokens:
+                if token.startswith('fa-') and token not in STYLE_CLASSES:
+                    used.setdefault(token, set()).update(styles)
+    return used
+
+
+def split_css_blocks(css):
+    """Split a stylesheet into top-level (prelude, body) blocks, keeping nested at-rules whole"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    blocks, depth, start, prelude = [], 0, 0, ''
+    for i, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                prelude, start = css[start:i].strip(), i + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude, css[start:i].strip()))
+                start = i + 1
+    return blocks
+
+
+def _font_face_style(body):
+    family = re.search(r'font-family:\s*["\']([^"\']+)["\']', body)
+    weight = re.search(r'font-weight:\s*(\d+)', body)
+    if not family:
+        return None
+    return FONT_FACE_STYLES.get((family.group(1), weight.group(1) if weight else '400'))
+
+
+def build_subset_css(css, used):
+    """
+    Returns (subset_css, {style: set(codepoints)})
+    Keeps every non-icon rule, only the icon rules in `used` and the @font-face
+    rules of the styles in use (pointing at the subsetted fonts).
+    """
+    kept = []
+    codepoints = {}
+    used_styles = {style for styles in used.values() for style in styles}
+    for prelude, body in split_css_blocks(css):
+        selectors = [s.strip() for s in prelude.split(',')]
+        icons = [_ICON_RULE_RE.match(s) for s in selectors]
+        content = _CONTENT_RE.search(body)
+        if content and all(icons):
+            wanted = [s for s, m in zip(selectors, icons) if m.group(1) in used]
+            if not wanted:
+                continue
+            for m in icons:
+                for style in used.get(m.group(1), ()):
+                    codepoints.setdefault(style, set()).add(int(content.group(1), 16))
+            kept.append(f"{','.join(wanted)}{{{body}}}")
+        elif prelude == '@font-face':
+            style = _font_face_style(body)
+            if style not in used_styles:
+                continue
+            font = STYLE_FONTS[style]
+            src = (f'url("../webfonts/subset/{font}.woff2") format("woff2")'
+                   if font_subset else
+                   f'url("../webfonts/{font}.woff2") format("woff2")')
+            body = re.sub(r'src:[^;}]+', f'src: {src}', body)
+            kept.append(f"{prelude}{{{body}}}")
+        else:
+            kept.append(f"{prelude}{{{body}}}")
+    return '\n'.join(kept) + '\n', codepoints
+
+
+def subset_fonts(codepoints):
+    """Write woff2 fonts holding only the given codepoints per style"""
+    os.makedirs(SUBSET_DIR, exist_ok=True)
+    for style, points in codepoints.items():
+        font = STYLE_FONTS[style]
+        options = font_subset.Options()
+        options.flavor = 'woff2'
+        options.layout_features = ['*']
+        source = font_subset.load_font(os.path.join(WEBFONTS_DIR, f"{font}.ttf"), options)
+        subsetter = font_subset.Subsetter(options)
+        subsetter.populate(unicodes=sorted(points))
+        subsetter.subset(source)
+        target = os.path.join(SUBSET_DIR, f"{font}.woff2")
+        font_subset.save_font(source, target, options)
+        print(f"   {font}: {len(points)} glyphs, "
+              f"{os.path.getsize(os.path.join(WEBFONTS_DIR, f'{font}.woff2')) / 1024:.0f} KB → "
+              f"{os.path.getsize(target) / 1024:.1f} KB")
+
+
+def subset_icons():
+    """Build the Font Awesome subset (CSS + fonts) from the icons used in the templates"""
+    print("🔤 Subsetting Font Awesome...")
+    used = scan_templates()
+    with open(SOURCE_CSS, encoding='utf-8') as f:
+        css, codepoints = build_subset_css(f.read(), used)
+
+    with open(OUTPUT_CSS, 'w', encoding='utf-8') as f:
+        f.write(css)
+    print(f"   {len(used)} fa-* classes in templates → {OUTPUT_CSS} "
+          f"({os.path.getsize(SOURCE_CSS) / 1024:.0f} KB → {len(css.encode('utf-8')) / 1024:.1f} KB)")
+
+    if font_subset is None:
+        print("⚠️  fontTools not installed - keeping the full webfonts (pip install fonttools brotli)")
+    else:
+        subset_fonts(codepoints)
+    print("✅ Font Awesome subset ready")
+
+
+if __name__ == '__main__':
+    sys.exit(subset_icons())
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+
+import pytest
+
+from utils.counters import ShardedCounter
+
+LABELS = ('a', 'b', 'c')
+
+
+def shared_counter(directory):
+    return ShardedCounter(merge_interval=0, shared_dir=str(directory), labels=lambda: LABELS, name='test')
+
+
+def in_dead_process(directory, increments):
+    """Publish increments from a forked process that then exits; returns its counter file name"""
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        counter = shared_counter(directory)
+        for slot, amount in increments:
+            counter.increment(slot, amount)
+        counter.merge()
+        os.write(write, os.path.basename(counter._counter_path()).encode())
+        os._exit(0)
+    os.close(write)
+    name = os.read(read, 1024).decode()
+    os.close(read)
+    os.waitpid(pid, 0)
+    return name
+
+
+def test_merge_sums_every_thread():
+    counter = ShardedCounter(merge_interval=3600)
+
+    def work():
+        for _ in range(1000):
+            counter.increment(1)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.increment(0, 5)
+    assert counter.merge()[:2] == (5, 8000)
+
+
+def test_shards_of_ended_threads_are_retired():
+    counter = ShardedCounter(merge_interval=3600)
+    for _ in range(200):
+        thread = threading.Thread(target=counter.increment, args=(2,))
+        thread.start()
+        thread.join()
+    assert counter.merge()[2] == 200
+    assert len(counter._shards) == 0
+    counter.increment(2)
+    assert counter.merge()[2] == 201
+
+
+def test_reset_is_a_baseline():
+    counter = ShardedCounter(merge_interval=0)
+    counter.increment(0, 3)
+    counter.reset()
+    assert counter.snapshot() == (0,)
+    counter.increment(0, 2)
+    assert counter.snapshot() == (2,)
+
+
+def test_site_wide_sums_processes_and_honours_the_shared_baseline(tmp_path):
+    in_dead_process(tmp_path, [(0, 3), (1, 1)])
+    in_dead_process(tmp_path, [(0, 4)])
+    reader = shared_counter(tmp_path)
+    reader.increment(2)
+    assert reader.site_wide() == {'a': 7, 'b': 1, 'c': 1}
+    reader.reset()
+    assert reader.site_wide() == {}
+    reader.increment(2)
+    assert reader.site_wide() == {'c': 1}
+
+
+def test_dead_processes_are_folded_once(tmp_path):
+    names = [in_dead_process(tmp_path, [(0, 3)]), in_dead_process(tmp_path, [(1, 2)])]
+    reader = shared_counter(tmp_path)
+    assert reader.site_wide() == {'a': 3, 'b': 2}
+    for name in names:
+        assert not os.path.exists(tmp_path / name)
+    with open(tmp_path / 'test_totals.json', encoding='utf-8') as f:
+        assert json.load(f)['labels'] == {'a': 3, 'b': 2}
+    # Reading again neither loses nor re-adds the folded counts
+    assert reader.site_wide() == {'a': 3, 'b': 2}
+
+
+def test_fold_interrupted_before_removal_is_not_counted_twice(tmp_path):
+    name = in_dead_process(tmp_path, [(0, 3)])
+    # As left by a fold that wrote the totals but died before removing the file
+    with open(tmp_path / 'test_totals.json', 'w', encoding='utf-8') as f:
+        json.dump({'labels': {'a': 3}, 'folded': [name]}, f)
+    assert shared_counter(tmp_path).site_wide() == {'a': 3}
+    assert not os.path.exists(tmp_path / name)
+
+
+def test_files_of_other_hosts_are_counted_but_never_folded(tmp_path):
+    name = in_dead_process(tmp_path, [(0, 3)])
+    pid, started, _ = name[len('test_'):-len('.bin')].split('_')
+    foreign = f"test_{pid}_{started}_otherhost"
+    os.rename(tmp_path / name, tmp_path / f"{foreign}.bin")
+    os.rename(tmp_path / name.replace('.bin', '.json'), tmp_path / f"{foreign}.json")
+    assert shared_counter(tmp_path).site_wide() == {'a': 3}
+    assert os.path.exists(tmp_path / f"{foreign}.bin")
+
+
+@pytest.mark.parametrize('invalid', ['test_notapid.bin', 'test_12_34.bin'])
+def test_unrecognised_file_names_are_left_alone(tmp_path, invalid):
+    (tmp_path / invalid).write_bytes(b'')
+    shared_counter(tmp_path).site_wide()
+    assert os.path.exists(tmp_path / invalid)
@@ -0,0 +1,25 @@
+import pytest
+
+from app import app
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.mark.parametrize('referrer', [
+    'https://evil.com//evil.com/x',
+    'https://evil.com/\\evil.com/x',
+    'https://evil.com/\t/evil.com/x',
+    'https://evil.com///evil.com/x',
+])
+def test_set_language_never_redirects_to_another_site(client, referrer):
+    response = client.get('/set_language/en', headers={'Referer': referrer})
+    assert response.status_code == 302
+    assert response.headers['Location'] == '/en/'
+
+
+def test_set_language_keeps_the_page_and_query(client):
+    response = client.get('/set_language/en', headers={'Referer': 'https://example.com/ro/about?x=1'})
+    assert response.headers['Location'] == '/en/about?x=1'
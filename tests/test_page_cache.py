@@ -0,0 +1,71 @@
+import pytest
+from flask import Flask, request
+
+from utils.page_cache import PageCache, SQLitePageStore
+
+
+def make_app(cache):
+    """App with one cached page whose body changes on every render"""
+    app = Flask(__name__)
+    app.renders = 0
+
+    @app.route('/page')
+    @cache.cached('page')
+    def page():
+        app.renders += 1
+        return f"render {app.renders} for {request.args.get('v', '')}"
+
+    return app
+
+
+@pytest.fixture
+def cache():
+    return PageCache(variant=lambda page_key: (request.headers.get('X-Variant', ''),))
+
+
+def test_second_request_is_served_from_the_cache(cache):
+    client = make_app(cache).test_client()
+    first, second = client.get('/page'), client.get('/page')
+    assert first.data == second.data == b'render 1 for '
+    assert first.headers['ETag'] == second.headers['ETag']
+
+
+def test_matching_etag_gets_a_304(cache):
+    client = make_app(cache).test_client()
+    etag = client.get('/page').headers['ETag']
+    response = client.get('/page', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert client.get('/page', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_variants_and_urls_get_their_own_entries(cache):
+    app = make_app(cache)
+    client = app.test_client()
+    plain = client.get('/page')
+    other_variant = client.get('/page', headers={'X-Variant': 'en'})
+    other_url = client.get('/page?v=2')
+    assert app.renders == 3
+    assert len({plain.headers['ETag'], other_variant.headers['ETag'], other_url.headers['ETag']}) == 3
+
+
+def test_clear_invalidates_other_workers_through_the_store(tmp_path):
+    store_path = str(tmp_path / 'pages.db')
+    # Two workers: each has its own LRU in front of the shared store
+    worker_a = PageCache(variant=lambda page_key: (), store=SQLitePageStore(store_path),
+                         generation_check_interval=0)
+    worker_b = PageCache(variant=lambda page_key: (), store=SQLitePageStore(store_path),
+                         generation_check_interval=0)
+    app_a, app_b = make_app(worker_a), make_app(worker_b)
+
+    cached = app_a.test_client().get('/page').data
+    # Worker B finds the page worker A stored
+    assert app_b.test_client().get('/page').data == cached
+    assert app_b.renders == 0
+
+    worker_a.clear()
+    assert worker_a.get_stats()['generation'] == 1
+    # Worker B notices the new generation, drops its LRU and renders again
+    assert app_b.test_client().get('/page').data == b'render 1 for '
+    assert app_b.renders == 1
+    assert worker_b.get_stats()['generation'] == 1
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from utils.seo import (SEOTitleManager, jump_hash, pick_bucket, select_title,
+                       with_title, without_title)
+
+TITLES = tuple(f"Title {i}" for i in range(9))
+
+# 64-bit keys spread like visitor hashes
+KEYS = [random.Random(seed).getrandbits(64) for seed in range(5000)]
+
+
+# Published test vectors of the reference implementation (Lamping & Veach)
+@pytest.mark.parametrize('key, buckets, expected', [
+    (1, 1, 0),
+    (42, 57, 43),
+    (0xDEAD10CC, 1, 0),
+    (0xDEAD10CC, 666, 361),
+    (256, 1024, 520),
+])
+def test_jump_hash_matches_the_reference(key, buckets, expected):
+    assert jump_hash(key, buckets) == expected
+
+
+def test_visitor_hash_is_stable_across_processes():
+    # Keyed with a fixed key: every worker and every restart buckets a visitor the same way
+    assert SEOTitleManager._hash_visitor('203.0.113.7', 'Mozilla/5.0') == 7348081724974575055
+
+
+def test_adding_a_bucket_only_moves_keys_into_it():
+    for key in KEYS:
+        before, after = jump_hash(key, 9), jump_hash(key, 10)
+        assert after == before or after == 9
+
+
+def test_removing_a_title_only_moves_its_own_visitors():
+    removed = TITLES[3]
+    buckets = without_title(TITLES, removed)
+    assert buckets[3] is None and len(buckets) == len(TITLES)
+    moved = 0
+    for key in KEYS:
+        before, after = pick_bucket(TITLES, key), pick_bucket(buckets, key)
+        assert after is not None and after != removed
+        if before != removed:
+            assert after == before
+        else:
+            moved += 1
+    assert moved > 0
+
+
+def test_holes_are_rehashed_evenly():
+    buckets = without_title(TITLES, TITLES[0])
+    counts = {}
+    for key in KEYS:
+        title = pick_bucket(buckets, key)
+        counts[title] = counts.get(title, 0) + 1
+    assert set(counts) == set(TITLES[1:])
+    expected = len(KEYS) / len(counts)
+    assert all(abs(count - expected) < expected * 0.2 for count in counts.values())
+
+
+def test_added_title_fills_the_hole_first():
+    buckets = with_title(without_title(TITLES, TITLES[3]), 'New')
+    assert buckets[3] == 'New' and len(buckets) == len(TITLES)
+    for key in KEYS:
+        before = pick_bucket(TITLES, key)
+        assert pick_bucket(buckets, key) == ('New' if before == TITLES[3] else before)
+
+
+def test_consistent_strategy_uses_the_bucket_table():
+    buckets = without_title(TITLES, TITLES[5])
+    titles = tuple(t for t in buckets if t is not None)
+    for key in KEYS[:500]:
+        assert select_title(titles, 'consistent', visitor_key=key, buckets=buckets) == pick_bucket(buckets, key)
@@ -3,6 +3,9 @@
 Utility modules for the Modus Vivendi website
 """
 
-from .seo import SEOTitleManager, create_seo_manager, get_seo_title, get_seo_description
+from .seo import (SEOTitleManager, LanguageAwareSEOTitleManager, create_seo_manager,
+                  create_language_aware_seo_manager, get_seo_title, get_seo_description,
+                  select_title, SEOContext, get_seo_context, SEOLookupTable)
 
-__all__ = ['SEOTitleManager', 'LanguageAwareSEOTitleManager', 'create_seo_manager', 'get_seo_title', 'get_seo_description', 'create_language_aware_seo_manager']
\ No newline at end of file
+__all__ = ['SEOTitleManager', 'LanguageAwareSEOTitleManager', 'create_seo_manager', 'get_seo_title', 'get_seo_description', 'create_language_aware_seo_manager', 'select_title',
+           'SEOContext', 'get_seo_context', 'SEOLookupTable']
\ No newline at end of file
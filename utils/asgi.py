@@ -0,0 +1,199 @@
+# ============================================
+# File: utils/asgi.py
+# ============================================
+
+import asyncio
+import contextvars
+import io
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Returned by next() when the response body is exhausted
+_DONE = object()
+
+
+class WSGIAdapter:
+    """
+    Serves a WSGI application (the Flask app) to an ASGI server
+
+    Connections live on the server's event loop, so thousands of idle
+    keep-alive connections cost no threads. A thread from the pool is only
+    used while the app computes: to run the view, then to produce each
+    chunk of the body. Between chunks the thread is released, so a slow
+    client holds nothing but its socket while a streamed template is
+    written to it. Rendering stops when the client disconnects.
+
+    Every call into the app for one request runs in the same copy of the
+    contextvars context, which keeps Flask's request context valid while
+    stream_with_context() generators are resumed from different threads.
+    """
+
+    def __init__(self, wsgi_app, threads: int = 32, max_body_size: int = 1024 * 1024):
+        """
+        Args:
+            wsgi_app: The WSGI application
+            threads: Size of the pool running the app (requests rendering at the same time)
+            max_body_size: Largest request body accepted (413 above)
+        """
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self.max_body_size = max_body_size
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'websocket':
+            # Not supported by the app; refuse the handshake
+            await send({'type': 'websocket.close', 'code': 1000})
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Waits for running requests, in a thread so the event loop keeps serving them
+                await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # ---------------------------------------------
+    # Requests
+    # ---------------------------------------------
+
+    async def _read_body(self, receive) -> Optional[bytes]:
+        """The request body, or None when it is larger than max_body_size"""
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return bytes(body)
+            body.extend(message.get('body', b''))
+            if len(body) > self.max_body_size:
+                return None
+            if not message.get('more_body', False):
+                return bytes(body)
+
+    async def _http(self, scope, receive, send) -> None:
+        body = await self._read_body(receive)
+        if body is None:
+            await self._send_plain(send, 413, b'Request body too large')
+            return
+
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+
+        def run(func, *args):
+            return loop.run_in_executor(self.executor, context.run, func, *args)
+
+        start = StartResponse()
+        result = None
+        try:
+            result = await run(self.wsgi_app, self._environ(scope, body), start)
+            iterator = iter(result)
+            # The app may call start_response() lazily, so the headers wait for the first chunk
+            chunk = await run(next, iterator, _DONE)
+            if start.status is None:
+                raise RuntimeError('The WSGI app returned without calling start_response()')
+            await send({'type': 'http.response.start', 'status': start.status, 'headers': start.headers})
+            start.sent = True
+            for pending in start.written:
+                await send({'type': 'http.response.body', 'body': pending, 'more_body': True})
+            while chunk is not _DONE and not disconnected.is_set():
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await run(next, iterator, _DONE)
+            if not disconnected.is_set():
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        except Exception:
+            logger.exception('Unhandled error serving %s', scope.get('path'))
+            if not start.sent:
+                await self._send_plain(send, 500, b'Internal Server Error')
+            else:
+                # Too late for an error page: raising makes the server close the connection,
+                # so the client sees a cut-off response instead of waiting for the rest
+                raise
+        finally:
+            watcher.cancel()
+            if result is not None and hasattr(result, 'close'):
+                await run(result.close)
+
+    @staticmethod
+    async def _send_plain(send, status: int, body: bytes) -> None:
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'text/plain; charset=utf-8'),
+                                (b'content-length', str(len(body)).encode('ascii'))]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    def _environ(self, scope, body: bytes) -> dict:
+        """WSGI environ (PEP 3333) for an ASGI HTTP scope"""
+        root_path = scope.get('root_path', '')
+        path = scope['path']
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            # WSGI strings carry the raw bytes as latin-1
+            'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+            'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1] or 80),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', ()):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                key = name
+            else:
+                key = f'HTTP_{name}'
+            if key in environ:
+                # HTTP/2 sends each cookie as its own header; cookies are joined with '; '
+                value = f"{environ[key]}{'; ' if key == 'HTTP_COOKIE' else ','}{value}"
+            environ[key] = value
+        return environ
+
+
+class StartResponse:
+    """The start_response callable handed to the WSGI app; records status and headers"""
+
+    def __init__(self):
+        self.status: Optional[int] = None
+        self.headers: List[Tuple[bytes, bytes]] = []
+        # Data passed to the legacy write() callable, sent before the body
+        self.written: List[bytes] = []
+        self.sent = False
+
+    def __call__(self, status: str, headers, exc_info=None):
+        if exc_info and self.sent:
+            raise exc_info[1].with_traceback(exc_info[2])
+        self.status = int(status.split(' ', 1)[0])
+        self.headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        return self.written.append
@@ -0,0 +1,292 @@
+# ============================================
+# File: utils/assets.py
+# ============================================
+
+import hashlib
+import json
+import mimetypes
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from flask import current_app, request, send_from_directory, url_for
+from markupsafe import Markup
+
+
+# Output directory of build_assets.py, relative to the static folder
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Hashed files never change, so clients may keep them for a year
+FAR_FUTURE = 365 * 24 * 3600
+IMMUTABLE = f'public, max-age={FAR_FUTURE}, immutable'
+
+# Pre-compressed variants in order of preference: (Content-Encoding, file suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Output directory of critical_css.py, relative to the static folder
+CRITICAL_DIR = 'css/critical'
+
+# Output directory of vendor_assets.py, relative to the static folder
+VENDOR_DIR = 'vendor'
+
+# `as` value of <link rel=preload> by file extension
+PRELOAD_KINDS = {'.css': 'style', '.js': 'script', '.woff2': 'font'}
+
+
+class ThirdPartyAsset(NamedTuple):
+    """Upstream copy of an asset that vendor_assets.py can self-host"""
+    url: str
+    integrity: str = ''
+
+
+THIRD_PARTY_ASSETS = {
+    'bootstrap.css': ThirdPartyAsset(
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css',
+        'sha384-T3c6CoIi6uLrA9TneNEoa7RxnatzjcDSCmG1MXxSR1GAsXEV/Dwwykc2MPK8M2HN'),
+    'bootstrap.js': ThirdPartyAsset(
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.min.js',
+        'sha384-BBtl+eGJRgqQAUMxJ7pMwbEyER4l1g+O15P+16Ep7Q9Q+zqX6gSbd85u4mG4QzX+'),
+    'popper.js': ThirdPartyAsset(
+        'https://cdn.jsdelivr.net/npm/@popperjs/core@2.11.8/dist/umd/popper.min.js',
+        'sha384-I7E8VVD/ismYTF4hNIPjVp/Zjvgyol6VFvRkX/vR+Vc4jQkC+hVqc2pM8ODewa9r'),
+    'lato.css': ThirdPartyAsset(
+        'https://fonts.googleapis.com/css2?family=Lato:ital,wght@0,100;0,300;0,400;0,700;0,900;'
+        '1,100;1,300;1,400;1,700;1,900&display=swap'),
+    'gtag.js': ThirdPartyAsset('https://www.googletagmanager.com/gtag/js?id=G-NTHY6NRHR1'),
+}
+
+
+class ThirdPartyLink(NamedTuple):
+    """Where a template loads a third-party asset from"""
+    # Static filename when vendored, else the upstream URL (what stylesheet() expects)
+    name: str
+    href: str
+    attrs: Dict[str, str]
+
+
+class AssetManifest:
+    """
+    Serves the fingerprinted assets produced by `python build_assets.py`
+
+    url_for('static', filename='css/main.css') resolves to the content-hashed
+    copy (e.g. dist/css/main.3f2a1b9c0d.css) and those files are sent with
+    far-future Cache-Control headers, preferring the pre-generated .br/.gz
+    variant the client accepts. Without a manifest (or in debug mode)
+    the original files are served as before.
+
+    Third-party assets come from static/vendor/ once `python vendor_assets.py`
+    has fetched them, and HTML responses carry a `Link: rel=preload` header
+    for the PRELOAD_ASSETS, which nginx (`early_hints on;`) or Cloudflare
+    send to the browser as 103 Early Hints.
+    """
+
+    def __init__(self, app=None):
+        self.files: Dict[str, str] = {}
+        self.encodings: Dict[str, List[str]] = {}
+        # Changes whenever the build output changes (used in page cache keys)
+        self.version = ''
+        self.static_folder = None
+        # Third-party asset name -> vendored static file ('' = not needed by the site)
+        self.vendored: Dict[str, str] = {}
+        self.vendor_preloads: List[str] = []
+        self._available: Dict[tuple, str] = {}
+        self._send_original = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> 'AssetManifest':
+        self.static_folder = app.static_folder
+        app.config.setdefault('PRELOAD_ASSETS', [])
+        self.load(os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME))
+        self.load_vendored(os.path.join(app.static_folder, VENDOR_DIR, MANIFEST_NAME))
+        app.url_defaults(self._fingerprint_url)
+        self._send_original = app.view_functions['static']
+        app.view_functions['static'] = self.send_static
+        app.add_template_global(self.third_party)
+        app.add_template_global(self.preloads)
+        app.after_request(self._add_preload_header)
+        app.extensions['asset_manifest'] = self
+        return self
+
+    def load(self, path: str) -> None:
+        """Load the manifest written by build_assets.py (missing manifest = no fingerprinting)"""
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            manifest = json.loads(raw)
+        except (OSError, ValueError):
+            raw, manifest = b'', {}
+        self.version = hashlib.sha256(raw).hexdigest()[:12] if raw else ''
+        self.files = manifest.get('files', {})
+        self.encodings = manifest.get('encodings', {})
+        self._available = {}
+
+    def load_vendored(self, path: str) -> None:
+        """Load the manifest written by vendor_assets.py (missing manifest = upstream URLs)"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        self.vendored = manifest.get('files', {})
+        self.vendor_preloads = manifest.get('preload', [])
+
+    def third_party(self, name: str) -> Optional[ThirdPartyLink]:
+        """
+        Self-hosted copy of a third-party asset, or the upstream URL (with its
+        SRI hash) until it is vendored; None when the site doesn't need it
+        """
+        local = self.vendored.get(name)
+        if local is not None:
+            return ThirdPartyLink(local, url_for('static', filename=local), {}) if local else None
+        asset = THIRD_PARTY_ASSETS[name]
+        attrs = {'integrity': asset.integrity, 'crossorigin': 'anonymous'} if asset.integrity else {}
+        return ThirdPartyLink(asset.url, asset.url, attrs)
+
+    def preloads(self) -> List[Tuple[str, str]]:
+        """(URL, kind) of the self-hosted PRELOAD_ASSETS (static files or third-party names)"""
+        critical = current_app.extensions.get('critical_css')
+        result = []
+        for name in [*current_app.config['PRELOAD_ASSETS'], *self.vendor_preloads]:
+            if name in THIRD_PARTY_ASSETS:
+                link = self.third_party(name)
+                if link is None or link.name == link.href:
+                    continue
+                name = link.name
+            elif not self.first_available(name, ''):
+                continue  # not built yet
+            if critical and name in critical.stylesheets:
+                # The page loads the copy without dead rules
+                name = critical.stylesheets[name]
+            kind = PRELOAD_KINDS.get(os.path.splitext(name)[1])
+            if kind:
+                result.append((url_for('static', filename=name), kind))
+        return result
+
+    def _add_preload_header(self, response):
+        if response.status_code != 200 or response.mimetype != 'text/html' or current_app.debug:
+            return response
+        links = []
+        for href, kind in self.preloads():
+            link = f"<{href}>; rel=preload; as={kind}"
+            if kind == 'font':
+                link += '; type="font/woff2"; crossorigin'
+            links.append(link)
+        if links:
+            response.headers.add('Link', ', '.join(links))
+        return response
+
+    def first_available(self, *filenames: str) -> str:
+        """
+        First of the given static files that exists, e.g. a generated subset
+        before the full file it was built from (the last name is the fallback)
+        """
+        choice = self._available.get(filenames)
+        if choice is None:
+            choice = filenames[-1]
+            for filename in filenames:
+                if filename in self.files or os.path.exists(os.path.join(self.static_folder, filename)):
+                    choice = filename
+                    break
+            self._available[filenames] = choice
+        return choice
+
+    def hashed_path(self, filename: str) -> Optional[str]:
+        """Path (relative to the static folder) of the fingerprinted copy of a file"""
+        hashed = self.files.get(filename)
+        return f"{DIST_DIR}/{hashed}" if hashed else None
+
+    def _fingerprint_url(self, endpoint: str, values: dict) -> None:
+        if endpoint != 'static' or current_app.debug:
+            return
+        hashed = self.hashed_path(values.get('filename', ''))
+        if hashed:
+            values['filename'] = hashed
+
+    def send_static(self, filename: str):
+        """Static view: fingerprinted files get pre-compressed variants and far-future caching"""
+        prefix = f"{DIST_DIR}/"
+        if not filename.startswith(prefix) or filename.endswith(('.br', '.gz')):
+            return self._send_original(filename=filename)
+
+        available = self.encodings.get(filename[len(prefix):], ())
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        for encoding, suffix in ENCODINGS:
+            if encoding in available and request.accept_encodings[encoding]:
+                response = self._send_immutable(filename + suffix, mimetype, encoding)
+                break
+        else:
+            response = self._send_immutable(filename, mimetype)
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def _send_immutable(self, filename: str, mimetype: str, encoding: Optional[str] = None):
+        static_files = current_app.extensions.get('static_files')
+        if static_files is not None:
+            # Ranges, conditional requests and X-Accel-Redirect (see utils.static_files)
+            return static_files.send(filename, mimetype, encoding, cache_control=IMMUTABLE)
+        response = send_from_directory(current_app.static_folder, filename, mimetype=mimetype,
+                                       max_age=FAR_FUTURE)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+class CriticalStyles(NamedTuple):
+    """Inline CSS for one page and the stylesheets it covers"""
+    css: Markup
+    # Covered stylesheet (static filename or URL) -> file to load instead (dead rules removed)
+    stylesheets: Dict[str, str]
+
+
+class CriticalCSS:
+    """
+    Above-the-fold CSS produced by `python critical_css.py`
+
+    critical_css(page_key) in templates returns the CSS to inline into
+    <head> for that page; the stylesheets it covers can then be loaded
+    without blocking rendering (see templates/stylesheets.html). Pages
+    without generated CSS, and debug mode, get None and keep the
+    render-blocking stylesheets.
+    """
+
+    def __init__(self, app=None):
+        self.pages: Dict[str, str] = {}
+        self.stylesheets: Dict[str, str] = {}
+        self.directory = None
+        self._css: Dict[str, Markup] = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> 'CriticalCSS':
+        self.directory = os.path.join(app.static_folder, CRITICAL_DIR)
+        self.load()
+        app.add_template_global(self.for_page, 'critical_css')
+        app.extensions['critical_css'] = self
+        return self
+
+    def load(self) -> None:
+        """Load the manifest written by critical_css.py (missing manifest = nothing inlined)"""
+        try:
+            with open(os.path.join(self.directory, MANIFEST_NAME), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        self.pages = manifest.get('pages', {})
+        self.stylesheets = manifest.get('stylesheets', {})
+        self._css = {}
+
+    def for_page(self, page_key: str) -> Optional[CriticalStyles]:
+        if current_app.debug or page_key not in self.pages:
+            return None
+        css = self._css.get(page_key)
+        if css is None:
+            try:
+                with open(os.path.join(self.directory, self.pages[page_key]), encoding='utf-8') as f:
+                    css = Markup(f.read())
+            except OSError:
+                return None
+            self._css[page_key] = css
+        return CriticalStyles(css, self.stylesheets)
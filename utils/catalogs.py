@@ -0,0 +1,328 @@
+# ============================================
+# File: utils/catalogs.py
+# ============================================
+
+import gettext
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+from babel import support
+from flask import g, has_app_context
+from flask_babel import Domain, get_locale
+
+from .logs import log_event
+
+logger = logging.getLogger(__name__)
+
+
+LE_MAGIC = 0x950412de
+BE_MAGIC = 0xde120495
+
+# Marks msgids known to be missing in the resolved-string cache
+_MISSING = object()
+
+
+# ============================================
+# MMAPPED .MO FILES
+# ============================================
+
+class MmapCatalog:
+    """
+    Read-only view of a compiled .mo file, used as the `_catalog` of a
+    GNUTranslations object in place of the dict it normally builds
+
+    The file is mmapped, so its pages live in the OS page cache and are
+    shared by every worker process instead of being copied into each
+    one's heap. Messages are found by binary search over the sorted
+    original-strings table (or an offset index for unsorted files) and
+    decoded on first use; decoded strings are kept per catalog.
+
+    The .mo file must be replaced atomically (write + rename), never
+    rewritten in place - see manage_translations.py compile.
+    """
+
+    def __init__(self, fileobj, charset: str = 'utf-8'):
+        self.charset = charset
+        self.size = os.fstat(fileobj.fileno()).st_size
+        self._map = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = struct.unpack('<I', self._map[:4])[0]
+        if magic == LE_MAGIC:
+            order = '<'
+        elif magic == BE_MAGIC:
+            order = '>'
+        else:
+            raise OSError(0, 'Bad magic number', getattr(fileobj, 'name', ''))
+        version, self._count, self._originals, self._translated = struct.unpack(order + '4I', self._map[4:20])
+        if version >> 16 not in (0, 1):
+            raise OSError(0, f'Bad version number {version >> 16}', getattr(fileobj, 'name', ''))
+        self._entry = struct.Struct(order + 'II')
+        self._resolved: Dict[object, object] = {}
+        self._overrides: Dict[object, str] = {}
+        self._index: Optional[Dict[Tuple[bytes, bool], int]] = None
+        if not self._is_sorted():
+            # Hand-made or foreign catalogs; index the offsets (the strings stay in the map)
+            self._index = {}
+            for i in range(self._count):
+                key = self._key(i)
+                self._index.setdefault((key.split(b'\x00', 1)[0], b'\x00' in key), i)
+
+    def _string(self, table: int, i: int) -> bytes:
+        length, offset = self._entry.unpack_from(self._map, table + 8 * i)
+        return self._map[offset:offset + length]
+
+    def _key(self, i: int) -> bytes:
+        return self._string(self._originals, i)
+
+    def _is_sorted(self) -> bool:
+        previous = None
+        for i in range(self._count):
+            key = self._key(i)
+            if previous is not None and key < previous:
+                return False
+            previous = key
+        return True
+
+    def _find(self, msgid: bytes, plural: bool) -> Optional[int]:
+        """Index of the entry for a msgid (the singular msgid for plural entries)"""
+        if self._index is not None:
+            return self._index.get((msgid, plural))
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < msgid:
+                lo = mid + 1
+            else:
+                hi = mid
+        # b'\0' sorts lowest, so "msgid\0plural" directly follows "msgid" if both exist
+        for i in (lo, lo + 1):
+            if i >= self._count:
+                break
+            key = self._key(i)
+            if plural and key.startswith(msgid + b'\x00'):
+                return i
+            if not plural and key == msgid:
+                return i
+        return None
+
+    def header(self) -> bytes:
+        """Translation of the empty msgid (the catalog's metadata)"""
+        i = self._find(b'', False)
+        return b'' if i is None else self._string(self._translated, i)
+
+    def _lookup(self, key):
+        if isinstance(key, tuple):
+            msgid, form = key
+            i = self._find(msgid.encode(self.charset), True)
+            if i is None:
+                return _MISSING
+            forms = self._string(self._translated, i).split(b'\x00')
+            return forms[form].decode(self.charset) if form < len(forms) else _MISSING
+        i = self._find(key.encode(self.charset), False)
+        return _MISSING if i is None else self._string(self._translated, i).decode(self.charset)
+
+    def get(self, key, default=None):
+        value = self._resolved.get(key)
+        if value is None:
+            value = self._overrides.get(key, _MISSING)
+            if value is _MISSING:
+                value = self._lookup(key)
+            self._resolved[key] = value
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def update(self, other) -> None:
+        """Used by Translations.merge(); merged messages take precedence"""
+        self._overrides.update(other)
+        self._resolved.clear()
+
+    def keys(self) -> Iterator:
+        """Every key the equivalent GNUTranslations dict would have"""
+        for i in range(self._count):
+            key = self._key(i).decode(self.charset)
+            if '\x00' in key:
+                msgid = key.split('\x00', 1)[0]
+                forms = self._string(self._translated, i).count(b'\x00') + 1
+                yield from ((msgid, form) for form in range(forms))
+            else:
+                yield key
+        yield from self._overrides
+
+    __iter__ = keys
+
+    def __len__(self) -> int:
+        return self._count + len(self._overrides)
+
+    def resolve_all(self) -> int:
+        """Decode every message now instead of on first use; returns the number resolved"""
+        for key in self.keys():
+            self.get(key)
+        return len(self._resolved)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'messages': self._count, 'resolved': len(self._resolved), 'mapped_bytes': self.size}
+
+
+class MmapTranslations(support.Translations):
+    """babel Translations whose catalog is an MmapCatalog"""
+
+    def _parse(self, fp):
+        self._info = {}
+        self._charset = None
+        self.plural = lambda n: int(n != 1)
+        self._catalog = catalog = MmapCatalog(fp)
+        # Same metadata handling as gettext.GNUTranslations._parse
+        last_key = None
+        for line in catalog.header().decode(catalog.charset).split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('#-#-#-#-#') and line.endswith('#-#-#-#-#'):
+                continue
+            key = value = None
+            if ':' in line:
+                key, value = line.split(':', 1)
+                key = key.strip().lower()
+                value = value.strip()
+                self._info[key] = value
+                last_key = key
+            elif last_key:
+                self._info[last_key] += '\n' + line
+            if key == 'content-type':
+                self._charset = value.split('charset=')[1]
+            elif key == 'plural-forms':
+                self.plural = gettext.c2py(value.split(';')[1].split('plural=')[1])
+        catalog.charset = self._charset or 'utf-8'
+        catalog._resolved.clear()
+
+
+# ============================================
+# PER-LOCALE STORE
+# ============================================
+
+class CatalogStore:
+    """
+    MmapTranslations per locale, loaded on first use and reopened when the
+    .mo file on disk changes (checked at most every check_interval seconds
+    per locale), so `manage_translations.py compile` needs no restart.
+    A reload swaps in a new object; requests holding the old one finish
+    with it.
+    """
+
+    def __init__(self, translation_dir: str = 'translations', domain: str = 'messages',
+                 check_interval: float = 2.0):
+        """
+        Args:
+            translation_dir: Directory holding <locale>/LC_MESSAGES/<domain>.mo
+            domain: Gettext domain of the catalogs
+            check_interval: Minimum seconds between two mtime checks of a catalog
+        """
+        self.translation_dir = translation_dir
+        self.domain = domain
+        self.check_interval = check_interval
+        # locale -> (file signature, translations, next check)
+        self._loaded: Dict[str, Tuple[Optional[tuple], support.NullTranslations, float]] = {}
+
+    def init_app(self, app, babel) -> 'CatalogStore':
+        """Serve Flask-Babel's gettext calls from this store"""
+        babel.domain_instance = CatalogDomain(self, domain=self.domain)
+        app.extensions['catalogs'] = self
+        return self
+
+    def _path(self, locale: str) -> Optional[str]:
+        for candidate in (locale, locale.split('_')[0]):
+            path = os.path.join(self.translation_dir, candidate, 'LC_MESSAGES', f"{self.domain}.mo")
+            if os.path.exists(path):
+                return path
+        return None
+
+    @staticmethod
+    def _signature(path: Optional[str]) -> Optional[tuple]:
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _load(self, locale: str, previous: Optional[support.NullTranslations] = None
+              ) -> Tuple[Optional[tuple], support.NullTranslations]:
+        path = self._path(locale)
+        signature = self._signature(path)
+        if signature is None:
+            return None, support.NullTranslations()
+        try:
+            with open(path, 'rb') as f:
+                return signature, MmapTranslations(f, domain=self.domain)
+        except (ValueError, struct.error, OSError) as e:
+            # Empty or truncated .mo file: keep the catalog loaded before (until the file changes again)
+            log_event(logger, logging.ERROR, 'catalogs.load_failed', locale=locale, path=path, error=str(e))
+            return signature, previous if previous is not None else support.NullTranslations()
+
+    def get(self, locale: str) -> support.NullTranslations:
+        """Translations for a locale (NullTranslations when there is no catalog)"""
+        entry = self._loaded.get(locale)
+        now = time.monotonic()
+        if entry is not None and now < entry[2]:
+            return entry[1]
+        signature = self._signature(self._path(locale))
+        if entry is None or signature != entry[0]:
+            signature, translations = self._load(locale, entry[1] if entry is not None else None)
+        else:
+            translations = entry[1]
+        self._loaded[locale] = (signature, translations, now + self.check_interval)
+        return translations
+
+    def preload(self, locales) -> Dict[str, int]:
+        """
+        Load the catalogs of `locales` and decode all their messages, e.g. in a
+        master process before it forks workers; returns messages per locale
+        """
+        loaded = {}
+        for locale in locales:
+            catalog = getattr(self.get(locale), '_catalog', None)
+            loaded[locale] = catalog.resolve_all() if isinstance(catalog, MmapCatalog) else 0
+        return loaded
+
+    def clear(self) -> None:
+        self._loaded.clear()
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        stats = {}
+        for locale, (_, translations, _) in list(self._loaded.items()):
+            catalog = getattr(translations, '_catalog', None)
+            if isinstance(catalog, MmapCatalog):
+                stats[locale] = catalog.get_stats()
+        return stats
+
+
+class CatalogDomain(Domain):
+    """Flask-Babel domain backed by a CatalogStore"""
+
+    def __init__(self, store: CatalogStore, domain: str = 'messages'):
+        super().__init__(domain=domain)
+        self.store = store
+
+    def get_translations(self):
+        if not has_app_context():
+            return support.NullTranslations()
+        locale = get_locale()
+        # Resolved once per request; later _() calls only compare the locale object
+        cached = g.get('_babel_translations')
+        if cached is not None and cached[0] is locale:
+            return cached[1]
+        translations = self.store.get(str(locale))
+        g._babel_translations = (locale, translations)
+        return translations
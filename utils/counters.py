@@ -0,0 +1,415 @@
+# ============================================
+# File: utils/counters.py
+# ============================================
+
+import atexit
+import glob
+import json
+import mmap
+import os
+import re
+import socket
+import struct
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # optional - without it, files of dead processes are kept (still counted)
+    fcntl = None
+
+# Counters publishing to a shared directory (see flush_shared)
+_shared_counters: 'weakref.WeakSet[ShardedCounter]' = weakref.WeakSet()
+
+
+def _host_id() -> str:
+    """
+    Names the PID namespace of this process in counter file names: the
+    hostname, plus the namespace's inode where /proc shows it (containers
+    on one host may share a hostname, but not a PID namespace)
+    """
+    host_id = socket.gethostname()
+    try:
+        host_id += '-' + os.readlink('/proc/self/ns/pid').partition('[')[2].rstrip(']')
+    except OSError:
+        pass
+    # '_' separates the fields of the file name
+    return re.sub(r'[^A-Za-z0-9.-]', '-', host_id)
+
+
+def flush_shared() -> None:
+    """
+    Publish the last increments of every shared counter of this process
+    Runs at exit; call it directly before os._exit(), which skips atexit.
+    """
+    for counter in list(_shared_counters):
+        counter.merge()
+
+
+class TitleRegistry:
+    """
+    Maps title strings to small integer IDs so counters can live in flat arrays
+
+    IDs are assigned once and never reused. The lookup table is replaced
+    copy-on-write, so readers never need a lock.
+    """
+
+    def __init__(self, titles: Sequence[str] = ()):
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._titles: Tuple[str, ...] = ()
+        for title in titles:
+            self.id_for(title)
+
+    def id_for(self, title: str) -> int:
+        """Get the ID of a title, registering it on first use"""
+        title_id = self._ids.get(title)
+        if title_id is not None:
+            return title_id
+        with self._lock:
+            title_id = self._ids.get(title)
+            if title_id is None:
+                title_id = len(self._titles)
+                ids = dict(self._ids)
+                ids[title] = title_id
+                self._titles = self._titles + (title,)
+                self._ids = ids
+        return title_id
+
+    @property
+    def titles(self) -> Tuple[str, ...]:
+        """Registered titles, indexed by ID"""
+        return self._titles
+
+
+class _ShardOwner:
+    """Lives in a thread's local storage; collected when the thread ends"""
+
+    __slots__ = ('__weakref__',)
+
+
+class ShardedCounter:
+    """
+    Array of integer counters that is cheap and safe to increment from many threads
+
+    Every thread increments its own shard, so increments never race and
+    never need a lock. Shards are summed by merge(), which runs at most
+    once per merge_interval; readers get the last merged snapshot. The
+    shard of a thread that has ended is added to a retired total at the
+    next merge and dropped, so thread-per-request servers don't make
+    merging slower over time.
+
+    When shared_dir is set, each process also publishes its merged totals
+    to its own mmap-backed file in that directory (one writer per file),
+    and site_wide() sums the files of all worker processes. Other workers'
+    numbers lag by at most merge_interval (or until their next increment).
+    Files of processes that have exited are folded into one totals file
+    and removed when the totals are read, so restarts don't pile them up.
+    Only files written on this host (and PID namespace) are folded; the
+    others' processes can't be checked from here.
+    """
+
+    SLOT = struct.Struct('<q')
+
+    def __init__(self, merge_interval: float = 1.0, shared_dir: Optional[str] = None,
+                 labels: Optional[Callable[[], Sequence[str]]] = None, capacity: int = 64,
+                 name: str = 'seo_counters'):
+        """
+        Args:
+            merge_interval: Minimum seconds between two merges of the shards
+            shared_dir: Directory for cross-process counter files (optional)
+            labels: Callable returning the slot labels (e.g. title strings), written
+                next to the counter file so other processes can map slots to labels
+            capacity: Initial number of slots in the shared file
+            name: Prefix of the files in shared_dir, so several counters can share it
+        """
+        self.name = name
+        self.merge_interval = merge_interval
+        self.shared_dir = shared_dir
+        self._labels = labels or (lambda: ())
+        self._capacity = capacity
+        self._merge_lock = threading.Lock()
+        self._shards_lock = threading.Lock()
+        self._init_process_state()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._init_process_state)
+        if shared_dir:
+            # Publish the last increments of a worker that is shutting down
+            atexit.register(self.merge)
+            _shared_counters.add(self)
+
+    def _init_process_state(self) -> None:
+        """(Re)create the per-process state; also runs in forked children"""
+        self._local = threading.local()
+        self._shards: List[List[int]] = []
+        # Shards of ended threads (appended by their finalizers), folded into _retired by merge()
+        self._ended: List[List[int]] = []
+        self._retired: List[int] = []
+        self._merged: Tuple[int, ...] = ()
+        self._baseline: Tuple[int, ...] = ()
+        self._next_merge = 0.0
+        self._mmap: Optional[mmap.mmap] = None
+        self._mmap_file = None
+        self._published_labels = -1
+        # Unique per process lifetime, so a recycled PID never overwrites a dead worker's file;
+        # the host tells which files' PIDs can be checked from this process
+        self._host_id = _host_id()
+        self._file_id = f"{os.getpid()}_{time.time_ns()}_{self._host_id}"
+        if self._merge_lock.locked():
+            self._merge_lock = threading.Lock()
+        if self._shards_lock.locked():
+            self._shards_lock = threading.Lock()
+
+    # ---------------------------------------------
+    # Hot path
+    # ---------------------------------------------
+
+    def increment(self, slot: int, amount: int = 1) -> None:
+        """Add amount to a counter slot"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._new_shard()
+        if slot >= len(shard):
+            shard.extend([0] * (slot + 1 - len(shard)))
+        shard[slot] += amount
+
+        if time.monotonic() >= self._next_merge:
+            self.merge(block=False)
+
+    def _new_shard(self) -> List[int]:
+        shard: List[int] = []
+        self._local.shard = shard
+        self._local.owner = owner = _ShardOwner()
+        # Runs when the thread's locals are cleared; only appends, so it can run anywhere
+        weakref.finalize(owner, self._ended.append, shard)
+        with self._shards_lock:
+            self._shards.append(shard)
+        return shard
+
+    # ---------------------------------------------
+    # Merging & publishing
+    # ---------------------------------------------
+
+    def merge(self, block: bool = True) -> Tuple[int, ...]:
+        """
+        Sum all thread shards into a new snapshot and publish it
+        Returns the merged per-slot totals of this process
+        """
+        if not self._merge_lock.acquire(blocking=block):
+            return self._merged
+        try:
+            with self._shards_lock:
+                if self._ended:
+                    self._retire_ended()
+                shards = list(self._shards)
+            size = max([len(self._retired)] + [len(shard) for shard in shards])
+            totals = self._retired + [0] * (size - len(self._retired))
+            for shard in shards:
+                # Shards only grow, and only their owner thread writes them
+                for slot, value in enumerate(shard[:size]):
+                    totals[slot] += value
+            self._merged = tuple(totals)
+            self._next_merge = time.monotonic() + self.merge_interval
+            if self.shared_dir:
+                self._publish(self._merged)
+            return self._merged
+        finally:
+            self._merge_lock.release()
+
+    def _retire_ended(self) -> None:
+        """Add the shards of ended threads to the retired totals and stop merging them"""
+        ended = []
+        while self._ended:
+            # pop() is atomic: a finalizer appending meanwhile is picked up or left for next time
+            ended.append(self._ended.pop())
+        ended_ids = {id(shard) for shard in ended}
+        self._shards = [shard for shard in self._shards if id(shard) not in ended_ids]
+        for shard in ended:
+            if len(shard) > len(self._retired):
+                self._retired.extend([0] * (len(shard) - len(self._retired)))
+            for slot, value in enumerate(shard):
+                self._retired[slot] += value
+
+    def _counter_path(self) -> str:
+        return os.path.join(self.shared_dir, f"{self.name}_{self._file_id}.bin")
+
+    def _baseline_path(self) -> str:
+        return os.path.join(self.shared_dir, f'{self.name}_baseline.json')
+
+    def _totals_path(self) -> str:
+        return os.path.join(self.shared_dir, f'{self.name}_totals.json')
+
+    def _publish(self, totals: Tuple[int, ...]) -> None:
+        """Write this process's totals into its own mmap-backed file"""
+        if self._mmap is None or len(totals) > self._capacity:
+            while len(totals) > self._capacity:
+                self._capacity *= 2
+            self._open_mmap()
+        labels = self._labels()
+        if len(labels) != self._published_labels:
+            self._publish_labels(labels)
+        for slot, value in enumerate(totals):
+            self.SLOT.pack_into(self._mmap, slot * self.SLOT.size, value)
+
+    def _open_mmap(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap_file.close()
+        os.makedirs(self.shared_dir, exist_ok=True)
+        path = self._counter_path()
+        self._mmap_file = open(path, 'a+b')
+        size = self._capacity * self.SLOT.size
+        if os.path.getsize(path) < size:
+            self._mmap_file.truncate(size)
+        self._mmap = mmap.mmap(self._mmap_file.fileno(), size)
+
+    def _publish_labels(self, labels: Sequence[str]) -> None:
+        """Store the slot labels next to this process's counter file"""
+        path = self._counter_path()[:-len('.bin')] + '.json'
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(list(labels), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._published_labels = len(labels)
+
+    # ---------------------------------------------
+    # Reading
+    # ---------------------------------------------
+
+    def snapshot(self) -> Tuple[int, ...]:
+        """Current totals of this process"""
+        merged, baseline = self.merge(), self._baseline
+        return tuple(value - (baseline[slot] if slot < len(baseline) else 0)
+                     for slot, value in enumerate(merged))
+
+    def site_wide(self) -> Dict[str, int]:
+        """
+        Totals per label summed across every process that published to shared_dir
+        Falls back to this process's counters when no shared directory is configured
+        """
+        if not self.shared_dir:
+            labels = self._labels()
+            return {labels[slot]: value for slot, value in enumerate(self.snapshot()) if value}
+
+        self.merge()
+        totals = self._read_shared_totals()
+        baseline = self._read_json(self._baseline_path(), {})
+        site_totals = {}
+        for label, value in totals.items():
+            value -= baseline.get(label, 0)
+            if value > 0:
+                site_totals[label] = value
+        return site_totals
+
+    def _read_shared_totals(self) -> Dict[str, int]:
+        """Raw totals per label from all counter files in shared_dir"""
+        self._fold_dead_files()
+        # Not while another process folds, which would hide files or count them twice
+        with self._locked(exclusive=False):
+            totals: Dict[str, int] = dict(self._read_json(self._totals_path(), {}).get('labels', {}))
+            for path in self._counter_files():
+                self._add_file(path, totals)
+        return totals
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """flock on the counter's lock file: exclusive to fold files, shared to read them"""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.shared_dir, exist_ok=True)
+        with open(os.path.join(self.shared_dir, f'{self.name}.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _counter_files(self) -> List[str]:
+        return glob.glob(os.path.join(self.shared_dir, f'{self.name}_[0-9]*.bin'))
+
+    def _add_file(self, path: str, totals: Dict[str, int]) -> None:
+        """Add the values of one process's counter file to totals"""
+        file_labels = self._read_json(path[:-len('.bin')] + '.json', [])
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return
+        count = min(len(file_labels), len(data) // self.SLOT.size)
+        for slot in range(count):
+            value = self.SLOT.unpack_from(data, slot * self.SLOT.size)[0]
+            if value:
+                label = file_labels[slot]
+                totals[label] = totals.get(label, 0) + value
+
+    def _is_dead(self, path: str) -> bool:
+        """Whether the process that wrote a counter file (on this host) has exited"""
+        fields = os.path.basename(path)[len(self.name) + 1:-len('.bin')].split('_')
+        if len(fields) != 3 or fields[2] != self._host_id or not fields[0].isdigit():
+            return False
+        return not self._process_alive(int(fields[0]))
+
+    @staticmethod
+    def _process_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _fold_dead_files(self) -> None:
+        """Move the counts of processes that have exited into the totals file and remove their files"""
+        if fcntl is None:
+            return
+        dead = [path for path in self._counter_files() if self._is_dead(path)]
+        if not dead:
+            return
+        # One folder at a time, or two readers would both add the same file
+        with self._locked(exclusive=True):
+            stored = self._read_json(self._totals_path(), {})
+            totals: Dict[str, int] = stored.get('labels', {})
+            # Files folded before a crash stopped their removal are not added twice
+            folded = set(stored.get('folded', ()))
+            dead = [path for path in dead if os.path.exists(path)]
+            for path in dead:
+                if os.path.basename(path) not in folded:
+                    self._add_file(path, totals)
+            tmp_path = f"{self._totals_path()}.{self._file_id}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'labels': totals, 'folded': [os.path.basename(path) for path in dead]},
+                          f, ensure_ascii=False)
+            os.replace(tmp_path, self._totals_path())
+            for path in dead:
+                for dead_path in (path, path[:-len('.bin')] + '.json'):
+                    try:
+                        os.remove(dead_path)
+                    except FileNotFoundError:
+                        pass
+
+    @staticmethod
+    def _read_json(path: str, default):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def reset(self) -> None:
+        """
+        Reset the counters
+        Shards are never written by other threads (or processes), so the reset
+        is recorded as a baseline that later readings are relative to
+        """
+        self._baseline = self.merge()
+        if self.shared_dir:
+            path = self._baseline_path()
+            tmp_path = f"{path}.{self._file_id}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._read_shared_totals(), f, ensure_ascii=False)
+            os.replace(tmp_path, path)
@@ -0,0 +1,85 @@
+# ============================================
+# File: utils/fragment_cache.py
+# ============================================
+
+import hashlib
+from typing import Callable, Dict
+
+from flask import current_app
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from .page_cache import LRUCache
+
+
+class FragmentCache:
+    """
+    Cache for template fragments that are the same for every visitor with
+    the same language, used through the `{% cache %}` tag:
+
+        {% cache 'footer' %} ... {% endcache %}
+        {% cache 'sidebar', page_key %} ... {% endcache %}
+
+    A fragment is keyed by its name, any extra arguments and the tuple the
+    `variant` callable returns for the template context (language, year, ...).
+    """
+
+    def __init__(self, variant: Callable[[dict], tuple], max_entries: int = 128, ttl: float = 3600.0):
+        """
+        Args:
+            variant: Called with the template context; returns what else fragments depend on
+            max_entries: Size of the LRU
+            ttl: Seconds a rendered fragment stays valid
+        """
+        self.variant = variant
+        self.local = LRUCache(max_entries=max_entries, ttl=ttl)
+
+    @classmethod
+    def from_config(cls, app, variant: Callable[[dict], tuple]) -> 'FragmentCache':
+        """Build a FragmentCache from FRAGMENT_CACHE_* settings and add the tag to Jinja"""
+        cache = cls(variant,
+                    max_entries=app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 128),
+                    ttl=app.config.get('FRAGMENT_CACHE_TTL', 3600))
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.fragment_cache = cache
+        app.extensions['fragment_cache'] = cache
+        return cache
+
+    def make_key(self, name: str, args: tuple, context: dict) -> str:
+        parts = (name,) + tuple(args) + tuple(self.variant(context))
+        return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+    def render(self, name: str, args: tuple, context: dict, caller: Callable[[], str]) -> str:
+        if current_app.debug or not current_app.config.get('FRAGMENT_CACHE_ENABLED', True):
+            return caller()
+        key = self.make_key(name, args, context)
+        html = self.local.get(key)
+        if html is None:
+            html = Markup(caller())
+            self.local.set(key, html)
+        return html
+
+    def clear(self) -> None:
+        self.local.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return self.local.get_stats()
+
+
+class FragmentCacheExtension(Extension):
+    """Jinja extension providing `{% cache name[, args...] %}...{% endcache %}`"""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render', [args[0], nodes.Tuple(args[1:], 'load'), nodes.ContextReference()])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, name, args, context, caller):
+        return self.environment.fragment_cache.render(name, args, context, caller)
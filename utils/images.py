@@ -0,0 +1,206 @@
+# ============================================
+# File: utils/images.py
+# ============================================
+
+import glob
+import hashlib
+import io
+import os
+import re
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+from flask import abort, send_file, url_for
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image, features
+except ImportError:  # optional - templates fall back to the original image
+    Image = features = None
+
+
+# Output formats, in the order browsers should try them: (format, MIME type)
+MODERN_FORMATS = (('avif', 'image/avif'), ('webp', 'image/webp'))
+FALLBACK_FORMATS = {'.png': 'png', '.jpg': 'jpeg', '.jpeg': 'jpeg'}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'png': 'image/png', 'jpeg': 'image/jpeg'}
+SAVE_OPTIONS = {
+    'avif': {'quality': 60},
+    'webp': {'quality': 80, 'method': 6},
+    'png': {'optimize': True},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+MAX_HEIGHT = 2048
+# Pixel densities of the srcsets emitted by the template helper
+DENSITIES = (1, 2)
+# Variants never change for a given source hash, which is part of their URL
+FAR_FUTURE = 365 * 24 * 3600
+
+_RESPONSIVE_IMAGE_RE = re.compile(r'responsive_image\(\s*[\'"]([^\'"]+)[\'"]\s*,\s*(\d+)')
+
+
+def template_images(template_folder: str) -> Set[Tuple[str, int]]:
+    """(filename, height) of every responsive_image() call with literal arguments in the templates"""
+    used = set()
+    for path in glob.glob(os.path.join(template_folder, '*.html')):
+        with open(path, encoding='utf-8') as f:
+            used.update((name, int(height)) for name, height in _RESPONSIVE_IMAGE_RE.findall(f.read()))
+    return used
+
+
+class ResponsiveImages:
+    """
+    Resized, re-encoded image variants with a disk cache
+
+    /img/<height>/<format>/<filename> serves static/<filename> scaled to
+    <height> pixels (never upscaled) as AVIF, WebP or the original format.
+    Variants are cached on disk keyed by the source hash and the
+    parameters, so each one is encoded once. The `responsive_image`
+    template helper emits the matching <picture> markup with 1x/2x srcsets.
+
+    Only variants the helper can emit (found in the templates, or rendered
+    since startup) or that are already cached (pre-generated by
+    build_assets.py) are served; any other size or format is a 404, so
+    requests can't make the server encode arbitrary images.
+    """
+
+    def __init__(self, app=None, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self.static_folder = None
+        self._sources: Dict[str, Tuple[float, str, Tuple[int, int]]] = {}
+        self._variants: Set[Tuple[str, int, str]] = set()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> 'ResponsiveImages':
+        self.static_folder = app.static_folder
+        self.cache_dir = self.cache_dir or app.config.get('IMAGE_CACHE_DIR') or \
+            os.path.join(app.root_path, 'cache', 'images')
+        app.add_url_rule('/img/<int:height>/<fmt>/<path:filename>', 'responsive_image',
+                         self.serve)
+        app.add_template_global(self.picture, 'responsive_image')
+        for filename, height in template_images(os.path.join(app.root_path, app.template_folder)):
+            self.allow(filename, height)
+        app.extensions['responsive_images'] = self
+        return self
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def formats(self):
+        """Modern formats the installed Pillow can encode"""
+        return [(fmt, mime) for fmt, mime in MODERN_FORMATS if features.check(fmt)]
+
+    def allow(self, filename: str, height: int) -> None:
+        """Make the variants responsive_image(filename, height) links to servable"""
+        if not self.available:
+            return
+        fallback = FALLBACK_FORMATS.get(os.path.splitext(filename)[1].lower())
+        formats = [fmt for fmt, _ in self.formats()] + ([fallback] if fallback else [])
+        self._variants.update((filename, height * density, fmt) for density in DENSITIES for fmt in formats)
+
+    def _source_info(self, filename: str) -> Tuple[str, Tuple[int, int]]:
+        """(content hash, (width, height)) of a static image, cached by mtime"""
+        path = self._source_path(filename)
+        mtime = os.path.getmtime(path)
+        cached = self._sources.get(filename)
+        if cached and cached[0] == mtime:
+            return cached[1], cached[2]
+        with open(path, 'rb') as f:
+            data = f.read()
+        with Image.open(io.BytesIO(data)) as image:
+            size = image.size
+        info = (mtime, hashlib.sha256(data).hexdigest()[:16], size)
+        self._sources[filename] = info
+        return info[1], info[2]
+
+    def _source_path(self, filename: str) -> str:
+        path = os.path.realpath(os.path.join(self.static_folder, filename))
+        if not path.startswith(os.path.realpath(self.static_folder) + os.sep):
+            raise FileNotFoundError(filename)
+        return path
+
+    def _target(self, filename: str, height: int, fmt: str) -> Tuple[str, int]:
+        """(path of the cached variant, height actually produced)"""
+        if fmt not in SAVE_OPTIONS or not 0 < height <= MAX_HEIGHT:
+            raise ValueError(f"Unsupported image variant {height}/{fmt}")
+        source_hash, (_, source_height) = self._source_info(filename)
+        height = min(height, source_height)
+        key = hashlib.sha256(f"{source_hash}:{height}:{fmt}".encode()).hexdigest()[:24]
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{fmt}"), height
+
+    def generate(self, filename: str, height: int, fmt: str) -> str:
+        """Create (or reuse) the cached variant and return its path on disk"""
+        target, height = self._target(filename, height, fmt)
+        if os.path.exists(target):
+            return target
+
+        with self._lock:
+            if os.path.exists(target):
+                return target
+            with Image.open(self._source_path(filename)) as image:
+                image.load()
+                width, source_height = image.size
+                if fmt == 'jpeg' and image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                new_size = (max(1, round(width * height / source_height)), height)
+                if new_size != image.size:
+                    image = image.resize(new_size, Image.LANCZOS)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                tmp_path = f"{target}.{os.getpid()}.tmp"
+                image.save(tmp_path, format=fmt.upper(), **SAVE_OPTIONS[fmt])
+                os.replace(tmp_path, target)
+        return target
+
+    def serve(self, height: int, fmt: str, filename: str):
+        """View serving one image variant"""
+        if not self.available:
+            abort(404)
+        try:
+            if (filename, height, fmt) in self._variants:
+                path = self.generate(filename, height, fmt)
+            else:
+                path, _ = self._target(filename, height, fmt)
+                if not os.path.exists(path):
+                    abort(404)
+        except (FileNotFoundError, ValueError, OSError):
+            abort(404)
+        return send_file(path, mimetype=MIME_TYPES[fmt], max_age=FAR_FUTURE)
+
+    def _variant_url(self, filename: str, height: int, fmt: str, version: str) -> str:
+        return url_for('responsive_image', height=height, fmt=fmt, filename=filename, v=version)
+
+    def picture(self, filename: str, height: int, alt: str = '', **attrs) -> Markup:
+        """
+        <picture> markup for a static image displayed `height` CSS pixels tall
+        Extra keyword arguments become attributes of the <img> tag.
+        """
+        fallback = FALLBACK_FORMATS.get(os.path.splitext(filename)[1].lower())
+        attrs.setdefault('loading', 'lazy')
+        attrs.setdefault('decoding', 'async')
+        try:
+            if not self.available or fallback is None:
+                raise FileNotFoundError(filename)
+            version, (width, source_height) = self._source_info(filename)
+            self.allow(filename, height)
+        except (FileNotFoundError, OSError):
+            img_attrs = ''.join(f' {k}="{escape(v)}"' for k, v in attrs.items())
+            return Markup(f'<img src="{escape(url_for("static", filename=filename))}" '
+                          f'alt="{escape(alt)}"{img_attrs}>')
+
+        display_width = max(1, round(width * height / source_height))
+
+        def srcset(fmt):
+            return ', '.join(f"{self._variant_url(filename, height * density, fmt, version)} {density}x"
+                             for density in DENSITIES if density == 1 or height * density <= source_height)
+
+        sources = ''.join(f'<source type="{mime}" srcset="{escape(srcset(fmt))}">'
+                          for fmt, mime in self.formats())
+        img_attrs = ''.join(f' {k}="{escape(v)}"' for k, v in attrs.items())
+        return Markup(
+            f'<picture>{sources}'
+            f'<img src="{escape(self._variant_url(filename, height, fallback, version))}" '
+            f'srcset="{escape(srcset(fallback))}" width="{display_width}" height="{height}" '
+            f'alt="{escape(alt)}"{img_attrs}></picture>'
+        )
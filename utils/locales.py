@@ -0,0 +1,172 @@
+# ============================================
+# File: utils/locales.py
+# ============================================
+
+from typing import Optional
+from urllib.parse import urlencode, urlsplit
+
+from flask import g, has_request_context, redirect, request, url_for
+
+
+# Where the language of a request came from (see LocaleNegotiator.resolve)
+SOURCE_URL = 'url'
+SOURCE_COOKIE = 'cookie'
+SOURCE_HEADER = 'accept-language'
+SOURCE_DEFAULT = 'default'
+
+ONE_YEAR = 365 * 24 * 3600
+
+
+class LocaleNegotiator:
+    """
+    Resolves the language of a request once and remembers the visitor's choice
+
+    Pages registered with route() live under a language prefix (/ro/about,
+    /en/about), so every URL has exactly one language and responses can be
+    stored by nginx or a CDN without varying on anything. The unprefixed
+    URL redirects to the visitor's language.
+
+    Outside the prefixed pages the language is taken from `?lang=`, then the
+    LANGUAGE_COOKIE cookie, then Accept-Language, then BABEL_DEFAULT_LOCALE,
+    and those responses are sent with `Vary: Cookie, Accept-Language`. The
+    cookie is a plain unsigned value, written only on an explicit choice
+    (`?lang=`, remember()) that differs from the one it already carries.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.languages = ()
+        self.default = 'ro'
+        self.cookie_name = 'lang'
+        self.cookie_max_age = ONE_YEAR
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> 'LocaleNegotiator':
+        app.config.setdefault('LANGUAGE_COOKIE', 'lang')
+        app.config.setdefault('LANGUAGE_COOKIE_MAX_AGE', ONE_YEAR)
+        self.app = app
+        self.languages = tuple(app.config['LANGUAGES'])
+        self.default = app.config.get('BABEL_DEFAULT_LOCALE', self.languages[0])
+        self.cookie_name = app.config['LANGUAGE_COOKIE']
+        self.cookie_max_age = app.config['LANGUAGE_COOKIE_MAX_AGE']
+        app.url_value_preprocessor(self._pull_lang_code)
+        app.url_defaults(self._add_lang_code)
+        app.after_request(self._after_request)
+        app.add_template_global(self.localized_url)
+        app.extensions['locale_negotiator'] = self
+        return self
+
+    def route(self, rule: str, **options):
+        """
+        Like app.route(), but registers the view under /<lang_code>rule and
+        redirects the unprefixed rule (the legacy URL) to it
+        """
+        def decorator(view):
+            endpoint = options.pop('endpoint', view.__name__)
+            prefix = f"/<any({', '.join(self.languages)}):lang_code>"
+            self.app.add_url_rule(prefix + rule, endpoint, view, **options)
+            self.app.add_url_rule(rule, f'{endpoint}_unprefixed',
+                                  lambda **values: self._redirect_unprefixed(endpoint, values), **options)
+            return view
+        return decorator
+
+    def _redirect_unprefixed(self, endpoint: str, values: dict):
+        lang = self.resolve()
+        query = request.args.copy()
+        query.pop('lang', None)
+        target = url_for(endpoint, lang_code=lang, **values)
+        if query:
+            # Appended verbatim, never passed to url_for() (where names like _external are options)
+            target += '?' + urlencode(list(query.items(multi=True)))
+        # With ?lang= the target never changes; otherwise it depends on cookie/Accept-Language
+        return redirect(target, 301 if self.source == SOURCE_URL else 302)
+
+    def _pull_lang_code(self, endpoint, values) -> None:
+        if values and 'lang_code' in values:
+            g.url_language = values.pop('lang_code')
+
+    def _add_lang_code(self, endpoint, values) -> None:
+        if 'lang_code' in values or not self.app.url_map.is_endpoint_expecting(endpoint, 'lang_code'):
+            return
+        values['lang_code'] = self.resolve() if has_request_context() else self.default
+
+    def localized_url(self, lang: Optional[str] = None) -> Optional[str]:
+        """
+        Absolute URL of the current page in another language (for canonical
+        and hreflang links); without a language, the unprefixed URL that
+        redirects by preference. None when the page has no language prefix.
+        """
+        endpoint = request.endpoint
+        if not endpoint or g.get('url_language') is None:
+            return None
+        values = dict(request.view_args or {})
+        # Re-pushed request contexts (streamed templates) match the URL again, prefix included
+        values.pop('lang_code', None)
+        if lang is None:
+            return url_for(f'{endpoint}_unprefixed', _external=True, **values)
+        return url_for(endpoint, lang_code=lang, _external=True, **values)
+
+    def translate_path(self, url: Optional[str], lang: str) -> Optional[str]:
+        """
+        Path (and query) of a same-site URL with its language prefix swapped for `lang`
+        None when the path would lead a browser to another site
+        """
+        parts = urlsplit(url or '')
+        # Browsers read '//host' and '/\host' as another site (urlsplit already drops tabs and newlines)
+        if parts.path and (not parts.path.startswith('/') or parts.path[1:2] in ('/', '\\')):
+            return None
+        segments = parts.path.split('/')
+        if len(segments) > 1 and segments[1] in self.languages:
+            segments[1] = lang
+            path = '/'.join(segments)
+        else:
+            path = parts.path or '/'
+        return f"{path}?{parts.query}" if parts.query else path
+
+    def _negotiate(self):
+        lang = g.get('url_language')
+        if lang:
+            return lang, SOURCE_URL
+        lang = request.args.get('lang')
+        if lang in self.languages:
+            # An explicit choice is kept for the next visit
+            self.remember(lang)
+            return lang, SOURCE_URL
+        lang = request.cookies.get(self.cookie_name)
+        if lang in self.languages:
+            return lang, SOURCE_COOKIE
+        lang = request.accept_languages.best_match(self.languages)
+        if lang:
+            return lang, SOURCE_HEADER
+        return self.default, SOURCE_DEFAULT
+
+    def resolve(self) -> str:
+        """Language of the current request (negotiated on first call)"""
+        lang = g.get('language')
+        if lang is None:
+            lang, g.language_source = self._negotiate()
+            g.language = lang
+        return lang
+
+    @property
+    def source(self) -> str:
+        """Where the current request's language came from"""
+        self.resolve()
+        return g.language_source
+
+    def remember(self, lang: str) -> None:
+        """Store the visitor's language in the cookie (only written if it changes)"""
+        if lang in self.languages and request.cookies.get(self.cookie_name) != lang:
+            g.language_cookie = lang
+
+    def _after_request(self, response):
+        lang = g.get('language_cookie')
+        if lang is not None:
+            response.set_cookie(self.cookie_name, lang, max_age=self.cookie_max_age,
+                                samesite='Lax', secure=request.is_secure)
+            response.cache_control.public = False
+            response.cache_control.private = True
+        if g.get('language_source') not in (None, SOURCE_URL):
+            response.vary.update(('Cookie', 'Accept-Language'))
+        return response
@@ -0,0 +1,172 @@
+# ============================================
+# File: utils/logs.py
+# ============================================
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Mapping, Optional
+
+
+# Attributes every LogRecord has - anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line
+    Structured fields passed through `extra` (or log_event) become top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records of high-frequency events
+
+    Rates are keyed by the record's `event` field; events without a rate
+    (and records without an event) always pass.
+    """
+
+    def __init__(self, rates: Optional[Mapping[str, float]] = None):
+        super().__init__()
+        self.rates = dict(rates or {})
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(getattr(record, 'event', None))
+        if rate is None or rate >= 1.0:
+            return True
+        if random.random() < rate:
+            record.sample_rate = rate
+            return True
+        return False
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields) -> None:
+    """
+    Log a structured event
+    Costs a single level check when the level is disabled for the logger.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'event': event, **fields})
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Parse 'utils.seo=DEBUG,werkzeug=WARNING' into {'utils.seo': 'DEBUG', ...}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, level = item.partition('=')
+        if level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class _LoggingState:
+    handler: Optional[logging.Handler] = None
+    log_queue: Optional[queue.SimpleQueue] = None
+    # The handler this module put on the root logger (the only one it ever removes)
+    queue_handler: Optional[logging.Handler] = None
+    listener: Optional[logging.handlers.QueueListener] = None
+    hooks_registered = False
+
+
+_state = _LoggingState()
+
+
+def _start_listener() -> None:
+    listener = logging.handlers.QueueListener(_state.log_queue, _state.handler,
+                                              respect_handler_level=True)
+    listener.start()
+    _state.listener = listener
+
+
+def _stop_listener() -> None:
+    if _state.listener is not None:
+        _state.listener.stop()
+        _state.listener = None
+
+
+def flush_logging() -> None:
+    """
+    Write out the queued records and stop the listener thread
+    Runs at exit; call it directly before os._exit(), which skips atexit.
+    """
+    _stop_listener()
+
+
+def _restart_listener_after_fork() -> None:
+    # The listener thread does not survive a fork - give each worker its own
+    if _state.listener is not None:
+        _state.listener = None
+        _start_listener()
+
+
+def configure_logging(app=None, level: Optional[str] = None,
+                      levels: Optional[Mapping[str, str]] = None,
+                      sample_rates: Optional[Mapping[str, float]] = None,
+                      stream=None) -> None:
+    """
+    Route all logging through a queue to a background thread that writes JSON lines
+
+    Request threads only put records on an in-memory queue; formatting
+    and the (blocking) write to stdout happen on the listener thread.
+    Handlers installed by the host process (gunicorn's --log-config,
+    pytest's caplog, Sentry) are left on the root logger; calling this
+    again only replaces the queue handler it added before.
+
+    Args:
+        app: Flask app to read LOG_LEVEL / LOG_LEVELS / LOG_SAMPLE_RATES from (optional)
+        level: Root log level (default: LOG_LEVEL, else INFO)
+        levels: Per-logger levels, e.g. {'utils.seo': 'DEBUG'}
+        sample_rates: Per-event sampling rates, e.g. {'seo.title_selected': 0.01}
+        stream: Output stream (default: stdout)
+    """
+    config = app.config if app is not None else {}
+    level = level or config.get('LOG_LEVEL') or 'INFO'
+    levels = levels if levels is not None else config.get('LOG_LEVELS', {})
+    sample_rates = sample_rates if sample_rates is not None else config.get('LOG_SAMPLE_RATES', {})
+
+    _stop_listener()
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JSONFormatter())
+    _state.handler = handler
+    _state.log_queue = queue.SimpleQueue()
+
+    root = logging.getLogger()
+    if _state.queue_handler is not None:
+        root.removeHandler(_state.queue_handler)
+    queue_handler = logging.handlers.QueueHandler(_state.log_queue)
+    # Sample before enqueueing, so dropped records cost the request thread nothing more
+    queue_handler.addFilter(SamplingFilter(sample_rates))
+    root.addHandler(queue_handler)
+    _state.queue_handler = queue_handler
+    root.setLevel(level.upper())
+    for name, logger_level in levels.items():
+        logging.getLogger(name).setLevel(logger_level.upper())
+
+    _start_listener()
+    if not _state.hooks_registered:
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=_restart_listener_after_fork)
+        atexit.register(_stop_listener)
+        _state.hooks_registered = True
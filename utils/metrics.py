@@ -0,0 +1,264 @@
+# ============================================
+# File: utils/metrics.py
+# ============================================
+
+import bisect
+import time
+from functools import wraps
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from flask import Response, g, has_request_context, request, template_rendered, before_render_template
+
+from .counters import ShardedCounter
+
+
+# Upper bounds of the latency buckets, in seconds (an implicit +Inf bucket follows)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Phases of a request timed by default (see RequestMetrics.init_app)
+PHASE_LOCALE = 'locale'
+PHASE_CONTEXT = 'context'
+PHASE_SEO = 'seo'
+PHASE_RENDER = 'render'
+PHASE_APP = 'app'
+DEFAULT_PHASES = (PHASE_LOCALE, PHASE_CONTEXT, PHASE_SEO, PHASE_RENDER, PHASE_APP)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# ============================================
+# HISTOGRAMS
+# ============================================
+
+class HistogramSet:
+    """
+    One latency histogram per phase, in a fixed number of integer counters
+
+    Each phase owns len(buckets) + 3 slots of a ShardedCounter: a count per
+    bucket (the last one is +Inf), the sum of observations in nanoseconds
+    and the number of observations. Memory does not grow with traffic, and
+    with a shared directory the histograms of all worker processes add up
+    the same way the SEO usage counters do.
+    """
+
+    def __init__(self, phases: Sequence[str] = DEFAULT_PHASES, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 shared_dir: Optional[str] = None, merge_interval: float = 1.0):
+        """
+        Args:
+            phases: Names of the histograms
+            buckets: Increasing upper bounds of the buckets, in seconds
+            shared_dir: Directory for aggregating across worker processes (optional)
+            merge_interval: Minimum seconds between two merges of the thread shards
+        """
+        self.phases = tuple(phases)
+        self.buckets = tuple(buckets)
+        self._bounds_ns = [round(bound * 1e9) for bound in self.buckets]
+        self._stride = len(self.buckets) + 3
+        self._base = {phase: i * self._stride for i, phase in enumerate(self.phases)}
+        self._labels = tuple(self._make_labels())
+        self._counter = ShardedCounter(merge_interval=merge_interval, shared_dir=shared_dir,
+                                       labels=lambda: self._labels,
+                                       capacity=len(self._labels), name='request_metrics')
+
+    def _make_labels(self) -> Iterable[str]:
+        for phase in self.phases:
+            for bound in self.buckets:
+                yield f"{phase}|{bound!r}"
+            yield f"{phase}|+Inf"
+            yield f"{phase}|sum_ns"
+            yield f"{phase}|count"
+
+    def __contains__(self, phase: str) -> bool:
+        return phase in self._base
+
+    def observe(self, phase: str, duration_ns: int) -> None:
+        """Record one observation (unknown phases raise KeyError)"""
+        base = self._base[phase]
+        counter = self._counter
+        counter.increment(base + bisect.bisect_left(self._bounds_ns, duration_ns))
+        counter.increment(base + self._stride - 2, duration_ns)
+        counter.increment(base + self._stride - 1)
+
+    def totals(self) -> Dict[str, Tuple[List[int], int, int]]:
+        """
+        Per phase: (non-cumulative bucket counts, sum in ns, count), summed
+        across processes when a shared directory is configured
+        """
+        values = self._counter.site_wide()
+        totals = {}
+        for phase in self.phases:
+            labels = self._labels[self._base[phase]:self._base[phase] + self._stride]
+            counts = [values.get(label, 0) for label in labels]
+            totals[phase] = (counts[:-2], counts[-2], counts[-1])
+        return totals
+
+    def reset(self) -> None:
+        self._counter.reset()
+
+
+# ============================================
+# REQUEST INSTRUMENTATION
+# ============================================
+
+class RequestMetrics:
+    """
+    Times the phases of each request: locale resolution, context processors,
+    SEO title/description selection, template rendering and the whole request
+
+    Time spent in each phase is summed per request on `g`, sent back in a
+    `Server-Timing` header (visible in the browser's network panel) and
+    recorded once per request in the phase's histogram. Functions are
+    instrumented with the timed() decorator; rendering is timed through
+    Flask's template signals. Phases that did not run in a request (e.g.
+    a page served from the page cache) are not recorded.
+    """
+
+    def __init__(self, app=None):
+        self.histograms: Optional[HistogramSet] = None
+        self.server_timing = True
+        self.skip_endpoints = frozenset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> 'RequestMetrics':
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_SERVER_TIMING', True)
+        app.config.setdefault('METRICS_DIR', None)
+        app.config.setdefault('METRICS_BUCKETS', DEFAULT_BUCKETS)
+        app.config.setdefault('METRICS_SKIP_ENDPOINTS', ('static',))
+        self.server_timing = app.config['METRICS_SERVER_TIMING']
+        self.skip_endpoints = frozenset(app.config['METRICS_SKIP_ENDPOINTS'])
+        self.histograms = HistogramSet(buckets=app.config['METRICS_BUCKETS'],
+                                       shared_dir=app.config['METRICS_DIR'])
+        if app.config['METRICS_ENABLED']:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+            before_render_template.connect(self._render_started, app)
+            template_rendered.connect(self._render_finished, app)
+        app.extensions['request_metrics'] = self
+        return self
+
+    # ---------------------------------------------
+    # Hot path
+    # ---------------------------------------------
+
+    def add(self, phase: str, duration_ns: int) -> None:
+        """Add time spent in a phase to the current request (ignored outside requests)"""
+        timings = g.get('_phase_timings') if has_request_context() else None
+        if timings is not None:
+            timings[phase] = timings.get(phase, 0) + duration_ns
+
+    def timed(self, phase: str) -> Callable:
+        """Decorator adding the time spent in a function to a phase of the request"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.add(phase, time.perf_counter_ns() - started)
+            return wrapper
+        return decorator
+
+    def _before_request(self) -> None:
+        if request.endpoint not in self.skip_endpoints:
+            g._phase_timings = {}
+            g._request_started = time.perf_counter_ns()
+
+    def _render_started(self, sender, template, context, **extra) -> None:
+        # Templates can render templates (e.g. a fragment), so starts are stacked
+        if g.get('_phase_timings') is not None:
+            g.setdefault('_render_starts', []).append(time.perf_counter_ns())
+
+    def _render_finished(self, sender, template, context, **extra) -> None:
+        starts = g.get('_render_starts')
+        if starts:
+            duration = time.perf_counter_ns() - starts.pop()
+            if not starts:
+                # Only the outermost render counts, nested ones are part of it
+                self.add(PHASE_RENDER, duration)
+
+    def _after_request(self, response: Response) -> Response:
+        timings = g.get('_phase_timings')
+        if timings is None:
+            return response
+        started = g.get('_request_started')
+        if response.is_streamed and not response.direct_passthrough:
+            # The headers leave before the template renders: Server-Timing has the phases
+            # run so far, render and total time are recorded once the body is generated
+            if self.server_timing and timings:
+                response.headers.add('Server-Timing', format_server_timing(timings))
+            response.response = self._observe_when_done(response.response, timings, started)
+            return response
+        del g._phase_timings
+        timings[PHASE_APP] = time.perf_counter_ns() - started
+        self._observe(timings)
+        if self.server_timing:
+            response.headers.add('Server-Timing', format_server_timing(timings))
+        return response
+
+    def _observe_when_done(self, body, timings: Dict[str, int], started: int) -> Iterator:
+        try:
+            yield from body
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        # Only reached when the whole body was generated (the render added itself through g)
+        timings[PHASE_APP] = time.perf_counter_ns() - started
+        self._observe(timings)
+
+    def _observe(self, timings: Dict[str, int]) -> None:
+        for phase, duration in timings.items():
+            if phase in self.histograms:
+                self.histograms.observe(phase, duration)
+
+    # ---------------------------------------------
+    # Export
+    # ---------------------------------------------
+
+    def prometheus(self, extra: Optional[Dict[str, Tuple[str, str, Dict[tuple, float]]]] = None) -> str:
+        """
+        The histograms (and any extra metrics) in the Prometheus text format
+
+        Args:
+            extra: name -> (type, help, {label pairs: value}) for other metrics to
+                expose, e.g. cache hit counters
+        """
+        lines = ['# HELP request_phase_seconds Time spent in each phase of a request',
+                 '# TYPE request_phase_seconds histogram']
+        for phase, (counts, sum_ns, count) in self.histograms.totals().items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.histograms.buckets + (None,), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound is None else repr(bound)
+                lines.append(f'request_phase_seconds_bucket{{phase="{phase}",le="{le}"}} {cumulative}')
+            lines.append(f'request_phase_seconds_sum{{phase="{phase}"}} {sum_ns / 1e9!r}')
+            lines.append(f'request_phase_seconds_count{{phase="{phase}"}} {count}')
+        for name, (metric_type, help_text, samples) in (extra or {}).items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for labels, value in samples.items():
+                lines.append(f'{name}{format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def prometheus_response(self, extra=None) -> Response:
+        return Response(self.prometheus(extra), content_type=PROMETHEUS_CONTENT_TYPE,
+                        headers={'Cache-Control': 'no-store'})
+
+
+def format_server_timing(timings: Dict[str, int]) -> str:
+    """Server-Timing header value for phase durations in nanoseconds"""
+    return ', '.join(f"{phase};dur={duration / 1e6:.3f}" for phase, duration in timings.items())
+
+
+def format_labels(labels: tuple) -> str:
+    """{name="value",...} for a tuple of (name, value) pairs, escaped for Prometheus"""
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
@@ -0,0 +1,254 @@
+# ============================================
+# File: utils/page_cache.py
+# ============================================
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, NamedTuple, Optional
+
+from flask import Response, current_app, request
+
+
+class CachedPage(NamedTuple):
+    """A rendered page body with the validators needed to answer conditional requests"""
+    body: bytes
+    etag: str
+    mimetype: str
+
+
+class LRUCache:
+    """
+    Bounded in-process cache with least-recently-used eviction and a TTL per entry
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: str, value, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class SQLitePageStore:
+    """
+    Shared page store in a local SQLite file, so every worker process
+    (and worker restarts) can reuse pages rendered by any other worker
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        if hasattr(os, 'register_at_fork'):
+            # SQLite connections must not be shared with a forked child
+            os.register_at_fork(after_in_child=self._reset_connections)
+        with self._connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS pages ('
+                       'key TEXT PRIMARY KEY, body BLOB, etag TEXT, mimetype TEXT, expires REAL)')
+            db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)')
+            db.execute("INSERT OR IGNORE INTO meta VALUES ('generation', 0)")
+
+    def _reset_connections(self) -> None:
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[CachedPage]:
+        row = self._connect().execute(
+            'SELECT body, etag, mimetype FROM pages WHERE key = ? AND expires > ?',
+            (key, time.time())).fetchone()
+        return CachedPage(*row) if row else None
+
+    def set(self, key: str, page: CachedPage, ttl: float) -> None:
+        self._connect().execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)',
+                                (key, page.body, page.etag, page.mimetype, time.time() + ttl))
+
+    def generation(self) -> int:
+        row = self._connect().execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def clear(self) -> int:
+        """Drop every page and bump the generation; returns the new generation"""
+        db = self._connect()
+        db.execute('DELETE FROM pages')
+        db.execute("UPDATE meta SET value = value + 1 WHERE name = 'generation'")
+        return self.generation()
+
+
+class PageCache:
+    """
+    Full-page response cache with strong ETags and 304 responses
+
+    Pages are keyed by URL plus a variant tuple returned by the `variant`
+    callable (e.g. language, SEO title, year), so two requests only share
+    an entry when they would render byte-identical HTML.
+    """
+
+    def __init__(self, variant: Callable[[str], tuple], max_entries: int = 256, ttl: float = 300.0,
+                 store: Optional[SQLitePageStore] = None, generation_check_interval: float = 1.0):
+        """
+        Args:
+            variant: Called with the page key; returns what else the page output depends on
+            max_entries: Size of the in-process LRU
+            ttl: Seconds a rendered page stays valid
+            store: Optional shared store used behind the in-process LRU
+            generation_check_interval: How often to check the shared store for invalidations
+        """
+        self.variant = variant
+        self.ttl = ttl
+        self.store = store
+        self.generation_check_interval = generation_check_interval
+        self.local = LRUCache(max_entries=max_entries, ttl=ttl)
+        self._generation = store.generation() if store else 0
+        self._next_generation_check = 0.0
+
+    @classmethod
+    def from_config(cls, app, variant: Callable[[str], tuple]) -> 'PageCache':
+        """Build a PageCache from PAGE_CACHE_* settings and register it on the app"""
+        db_path = app.config.get('PAGE_CACHE_DB')
+        cache = cls(variant,
+                    max_entries=app.config.get('PAGE_CACHE_MAX_ENTRIES', 256),
+                    ttl=app.config.get('PAGE_CACHE_TTL', 300),
+                    store=SQLitePageStore(db_path) if db_path else None)
+        app.extensions['page_cache'] = cache
+        return cache
+
+    def _current_generation(self) -> int:
+        """Generation of the shared store, so invalidations reach every worker"""
+        if self.store is not None and time.monotonic() >= self._next_generation_check:
+            self._next_generation_check = time.monotonic() + self.generation_check_interval
+            generation = self.store.generation()
+            if generation != self._generation:
+                self.local.clear()
+                self._generation = generation
+        return self._generation
+
+    def make_key(self, page_key: str) -> str:
+        parts = (self._current_generation(), request.url, page_key) + tuple(self.variant(page_key))
+        return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedPage]:
+        page = self.local.get(key)
+        if page is None and self.store is not None:
+            page = self.store.get(key)
+            if page is not None:
+                self.local.set(key, page)
+        return page
+
+    def set(self, key: str, page: CachedPage) -> None:
+        self.local.set(key, page)
+        if self.store is not None:
+            self.store.set(key, page, self.ttl)
+
+    def clear(self) -> None:
+        """Invalidate every cached page (in this process and in the shared store)"""
+        self.local.clear()
+        if self.store is not None:
+            self._generation = self.store.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = self.local.get_stats()
+        stats['generation'] = self._generation
+        return stats
+
+    def _bypass(self) -> bool:
+        return (current_app.debug
+                or not current_app.config.get('PAGE_CACHE_ENABLED', True)
+                or request.method != 'GET'
+                or 'debug' in request.args)
+
+    def cached(self, page_key: str):
+        """Decorator caching the rendered output of a view"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self._bypass():
+                    return view(*args, **kwargs)
+
+                key = self.make_key(page_key)
+                page = self.get(key)
+                if page is None:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.direct_passthrough:
+                        return response
+                    if response.is_streamed:
+                        return self._store_streamed(key, response)
+                    body = response.get_data()
+                    page = CachedPage(body, hashlib.sha256(body).hexdigest()[:32], response.mimetype)
+                    self.set(key, page)
+                return self._respond(page)
+            return wrapper
+        return decorator
+
+    def _store_streamed(self, key: str, response: Response) -> Response:
+        """
+        Pass a streamed page through to the client and cache it once the last
+        chunk is sent; this first response has no ETag (headers leave first)
+        """
+        source, chunks = response.response, response.iter_encoded()
+
+        def tee():
+            body = []
+            try:
+                for chunk in chunks:
+                    body.append(chunk)
+                    yield chunk
+            finally:
+                if hasattr(source, 'close'):
+                    source.close()
+            # Only reached when the client received the whole page
+            data = b''.join(body)
+            self.set(key, CachedPage(data, hashlib.sha256(data).hexdigest()[:32], response.mimetype))
+
+        response.response = tee()
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    @staticmethod
+    def _respond(page: CachedPage) -> Response:
+        response = Response(page.body, mimetype=page.mimetype)
+        response.set_etag(page.etag)
+        # Revalidated on every use; the locale negotiator adds Vary (and `private` with a cookie write)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
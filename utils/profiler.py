@@ -0,0 +1,263 @@
+# ============================================
+# File: utils/profiler.py
+# ============================================
+
+import hmac
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import Response, abort, g, request
+
+
+COLLAPSED_CONTENT_TYPE = 'text/plain; charset=utf-8'
+
+
+# ============================================
+# FRAME LABELS
+# ============================================
+
+class FrameLabels:
+    """
+    Short, flamegraph-safe labels for code objects ("func (utils/seo.py:42)")
+    Paths are shown relative to the app or to site-packages; labels are
+    cached per code object.
+    """
+
+    def __init__(self, root_path: Optional[str] = None):
+        self.root_path = os.path.abspath(root_path) + os.sep if root_path else None
+        self._labels: Dict[object, str] = {}
+
+    def _short_path(self, filename: str) -> str:
+        if self.root_path and filename.startswith(self.root_path):
+            return filename[len(self.root_path):]
+        marker = f"site-packages{os.sep}"
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+        return os.path.basename(filename)
+
+    def for_code(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, 'co_qualname', code.co_name)
+            label = f"{name} ({self._short_path(code.co_filename)}:{code.co_firstlineno})"
+            # ';' separates frames in the collapsed format
+            label = label.replace(';', ',')
+            self._labels[code] = label
+        return label
+
+    @staticmethod
+    def for_builtin(func) -> str:
+        name = getattr(func, '__qualname__', None) or getattr(func, '__name__', repr(func))
+        return f"{name} (builtin)".replace(';', ',')
+
+
+def collapsed(stacks: Dict[str, int]) -> str:
+    """Stacks in the collapsed format read by flamegraph.pl, speedscope and inferno"""
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()) if count > 0)
+
+
+# ============================================
+# SAMPLING (whole worker)
+# ============================================
+
+class StackSampler:
+    """
+    Statistical profiler for every thread of the current process
+
+    Runs in the calling thread, which wakes up every `interval` seconds and
+    records the stack of each other thread (sys._current_frames()). Nothing
+    is hooked into the interpreter, so it costs nothing when not running
+    and little while it does.
+    """
+
+    def __init__(self, labels: FrameLabels):
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, seconds: float, interval: float = 0.005) -> Optional[Dict[str, int]]:
+        """
+        Sample all other threads for `seconds`
+        Returns samples per collapsed stack (root first), or None if a session is already running
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            own = threading.get_ident()
+            stacks: Dict[str, int] = {}
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    stack = self._stack(frame, names.get(ident, f'thread-{ident}'))
+                    stacks[stack] = stacks.get(stack, 0) + 1
+                time.sleep(interval)
+            return stacks
+        finally:
+            self._lock.release()
+
+    def _stack(self, frame, thread_name: str) -> str:
+        frames = []
+        while frame is not None:
+            frames.append(self.labels.for_code(frame.f_code))
+            frame = frame.f_back
+        frames.append(thread_name.replace(';', ','))
+        return ';'.join(reversed(frames))
+
+
+# ============================================
+# TRACING (single request)
+# ============================================
+
+class RequestTracer:
+    """
+    Exact self time per stack for one request, in microseconds
+
+    Uses sys.setprofile() on the request's thread only, from start() until
+    stop(); other requests are not slowed down. Stacks start at the first
+    call made after start().
+    """
+
+    def __init__(self, labels: FrameLabels):
+        self.labels = labels
+        # (stack path, start ns, time spent in children ns)
+        self._stack = []
+        self.totals: Dict[str, int] = {}
+
+    def start(self) -> None:
+        sys.setprofile(self._event)
+
+    def stop(self) -> Dict[str, int]:
+        sys.setprofile(None)
+        return {stack: ns // 1000 for stack, ns in self.totals.items()}
+
+    def _event(self, frame, event, arg) -> None:
+        now = time.perf_counter_ns()
+        if event == 'call' or event == 'c_call':
+            label = self.labels.for_code(frame.f_code) if event == 'call' else self.labels.for_builtin(arg)
+            path = f"{self._stack[-1][0]};{label}" if self._stack else label
+            self._stack.append([path, now, 0])
+        elif self._stack:
+            path, started, children = self._stack.pop()
+            elapsed = now - started
+            self.totals[path] = self.totals.get(path, 0) + elapsed - children
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+
+# ============================================
+# FLASK INTEGRATION
+# ============================================
+
+class Profiler:
+    """
+    Admin-only profiling of a running worker
+
+    - sample_response(): sample every thread of this worker for N seconds
+      (served by /admin/profile)
+    - a request sent with the PROFILER_HEADER header is traced and answered
+      with its collapsed stacks instead of its body (add ?debug to a page
+      URL to bypass the page cache)
+
+    Both require PROFILER_TOKEN (compared in constant time, sent as the
+    PROFILER_HEADER value or in X-Profile-Token); without it profiling is
+    disabled and no request hook is installed.
+    """
+
+    def __init__(self, app=None):
+        self.token: Optional[str] = None
+        self.header = 'X-Profile'
+        self.max_seconds = 60.0
+        self.interval = 0.005
+        self.labels = FrameLabels()
+        self.sampler = StackSampler(self.labels)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> 'Profiler':
+        app.config.setdefault('PROFILER_TOKEN', None)
+        app.config.setdefault('PROFILER_HEADER', 'X-Profile')
+        app.config.setdefault('PROFILER_MAX_SECONDS', 60)
+        app.config.setdefault('PROFILER_INTERVAL', 0.005)
+        self.token = app.config['PROFILER_TOKEN']
+        self.header = app.config['PROFILER_HEADER']
+        self.max_seconds = float(app.config['PROFILER_MAX_SECONDS'])
+        self.interval = float(app.config['PROFILER_INTERVAL'])
+        self.labels = FrameLabels(app.root_path)
+        self.sampler = StackSampler(self.labels)
+        if self.token:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+            app.teardown_request(self._teardown_request)
+        app.extensions['profiler'] = self
+        return self
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token)
+
+    def authorized(self) -> bool:
+        """Whether the current request carries the profiler token"""
+        if not self.token:
+            return False
+        sent = request.headers.get('X-Profile-Token') or request.headers.get(self.header) or ''
+        return hmac.compare_digest(sent.encode('utf-8'), self.token.encode('utf-8'))
+
+    def sample_response(self, seconds: float, interval: Optional[float] = None) -> Response:
+        """Sample this worker for `seconds` (capped at PROFILER_MAX_SECONDS) and return collapsed stacks"""
+        if not self.authorized():
+            abort(404)
+        seconds = min(max(seconds, 0.1), self.max_seconds)
+        interval = max(interval or self.interval, 0.001)
+        stacks = self.sampler.sample(seconds, interval)
+        if stacks is None:
+            return Response('A profiling session is already running on this worker\n',
+                            status=409, content_type=COLLAPSED_CONTENT_TYPE)
+        return Response(collapsed(stacks), content_type=COLLAPSED_CONTENT_TYPE,
+                        headers={'Cache-Control': 'no-store',
+                                 'X-Profile-Samples': str(sum(stacks.values())),
+                                 'X-Profile-Pid': str(os.getpid())})
+
+    # ---------------------------------------------
+    # Per-request tracing
+    # ---------------------------------------------
+
+    def _before_request(self) -> None:
+        if self.header in request.headers and self.authorized():
+            g._profile_tracer = tracer = RequestTracer(self.labels)
+            tracer.start()
+
+    def _after_request(self, response: Response) -> Response:
+        tracer = g.pop('_profile_tracer', None)
+        if tracer is None:
+            return response
+        if response.direct_passthrough:
+            # A file (send_file, static files): nothing left to run, and the body can't be read here
+            if hasattr(response.response, 'close'):
+                response.response.close()
+            response.direct_passthrough = False
+        elif response.is_streamed:
+            # Render streamed templates now, so they are part of the trace
+            response.get_data()
+        stacks = tracer.stop()
+        response.set_data(collapsed(stacks))
+        response.content_type = COLLAPSED_CONTENT_TYPE
+        response.headers['Cache-Control'] = 'no-store'
+        response.headers['X-Profile-Total-Us'] = str(sum(stacks.values()))
+        # The original body (and its validators) no longer apply
+        for header in ('ETag', 'Last-Modified', 'Content-Encoding'):
+            response.headers.pop(header, None)
+        return response
+
+    def _teardown_request(self, exc) -> None:
+        tracer = g.pop('_profile_tracer', None)
+        if tracer is not None:
+            tracer.stop()
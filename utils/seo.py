@@ -3,20 +3,157 @@
 # ============================================
 
 import hashlib
+import logging
+import os
 import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import List, Dict, Optional
-from flask import request, current_app
-from flask_babel import _
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Optional, Sequence, Tuple, Mapping
+from flask import request, current_app, g, has_app_context
+from flask_babel import _, get_locale
+from babel import support
+
+from .counters import ShardedCounter, TitleRegistry
+from .logs import log_event
+
+
+logger = logging.getLogger(__name__)
+
+
+# Rotation strategies understood by the title engine
+STRATEGIES = ('random', 'consistent', 'daily', 'weekly', 'hourly')
+TIME_BASED_STRATEGIES = ('daily', 'weekly', 'hourly')
+
+# Key of the visitor hash; fixed so every worker (and restart) puts a visitor in the same bucket
+VISITOR_HASH_KEY = b'modus-vivendi-seo-buckets'
+_UINT64 = 0xFFFFFFFFFFFFFFFF
+
+
+# Set by pinned_time_bucket() to render a specific time-based title variant
+_time_bucket_override: ContextVar[Optional[int]] = ContextVar('seo_time_bucket_override', default=None)
+
+
+@contextmanager
+def pinned_time_bucket(bucket: int):
+    """
+    Force the time bucket seen by time-based strategies in the current context
+    Used by the pre-renderer to bake every title variant.
+    """
+    token = _time_bucket_override.set(bucket)
+    try:
+        yield
+    finally:
+        _time_bucket_override.reset(token)
+
+
+def get_time_bucket(strategy: str, now: Optional[datetime] = None) -> int:
+    """
+    Return the time bucket used by time-based strategies
+    (hour of day, day of year or ISO week number)
+    """
+    if strategy not in TIME_BASED_STRATEGIES:
+        return 0
+    override = _time_bucket_override.get()
+    if override is not None:
+        return override
+    now = now or datetime.now()
+    if strategy == 'hourly':
+        return now.hour
+    if strategy == 'daily':
+        return now.timetuple().tm_yday
+    return now.isocalendar()[1]
+
+
+def jump_hash(key: int, num_buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach): bucket in [0, num_buckets) for a
+    64-bit key. Going from n to n+1 buckets moves only 1/(n+1) of the keys,
+    all of them into the new bucket.
+    """
+    bucket, jump = -1, 0
+    while jump < num_buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & _UINT64
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def pick_bucket(buckets: Sequence[Optional[str]], key: int) -> str:
+    """
+    Title for a visitor key from a bucket table in which removed titles
+    left a None hole. Keys that land on a hole are re-hashed until they
+    reach a live bucket, so removing a title only moves its own visitors.
+    """
+    num_buckets = len(buckets)
+    while True:
+        title = buckets[jump_hash(key, num_buckets)]
+        if title is not None:
+            return title
+        key = (key * 6364136223846793005 + 1442695040888963407) & _UINT64
+
+
+def with_title(buckets: Tuple[Optional[str], ...], title: str) -> Tuple[Optional[str], ...]:
+    """Bucket table with a title added (into the first hole, else at the end)"""
+    if None in buckets:
+        hole = buckets.index(None)
+        return buckets[:hole] + (title,) + buckets[hole + 1:]
+    return buckets + (title,)
+
+
+def without_title(buckets: Tuple[Optional[str], ...], title: str) -> Tuple[Optional[str], ...]:
+    """Bucket table with a title's bucket turned into a hole (other buckets keep their index)"""
+    return tuple(None if t == title else t for t in buckets)
+
+
+def select_title(titles: Sequence[str], strategy: str,
+                 visitor_key: int = 0, time_bucket: int = 0,
+                 buckets: Optional[Sequence[Optional[str]]] = None) -> str:
+    """
+    Pick a title from an immutable title set.
+
+    Apart from the 'random' strategy this is a pure function of its
+    arguments, so it is safe to call from any number of threads at once.
+
+    Args:
+        titles: Frozen title set for one language
+        strategy: Rotation strategy (see STRATEGIES)
+        visitor_key: 64-bit visitor key, used by 'consistent'
+        time_bucket: Value of get_time_bucket(), used by time-based strategies
+        buckets: Bucket table of the title set (see pick_bucket), used by
+            'consistent'; defaults to the titles themselves
+    """
+    if strategy == 'random':
+        return titles[random.randrange(len(titles))]
+    if strategy == 'consistent':
+        return pick_bucket(buckets or titles, visitor_key)
+    if strategy in TIME_BASED_STRATEGIES:
+        return titles[time_bucket % len(titles)]
+    return titles[0]
 
 
 class SEOTitleManager:
     """
     Manages dynamic SEO titles with various rotation strategies
+
+    Title sets are stored as tuples and replaced wholesale (copy-on-write)
+    by add_title/remove_title, so concurrent requests never observe a
+    half-modified list and title selection needs no locking.
+
+    The 'consistent' strategy buckets visitors with jump consistent hashing
+    over a bucket table that keeps each title's index across add_title and
+    remove_title, so editing the title set only moves the visitors of the
+    added or removed title. Visitor keys are cached in a small LRU.
     """
     
+    # Whether titles are already written in the target language (otherwise they are translated)
+    LANGUAGE_SPECIFIC_TITLES = False
+
     # Default SEO title variations - can be overridden
-    DEFAULT_TITLES = [
+    DEFAULT_TITLES = (
         "Modus Vivendi Oradea - Prima echipă FTC din Oradea | Robotică de excelență",
         "Echipa FTC Modus Vivendi | 8 ani de experiență în robotică competițională",
         "Robotică FTC Oradea - Modus Vivendi | FIRST Tech Challenge România",
@@ -26,159 +163,175 @@ class SEOTitleManager:
         "Modus Vivendi - Design Award Winners | Prima echipă FTC Oradea",
         "STEM Education Oradea | Echipa FTC Modus Vivendi",
         "Robotică pentru tineri Oradea | Modus Vivendi FIRST Tech Challenge"
-    ]
+    )
     
-    def __init__(self, titles: Optional[List[str]] = None, strategy: str = 'consistent'):
+    def __init__(self, titles: Optional[List[str]] = None, strategy: str = 'consistent',
+                 stats_dir: Optional[str] = None, visitor_cache_size: int = 4096):
         """
         Initialize SEO Title Manager
         
         Args:
             titles: List of title variations (uses DEFAULT_TITLES if None)
             strategy: Rotation strategy ('random', 'consistent', 'daily', 'weekly', 'hourly')
+            stats_dir: Shared directory for aggregating usage stats across worker processes
+            visitor_cache_size: Recent visitors whose hashed key is kept
         """
-        self.titles = titles or self.DEFAULT_TITLES
+        self._titles: Tuple[str, ...] = tuple(titles or self.DEFAULT_TITLES)
+        self._buckets: Tuple[Optional[str], ...] = self._titles
         self.strategy = strategy
-        self.performance_stats = {}
+        self._visitor_keys = lru_cache(maxsize=visitor_cache_size)(self._hash_visitor)
+        # Usage counters are indexed by integer title ID, one shard per thread
+        self._title_ids = TitleRegistry(self._all_titles())
+        self._usage = ShardedCounter(shared_dir=stats_dir,
+                                     labels=lambda: self._title_ids.titles)
+
+    def _all_titles(self) -> List[str]:
+        """Every title that can be served, used to pre-assign title IDs"""
+        return list(self._titles)
+
+    @property
+    def titles(self) -> Tuple[str, ...]:
+        """The current (immutable) title set"""
+        return self._titles
+
+    def titles_for(self, language: Optional[str] = None) -> Tuple[str, ...]:
+        """
+        Get the title set used for a language.
+        The base manager has a single title set and ignores the language.
+        """
+        return self._titles
+
+    def buckets_for(self, language: Optional[str] = None) -> Tuple[Optional[str], ...]:
+        """Bucket table of a language's title set (titles by bucket index, None for removed ones)"""
+        return self._buckets
         
-    def get_title(self) -> str:
+    def get_title(self, language: Optional[str] = None) -> str:
         """Get a title based on the configured strategy"""
-        strategy_methods = {
-            'random': self._get_random_title,
-            'consistent': self._get_consistent_title,
-            'daily': lambda: self._get_time_based_title('daily'),
-            'weekly': lambda: self._get_time_based_title('weekly'),
-            'hourly': lambda: self._get_time_based_title('hourly')
-        }
-        
-        method = strategy_methods.get(self.strategy, lambda: self.titles[0])
-        title = method()
+        # Read shared state once so the whole selection sees one snapshot
+        titles = self.titles_for(language)
+        strategy = self.strategy
+        title = self._select_title(titles, strategy, self.buckets_for(language))
         
         # Track usage
         self._track_usage(title)
+        log_event(logger, logging.DEBUG, 'seo.title_selected',
+                  strategy=strategy, language=language, title=title)
         return title
-        
-    def _get_random_title(self) -> str:
-        """Random title selection"""
-        return random.choice(self.titles)
-        
-    def _get_consistent_title(self) -> str:
-        """
-        Consistent title per visitor (based on IP + User Agent)
-        Same visitor always gets the same title
-        """
-        try:
-            # Create a unique identifier for the visitor
-            visitor_identifier = self._get_visitor_identifier()
-            
-            # Convert to index
-            title_index = int(visitor_identifier[:8], 16) % len(self.titles)
-            return self.titles[title_index]
-            
-        except Exception as e:
-            if current_app:
-                current_app.logger.warning(f"Error in consistent title generation: {e}")
-            return self.titles[0]  # Fallback
-            
-    def _get_time_based_title(self, period: str) -> str:
-        """Time-based title rotation"""
-        now = datetime.now()
-        
-        time_units = {
-            'hourly': now.hour,
-            'daily': now.timetuple().tm_yday,  # Day of year
-            'weekly': now.isocalendar()[1]     # Week number
-        }
-        
-        time_unit = time_units.get(period, 0)
-        title_index = time_unit % len(self.titles)
-        return self.titles[title_index]
+
+    def _select_title(self, titles: Sequence[str], strategy: str,
+                      buckets: Optional[Sequence[Optional[str]]] = None) -> str:
+        """Resolve the request-dependent inputs and delegate to select_title()"""
+        visitor_key = 0
+        if strategy == 'consistent':
+            try:
+                visitor_key = self._get_visitor_key()
+            except Exception as e:
+                if current_app:
+                    current_app.logger.warning(f"Error in consistent title generation: {e}")
+                return titles[0]  # Fallback
+        return select_title(titles, strategy,
+                            visitor_key=visitor_key,
+                            time_bucket=get_time_bucket(strategy),
+                            buckets=buckets)
+
+    @staticmethod
+    def _hash_visitor(ip_address: str, user_agent: str) -> int:
+        """64-bit keyed hash of a visitor (BLAKE2b, the fastest keyed hash in the stdlib)"""
+        data = f"{ip_address}\0{user_agent}".encode('utf-8', 'surrogatepass')
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8, key=VISITOR_HASH_KEY).digest(), 'little')
         
     def _get_visitor_identifier(self) -> str:
         """
         Create a unique identifier for the visitor
         """
-        # Combine IP address and User Agent for uniqueness
-        ip_address = request.remote_addr or 'unknown'
-        user_agent = request.headers.get('User-Agent', 'unknown')
-        
-        # Create hash
-        visitor_string = f"{ip_address}:{user_agent}"
-        return hashlib.md5(visitor_string.encode()).hexdigest()
+        return f"{self._get_visitor_key():016x}"
+
+    def _get_visitor_key(self) -> int:
+        """
+        Integer visitor key used by the 'consistent' strategy
+        (IP address + User-Agent, hashed once per visitor while it stays in the LRU)
+        """
+        # One proxy lookup instead of two (request.remote_addr / .headers read the same environ)
+        environ = request.environ
+        return self._visitor_keys(environ.get('REMOTE_ADDR') or 'unknown',
+                                  environ.get('HTTP_USER_AGENT', 'unknown'))
+
+    def get_visitor_cache_stats(self) -> Dict[str, int]:
+        info = self._visitor_keys.cache_info()
+        return {'entries': info.currsize, 'hits': info.hits, 'misses': info.misses}
         
     def _track_usage(self, title: str) -> None:
         """
         Track how often each title is used
         """
-        self.performance_stats[title] = self.performance_stats.get(title, 0) + 1
+        self._usage.increment(self._title_ids.id_for(title))
         
     def get_performance_stats(self) -> Dict[str, int]:
         """
         Get usage statistics for all titles
+        (site-wide when a shared stats directory is configured)
         """
-        return self.performance_stats.copy()
+        return self._usage.site_wide()
         
     def get_total_requests(self) -> int:
         """
         Get total number of title requests served
         """
-        return sum(self.performance_stats.values())
+        return sum(self.get_performance_stats().values())
         
     def reset_stats(self) -> None:
         """
         Reset performance statistics
         """
-        self.performance_stats.clear()
+        self._usage.reset()
         
     def add_title(self, title: str) -> None:
         """
         Add a new title variation
         """
-        if title not in self.titles:
-            self.titles.append(title)
+        if title not in self._titles:
+            self._replace_buckets(with_title(self._buckets, title))
             
     def remove_title(self, title: str) -> bool:
         """
         Remove a title variation
         Returns True if removed, False if not found
         """
-        try:
-            self.titles.remove(title)
-            return True
-        except ValueError:
+        if title not in self._titles or len(self._titles) == 1:
             return False
+        self._replace_buckets(without_title(self._buckets, title))
+        return True
+
+    def _replace_buckets(self, buckets: Tuple[Optional[str], ...], language: Optional[str] = None) -> None:
+        """Swap in a new bucket table (the base manager has one title set for every language)"""
+        self._buckets = buckets
+        self._titles = tuple(t for t in buckets if t is not None)
             
     def set_strategy(self, strategy: str) -> None:
         """
         Change the rotation strategy
         """
-        valid_strategies = ['random', 'consistent', 'daily', 'weekly', 'hourly']
-        if strategy not in valid_strategies:
-            raise ValueError(f"Invalid strategy. Must be one of: {valid_strategies}")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Invalid strategy. Must be one of: {list(STRATEGIES)}")
         self.strategy = strategy
         
-# Add this to your utils/seo.py
 
 class LanguageAwareSEOTitleManager(SEOTitleManager):
     """
     SEO Title Manager with language-specific title sets
+
+    Every language's title set is frozen at construction time. The language
+    is passed to get_title() per call instead of being stored on the shared
+    instance, so concurrent RO and EN requests cannot see each other's titles.
     """
-    
-    def __init__(self, strategy: str = 'consistent'):
+
+    LANGUAGE_SPECIFIC_TITLES = True
+
+    TITLES_BY_LANGUAGE = {
         # Romanian titles
-        self.titles_ro = [
-            "Modus Vivendi Oradea - Prima echipă FTC din Oradea | Robotică de excelență",
-            "Echipa FTC Modus Vivendi | 8 ani de experiență în robotică competițională",
-            "Robotică FTC Oradea - Modus Vivendi | FIRST Tech Challenge România",
-            "Modus Vivendi - Echipa de robotică din Oradea | FTC Champions",
-            "FIRST Tech Challenge Oradea | Modus Vivendi - Inovație în robotică",
-            "Robotică competițională Oradea | Modus Vivendi FTC Team",
-            "Modus Vivendi - Design Award Winners | Prima echipă FTC Oradea",
-            "STEM Education Oradea | Echipa FTC Modus Vivendi",
-            "Robotică pentru tineri Oradea | Modus Vivendi FIRST Tech Challenge"
-        ]
-        
+        'ro': SEOTitleManager.DEFAULT_TITLES,
         # English titles
-        self.titles_en = [
+        'en': (
             "Modus Vivendi Oradea - First FTC Team from Oradea | Robotics Excellence",
             "FTC Team Modus Vivendi | 8 Years of Competitive Robotics Experience",
             "FTC Robotics Oradea - Modus Vivendi | FIRST Tech Challenge Romania",
@@ -188,43 +341,103 @@ class LanguageAwareSEOTitleManager(SEOTitleManager):
             "Modus Vivendi - Design Award Winners | First FTC Team Oradea",
             "STEM Education Oradea | FTC Team Modus Vivendi",
             "Robotics for Youth Oradea | Modus Vivendi FIRST Tech Challenge"
-        ]
-        
-        # Initialize with Romanian titles (default)
-        super().__init__(titles=self.titles_ro, strategy=strategy)
-        self.current_language = 'ro'
+        ),
+    }
+    
+    def __init__(self, strategy: str = 'consistent', default_language: str = 'ro',
+                 titles_by_language: Optional[Mapping[str, Sequence[str]]] = None,
+                 stats_dir: Optional[str] = None):
+        """
+        Args:
+            strategy: Rotation strategy
+            default_language: Language used when get_title() gets no language
+            titles_by_language: Optional {language: titles} override
+            stats_dir: Shared directory for aggregating usage stats across worker processes
+        """
+        title_sets = titles_by_language or self.TITLES_BY_LANGUAGE
+        self._title_sets: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {lang: tuple(titles) for lang, titles in title_sets.items()}
+        )
+        self._bucket_sets: Mapping[str, Tuple[Optional[str], ...]] = self._title_sets
+        if default_language not in self._title_sets:
+            raise ValueError(f"No titles defined for default language '{default_language}'")
+        self.default_language = default_language
+        super().__init__(titles=list(self._title_sets[default_language]), strategy=strategy,
+                         stats_dir=stats_dir)
+
+    def _all_titles(self) -> List[str]:
+        return [title for titles in self._title_sets.values() for title in titles]
+
+    @property
+    def titles_ro(self) -> Tuple[str, ...]:
+        return self._title_sets['ro']
+
+    @property
+    def titles_en(self) -> Tuple[str, ...]:
+        return self._title_sets['en']
+
+    @property
+    def languages(self) -> Tuple[str, ...]:
+        """Languages that have a title set"""
+        return tuple(self._title_sets)
+
+    @property
+    def titles(self) -> Tuple[str, ...]:
+        """Title set of the default language"""
+        return self._title_sets[self.default_language]
+
+    @property
+    def current_language(self) -> str:
+        """Kept for backwards compatibility - the manager no longer tracks a current language"""
+        return self.default_language
+
+    def titles_for(self, language: Optional[str] = None) -> Tuple[str, ...]:
+        """Frozen title set for a language, falling back to the default language"""
+        title_sets = self._title_sets
+        return title_sets.get(language) or title_sets[self.default_language]
+
+    def buckets_for(self, language: Optional[str] = None) -> Tuple[Optional[str], ...]:
+        bucket_sets = self._bucket_sets
+        return bucket_sets.get(language) or bucket_sets[self.default_language]
         
     def set_language(self, language: str):
-        """Switch between Romanian and English title sets"""
-        if language == 'ro':
-            self.titles = self.titles_ro
-            self.current_language = 'ro'
-        elif language == 'en':
-            self.titles = self.titles_en
-            self.current_language = 'en'
-        else:
-            # Default to Romanian
-            self.titles = self.titles_ro
-        
-        self.current_language = language
-        
-    def get_title(self, language: str = None) -> str:
-        """Get title with optional language override"""
-        if language and language != self.current_language:
-            # Temporarily switch language
-            old_titles = self.titles
-            old_language = self.current_language
-            
-            self.set_language(language)
-            title = super().get_title()
-            
-            # Restore previous state
-            self.titles = old_titles
-            self.current_language = old_language
-            
-            return title
-        else:
-            return super().get_title()
+        """
+        Change the default language used when get_title() is called without one.
+        Request handlers should pass the language to get_title() instead.
+        """
+        if language in self._title_sets:
+            self.default_language = language
+
+    def add_title(self, title: str, language: Optional[str] = None) -> None:
+        """
+        Add a new title variation to a language (default language if None)
+        """
+        language = language or self.default_language
+        titles = self._title_sets.get(language, ())
+        if title not in titles:
+            self._replace_buckets(with_title(self._bucket_sets.get(language, ()), title), language)
+
+    def remove_title(self, title: str, language: Optional[str] = None) -> bool:
+        """
+        Remove a title variation from a language (default language if None)
+        Returns True if removed, False if not found
+        """
+        language = language or self.default_language
+        titles = self._title_sets.get(language, ())
+        if title not in titles or len(titles) == 1:
+            return False
+        self._replace_buckets(without_title(self._bucket_sets[language], title), language)
+        return True
+
+    def _replace_buckets(self, buckets: Tuple[Optional[str], ...], language: Optional[str] = None) -> None:
+        """Publish new frozen mappings, each in a single reference assignment"""
+        language = language or self.default_language
+        bucket_sets = dict(self._bucket_sets)
+        bucket_sets[language] = buckets
+        title_sets = dict(self._title_sets)
+        title_sets[language] = tuple(t for t in buckets if t is not None)
+        self._bucket_sets = MappingProxyType(bucket_sets)
+        self._title_sets = MappingProxyType(title_sets)
 
 # Factory function for easy instantiation
 def create_seo_manager(strategy: str = 'consistent') -> SEOTitleManager:
@@ -238,7 +451,150 @@ def create_seo_manager(strategy: str = 'consistent') -> SEOTitleManager:
 # SEO TITLE & DESCRIPTION FUNCTIONS
 # ============================================
 
-def get_seo_title(page_key='home', custom_title=None, use_seo_rotation=True, seo_manager=None):
+def N_(message: str) -> str:
+    """Mark a string for extraction (pybabel's default N_ keyword) without translating it"""
+    return message
+
+
+# Translation keys of the page-specific SEO titles and descriptions
+SEO_TITLE_MSGIDS = {
+    'home': N_('Modus Vivendi Oradea - FTC Robotics Team | Innovation in Oradea'),
+    'about': N_('About Modus Vivendi | FTC Team Oradea - 8 Years Experience'),
+    'privacy': N_('Privacy Policy | Modus Vivendi Oradea FTC Team'),
+    'contact': N_('Contact Modus Vivendi | FTC Robotics Team Oradea'),
+    'projects': N_('Our FTC Projects | Modus Vivendi Robotics Oradea'),
+    'events': N_('FTC Events & Competitions | Modus Vivendi Oradea'),
+    'team': N_('Our FTC Team Members | Modus Vivendi Oradea'),
+    'achievements': N_('FTC Awards & Achievements | Modus Vivendi Oradea'),
+}
+DEFAULT_TITLE_MSGID = N_('Modus Vivendi Oradea - FIRST Tech Challenge Team')
+
+SEO_DESCRIPTION_MSGIDS = {
+    'home': N_('seo_description_home'),
+    'about': N_('seo_description_about'),
+    'privacy': N_('seo_description_privacy'),
+    'contact': N_('seo_description_contact'),
+    'team': N_('seo_description_team'),
+    'projects': N_('seo_description_projects'),
+    'achievements': N_('seo_description_achievements'),
+}
+DEFAULT_DESCRIPTION_MSGID = N_('seo_description_default')
+
+
+class SEOLookupTable:
+    """
+    Translated SEO titles and descriptions compiled from the .mo catalogs
+
+    Built once at startup into {locale: {page_key: (title, description)}},
+    so a render does one dict lookup instead of a gettext call per key.
+    The table is rebuilt when a catalog's mtime changes (e.g. after
+    `python manage_translations.py compile`); readers never need a lock
+    because a rebuild replaces the whole table in one assignment.
+    """
+
+    def __init__(self, translation_dir: str = 'translations', locales: Sequence[str] = ('ro', 'en'),
+                 extra_msgids: Sequence[str] = (), check_interval: float = 2.0,
+                 domain: str = 'messages'):
+        """
+        Args:
+            translation_dir: Directory holding <locale>/LC_MESSAGES/<domain>.mo
+            locales: Locales to compile tables for
+            extra_msgids: Other messages to pre-translate (e.g. rotation titles)
+            check_interval: Minimum seconds between two catalog mtime checks
+            domain: Gettext domain of the catalogs
+        """
+        self.translation_dir = translation_dir
+        self.locales = tuple(locales)
+        self.extra_msgids = tuple(extra_msgids)
+        self.check_interval = check_interval
+        self.domain = domain
+        self._pages: Dict[str, Mapping[str, Tuple[str, str]]] = {}
+        self._messages: Dict[str, Mapping[str, str]] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._next_check = 0.0
+        self.build()
+
+    def init_app(self, app) -> 'SEOLookupTable':
+        """Register the table on a Flask app so get_seo_title/get_seo_description use it"""
+        app.extensions['seo_lookup_table'] = self
+        return self
+
+    def _catalog_path(self, locale: str) -> str:
+        return os.path.join(self.translation_dir, locale, 'LC_MESSAGES', f"{self.domain}.mo")
+
+    def _catalog_mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        for locale in self.locales:
+            try:
+                mtimes[locale] = os.stat(self._catalog_path(locale)).st_mtime
+            except OSError:
+                mtimes[locale] = 0.0
+        return mtimes
+
+    def build(self) -> None:
+        """Compile the tables for every locale from the catalogs on disk"""
+        mtimes = self._catalog_mtimes()
+        msgids = set(SEO_TITLE_MSGIDS.values()) | set(SEO_DESCRIPTION_MSGIDS.values())
+        msgids |= {DEFAULT_TITLE_MSGID, DEFAULT_DESCRIPTION_MSGID}
+        msgids |= set(self.extra_msgids)
+
+        pages, messages = {}, {}
+        for locale in self.locales:
+            translations = support.Translations.load(self.translation_dir, [locale], self.domain)
+            translated = {msgid: translations.gettext(msgid) for msgid in msgids}
+            default = (translated[DEFAULT_TITLE_MSGID], translated[DEFAULT_DESCRIPTION_MSGID])
+            page_table = {'': default}
+            for page_key in set(SEO_TITLE_MSGIDS) | set(SEO_DESCRIPTION_MSGIDS):
+                title_msgid = SEO_TITLE_MSGIDS.get(page_key, DEFAULT_TITLE_MSGID)
+                description_msgid = SEO_DESCRIPTION_MSGIDS.get(page_key, DEFAULT_DESCRIPTION_MSGID)
+                page_table[page_key] = (translated[title_msgid], translated[description_msgid])
+            pages[locale] = MappingProxyType(page_table)
+            messages[locale] = MappingProxyType(translated)
+
+        self._pages, self._messages, self._mtimes = pages, messages, mtimes
+
+    def refresh_if_changed(self) -> bool:
+        """
+        Rebuild the tables if a catalog changed on disk (checked at most every check_interval)
+        Returns True if the tables were rebuilt
+        """
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+        if self._catalog_mtimes() == self._mtimes:
+            return False
+        self.build()
+        return True
+
+    def lookup(self, locale: str, page_key: str) -> Tuple[str, str]:
+        """(title, description) of a page, falling back to the default entry"""
+        page_table = self._pages.get(locale)
+        if page_table is None:
+            raise KeyError(locale)
+        return page_table.get(page_key) or page_table['']
+
+    def translate(self, locale: str, msgid: str) -> str:
+        """Pre-translated message, or a live gettext lookup for unknown msgids"""
+        messages = self._messages.get(locale)
+        if messages is not None and msgid in messages:
+            return messages[msgid]
+        return _(msgid)
+
+
+def _current_seo_table() -> Optional[SEOLookupTable]:
+    """The SEOLookupTable registered on the current app, if any"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('seo_lookup_table')
+
+
+def _current_language(language: Optional[str]) -> str:
+    return language or str(get_locale())
+
+
+def get_seo_title(page_key='home', custom_title=None, use_seo_rotation=True, seo_manager=None,
+                  language=None):
     """
     Generate SEO-optimized translated titles
     Args:
@@ -246,48 +602,106 @@ def get_seo_title(page_key='home', custom_title=None, use_seo_rotation=True, seo
         custom_title: Optional custom title override
         use_seo_rotation: Whether to use your SEO rotation system
         seo_manager: Instance of SEOTitleManager (optional)
+        language: Language of the title set to rotate through (optional)
     """
     if custom_title:
         return f"{_(custom_title)} - Modus Vivendi Oradea"
+
+    table = _current_seo_table()
     
     # Use your sophisticated SEO rotation for home page
     if page_key == 'home' and use_seo_rotation and seo_manager:
         # Get the SEO-optimized title using your rotation strategy
-        base_title = seo_manager.get_title()
+        base_title = seo_manager.get_title(language)
+        if seo_manager.LANGUAGE_SPECIFIC_TITLES:
+            # Title sets are already written in the requested language
+            return base_title
         # Translate the title - this will be handled by your translation keys
+        if table is not None:
+            return table.translate(_current_language(language), base_title)
         return _(base_title)
-    
-    # Define page-specific SEO titles with translation keys for other pages
-    seo_titles = {
-        'home': _('Modus Vivendi Oradea - FTC Robotics Team | Innovation in Oradea'),
-        'about': _('About Modus Vivendi | FTC Team Oradea - 8 Years Experience'),
-        'privacy': _('Privacy Policy | Modus Vivendi Oradea FTC Team'),
-        'contact': _('Contact Modus Vivendi | FTC Robotics Team Oradea'),
-        'projects': _('Our FTC Projects | Modus Vivendi Robotics Oradea'),
-        'events': _('FTC Events & Competitions | Modus Vivendi Oradea'),
-        'team': _('Our FTC Team Members | Modus Vivendi Oradea'),
-        'achievements': _('FTC Awards & Achievements | Modus Vivendi Oradea'),
-    }
-    
-    return seo_titles.get(page_key, _('Modus Vivendi Oradea - FIRST Tech Challenge Team'))
 
+    # Page-specific SEO titles for other pages
+    if table is not None:
+        try:
+            return table.lookup(_current_language(language), page_key)[0]
+        except KeyError:
+            pass
+    return _(SEO_TITLE_MSGIDS.get(page_key, DEFAULT_TITLE_MSGID))
 
-def get_seo_description(page_key='home', custom_description=None):
+
+def get_seo_description(page_key='home', custom_description=None, language=None):
     """Generate SEO-optimized translated meta descriptions"""
     if custom_description:
         return _(custom_description)
-    
-    seo_descriptions = {
-        'home': _('seo_description_home'),
-        'about': _('seo_description_about'), 
-        'privacy': _('seo_description_privacy'),
-        'contact': _('seo_description_contact'),
-        'team': _('seo_description_team'),
-        'projects': _('seo_description_projects'),
-        'achievements': _('seo_description_achievements'),
-    }
-    
-    return seo_descriptions.get(page_key, _('seo_description_default'))
+
+    table = _current_seo_table()
+    if table is not None:
+        try:
+            return table.lookup(_current_language(language), page_key)[1]
+        except KeyError:
+            pass
+    return _(SEO_DESCRIPTION_MSGIDS.get(page_key, DEFAULT_DESCRIPTION_MSGID))
+
+
+class SEOContext:
+    """
+    Request-scoped SEO resolver
+
+    Titles and descriptions are resolved once per request and reused for
+    every tag that needs them (<title>, Open Graph, Twitter, JSON-LD), so a
+    page always shows one consistent title and each view is counted once
+    in the usage stats.
+    """
+
+    def __init__(self, seo_manager: Optional[SEOTitleManager] = None, language: Optional[str] = None):
+        self.seo_manager = seo_manager
+        self.language = language
+        self._titles: Dict[tuple, str] = {}
+        self._descriptions: Dict[tuple, str] = {}
+
+    def title(self, page_key='home', custom_title=None, use_seo_rotation=True) -> str:
+        """Memoized get_seo_title() for this request"""
+        key = (page_key, custom_title, use_seo_rotation)
+        title = self._titles.get(key)
+        if title is None:
+            try:
+                title = get_seo_title(page_key, custom_title, use_seo_rotation,
+                                      self.seo_manager, self.language)
+            except Exception as e:
+                current_app.logger.warning(f"Error resolving SEO title for '{page_key}': {e}")
+                # Fallback to basic translation
+                title = _('Modus Vivendi Oradea - FTC Robotics Team')
+            self._titles[key] = title
+        return title
+
+    def description(self, page_key='home', custom_description=None) -> str:
+        """Memoized get_seo_description() for this request"""
+        key = (page_key, custom_description)
+        description = self._descriptions.get(key)
+        if description is None:
+            try:
+                description = get_seo_description(page_key, custom_description, self.language)
+            except Exception as e:
+                current_app.logger.warning(f"Error resolving SEO description for '{page_key}': {e}")
+                description = _('seo_description_default')
+            self._descriptions[key] = description
+        return description
+
+
+def get_seo_context(seo_manager: Optional[SEOTitleManager] = None,
+                    language: Optional[str] = None) -> SEOContext:
+    """
+    Get the SEOContext of the current request, creating it on first use
+    Outside of an application context a fresh, unshared context is returned.
+    """
+    if not has_app_context():
+        return SEOContext(seo_manager, language)
+    context = g.get('_seo_context')
+    if context is None or context.language != language or context.seo_manager is not seo_manager:
+        context = SEOContext(seo_manager, language)
+        g._seo_context = context
+    return context
 
 
 # ============================================
@@ -0,0 +1,99 @@
+# ============================================
+# File: utils/static_files.py
+# ============================================
+
+import mimetypes
+import os
+from typing import Dict, Optional
+from urllib.parse import quote
+
+from flask import abort, current_app, send_from_directory
+from werkzeug.security import safe_join
+
+
+# Cache-Control by path prefix under the static folder (longest prefix wins)
+DEFAULT_CACHE_CONTROL = {
+    '': 'public, max-age=3600',
+    'images/': 'public, max-age=604800',
+    'webfonts/': 'public, max-age=2592000',
+    'pdfs/': 'public, max-age=86400, stale-while-revalidate=604800',
+}
+
+
+class StaticFiles:
+    """
+    Static file serving with per-prefix Cache-Control
+
+    Files are sent with strong ETags, Last-Modified and byte-range support,
+    so If-None-Match / If-Modified-Since get a 304 and partial downloads
+    resume with a 206. The body is handed to the server's wsgi.file_wrapper,
+    which gunicorn turns into a zero-copy sendfile().
+
+    With STATIC_ACCEL_REDIRECT set (e.g. '/_static/') the worker only answers
+    with an X-Accel-Redirect header and nginx transfers the file itself:
+
+        location /_static/ {
+            internal;
+            alias /srv/site/static/;
+        }
+    """
+
+    def __init__(self, app=None):
+        self.cache_control: Dict[str, str] = {}
+        self.static_folder = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> 'StaticFiles':
+        app.config.setdefault('STATIC_CACHE_CONTROL', DEFAULT_CACHE_CONTROL)
+        app.config.setdefault('STATIC_ACCEL_REDIRECT', None)
+        self.static_folder = app.static_folder
+        # Longest prefix first
+        self.cache_control = dict(sorted(app.config['STATIC_CACHE_CONTROL'].items(),
+                                         key=lambda item: len(item[0]), reverse=True))
+        app.view_functions['static'] = self.serve
+        app.extensions['static_files'] = self
+        return self
+
+    def cache_control_for(self, filename: str) -> Optional[str]:
+        if current_app.debug:
+            return 'no-cache'
+        for prefix, value in self.cache_control.items():
+            if filename.startswith(prefix):
+                return value
+        return None
+
+    def serve(self, filename: str):
+        """Static view"""
+        return self.send(filename)
+
+    def send(self, filename: str, mimetype: Optional[str] = None,
+             content_encoding: Optional[str] = None, cache_control: Optional[str] = None):
+        """
+        Send a file from the static folder
+
+        Args:
+            filename: Path relative to the static folder
+            mimetype: Defaults to the type guessed from the filename
+            content_encoding: Set when sending a pre-compressed variant
+            cache_control: Overrides the per-prefix Cache-Control
+        """
+        mimetype = mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        accel_prefix = current_app.config['STATIC_ACCEL_REDIRECT']
+        if accel_prefix:
+            path = safe_join(self.static_folder, filename)
+            if path is None or not os.path.isfile(path):
+                abort(404)
+            response = current_app.response_class(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{quote(filename)}"
+        else:
+            response = send_from_directory(self.static_folder, filename, mimetype=mimetype,
+                                           conditional=True, etag=True, max_age=None)
+
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+        cache_control = cache_control or self.cache_control_for(filename)
+        if cache_control:
+            response.headers['Cache-Control'] = cache_control
+            response.headers.pop('Expires', None)
+        return response
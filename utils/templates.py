@@ -0,0 +1,184 @@
+# ============================================
+# File: utils/templates.py
+# ============================================
+
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import Response, current_app, render_template, stream_template
+from jinja2 import BaseLoader, FileSystemBytecodeCache, TemplateError, TemplateNotFound
+
+from .logs import log_event
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+# Plain `{% include 'name.html' %}` - no context modifiers, `ignore missing` or whitespace control
+_INCLUDE_RE = re.compile(r"{%\s*include\s+(['\"])([^'\"]+)\1\s*%}")
+# Tags whose meaning changes when the template's source is pasted into another one
+_SCOPED_TAGS_RE = re.compile(r"{%-?\s*(extends|block|set|macro|import|from|include\s+\S+\s+with)\b")
+
+
+class FlattenedLoader(BaseLoader):
+    """
+    Loads the templates written by flatten_templates(), where static includes
+    are already inlined, and falls back to the regular loader for the rest.
+    A flattened template is only used while none of its sources changed
+    since the flattening, so an edited include is never served stale.
+    """
+
+    def __init__(self, directory: str, fallback: BaseLoader):
+        self.directory = directory
+        self.fallback = fallback
+        self.templates: Dict[str, dict] = {}
+        try:
+            with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as f:
+                self.templates = json.load(f).get('templates', {})
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _fresh(sources: Dict[str, float]) -> bool:
+        try:
+            return all(os.path.getmtime(path) == mtime for path, mtime in sources.items())
+        except OSError:
+            return False
+
+    def get_source(self, environment, template: str):
+        entry = self.templates.get(template)
+        if entry is None or not self._fresh(entry['sources']):
+            if entry is not None:
+                log_event(logger, logging.WARNING, 'templates.flattened_stale', template=template)
+            return self.fallback.get_source(environment, template)
+        path = os.path.join(self.directory, entry['file'])
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        sources = entry['sources']
+        return source, path, lambda: self._fresh(sources)
+
+    def list_templates(self) -> List[str]:
+        return self.fallback.list_templates()
+
+
+def configure_templates(app) -> None:
+    """
+    Shared on-disk bytecode cache (TEMPLATE_BYTECODE_DIR) and, when
+    `python build_templates.py flatten` has run, the flattened templates
+    (TEMPLATE_FLATTEN_DIR)
+    """
+    bytecode_dir = app.config.setdefault('TEMPLATE_BYTECODE_DIR',
+                                         os.path.join(app.root_path, 'cache', 'jinja'))
+    flatten_dir = app.config.setdefault('TEMPLATE_FLATTEN_DIR',
+                                        os.path.join(app.root_path, 'cache', 'templates'))
+    os.makedirs(bytecode_dir, exist_ok=True)
+    # Compiled templates are keyed by name + source checksum, so workers and deploys can share them
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(bytecode_dir)
+    if os.path.exists(os.path.join(flatten_dir, MANIFEST_NAME)):
+        app.jinja_env.loader = FlattenedLoader(flatten_dir, app.jinja_env.loader)
+
+
+def render_page(template_name: str, **context):
+    """
+    render_template(), or with STREAM_TEMPLATES a response streamed while the
+    template renders, in chunks of about STREAM_CHUNK_SIZE characters; the
+    chunk ending with </head> (critical CSS, preloads) is sent right away
+    """
+    config = current_app.config
+    if not config.get('STREAM_TEMPLATES'):
+        return render_template(template_name, **context)
+    pieces = stream_template(template_name, **context)
+    return Response(_chunked(pieces, config.get('STREAM_CHUNK_SIZE', 8192)), mimetype='text/html')
+
+
+def _chunked(pieces: Iterable[str], size: int) -> Iterator[str]:
+    """Join the many small pieces Jinja's generate() yields into fewer, larger chunks"""
+    buffer, buffered = [], 0
+    try:
+        for piece in pieces:
+            buffer.append(piece)
+            buffered += len(piece)
+            if buffered >= size or '</head>' in piece:
+                yield ''.join(buffer)
+                buffer, buffered = [], 0
+        if buffer:
+            yield ''.join(buffer)
+    finally:
+        # Ends the render (and pops its request context) when the client goes away early
+        if hasattr(pieces, 'close'):
+            try:
+                pieces.close()
+            except (LookupError, ValueError, AssertionError):
+                # Closed from another context than the one that iterated (a server closing
+                # the body elsewhere, the garbage collector): the template generator is
+                # already closed, only popping the streamed request context fails
+                pass
+
+
+def warm_templates(app) -> Tuple[List[str], Dict[str, str]]:
+    """Compile every template so its bytecode is on disk; returns (compiled, {name: error})"""
+    env = app.jinja_env
+    compiled, errors = [], {}
+    for name in env.list_templates(extensions=['html']):
+        try:
+            env.get_template(name)
+            compiled.append(name)
+        except TemplateError as e:
+            errors[name] = str(e)
+    return compiled, errors
+
+
+def _inline_includes(env, loader: BaseLoader, name: str, stack: Tuple[str, ...],
+                     sources: Dict[str, float]) -> str:
+    source, path, _ = loader.get_source(env, name)
+    sources[path] = os.path.getmtime(path)
+
+    def replace(match):
+        target = match.group(2)
+        if target in stack:
+            return match.group(0)
+        try:
+            included, _, _ = loader.get_source(env, target)
+        except TemplateNotFound:
+            return match.group(0)
+        if _SCOPED_TAGS_RE.search(included):
+            return match.group(0)
+        inlined = _inline_includes(env, loader, target, stack + (target,), sources)
+        # Jinja drops a single trailing newline when it loads a template
+        return inlined[:-1] if inlined.endswith('\n') else inlined
+
+    return _INCLUDE_RE.sub(replace, source)
+
+
+def flatten_templates(app, directory: Optional[str] = None) -> Dict[str, int]:
+    """
+    Write a copy of every template with its static includes inlined
+    Returns {template: number of source files merged into it}.
+    """
+    directory = directory or app.config['TEMPLATE_FLATTEN_DIR']
+    os.makedirs(directory, exist_ok=True)
+    env = app.jinja_env
+    loader = env.loader.fallback if isinstance(env.loader, FlattenedLoader) else env.loader
+    manifest, merged = {}, {}
+    for name in env.list_templates(extensions=['html']):
+        sources: Dict[str, float] = {}
+        try:
+            flattened = _inline_includes(env, loader, name, (name,), sources)
+        except (TemplateError, OSError):
+            continue
+        if len(sources) == 1:
+            continue
+        target = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(flattened)
+        manifest[name] = {'file': name, 'sources': sources}
+        merged[name] = len(sources)
+
+    with open(os.path.join(directory, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'templates': manifest}, f, indent=2, sort_keys=True)
+    env.loader = FlattenedLoader(directory, loader)
+    return merged
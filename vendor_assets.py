@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Self-hosting of third-party assets for modusvivendioradea.com
+
+Fetches Bootstrap, Popper, gtag.js and the Lato web font into
+static/vendor/ once, so pages no longer open connections to
+cdn.jsdelivr.net, fonts.googleapis.com, fonts.gstatic.com and
+googletagmanager.com before the first render. Files with an SRI hash
+in utils.assets.THIRD_PARTY_ASSETS are verified against it.
+
+Only the Lato weights/styles the site's CSS can actually use are kept
+(and only the latin + latin-ext subsets); when no rule uses Lato at all
+it is dropped and base.html stops loading it.
+
+    static/vendor/manifest.json    asset name -> vendored file
+                                   (read by utils.assets.AssetManifest)
+
+Without network access, point --mirror at a directory laid out as
+<host>/<path> (e.g. what `wget -x` produces):
+
+    mirror/cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css
+    mirror/fonts.googleapis.com/css2
+    mirror/fonts.gstatic.com/s/lato/v24/S6uyw4BMUTPHjx4wXg.woff2
+
+gtag.js changes upstream from time to time; re-run this script
+(e.g. weekly from cron) to refresh it.
+
+Usage:
+  python vendor_assets.py [--mirror DIR]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import sys
+import urllib.request
+from urllib.parse import urljoin, urlsplit
+
+from critical_css import parse_css
+from utils.assets import MANIFEST_NAME, THIRD_PARTY_ASSETS, VENDOR_DIR
+
+STATIC_DIR = 'static'
+OUTPUT_DIR = os.path.join(STATIC_DIR, VENDOR_DIR)
+
+# Where each asset is written, relative to the static folder
+TARGETS = {
+    'bootstrap.css': f'{VENDOR_DIR}/bootstrap/bootstrap.min.css',
+    'bootstrap.js': f'{VENDOR_DIR}/bootstrap/bootstrap.min.js',
+    'popper.js': f'{VENDOR_DIR}/popper/popper.min.js',
+    'gtag.js': f'{VENDOR_DIR}/gtag/gtag.js',
+    'lato.css': f'{VENDOR_DIR}/lato/lato.css',
+}
+
+# Stylesheets written by us (what decides which Lato weights are needed)
+SITE_CSS = [os.path.join(STATIC_DIR, 'css', 'main.css')]
+TEMPLATES_DIR = 'templates'
+
+LATO_WEIGHTS = (100, 300, 400, 700, 900)
+FONT_SUBSETS = ('latin', 'latin-ext')
+# Google Fonts only serves woff2 to browsers it recognises
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/124.0 Safari/537.36')
+
+_FONT_FACE_RE = re.compile(r'/\*\s*([\w-]+)\s*\*/\s*@font-face\s*\{([^}]*)\}')
+_WEIGHT_RE = re.compile(r'font-weight:\s*([\w-]+)', re.I)
+_BOLD_TAGS_RE = re.compile(r'<(?:b|strong|th|h[1-6])\b', re.I)
+_ITALIC_TAGS_RE = re.compile(r'<(?:em|cite|dfn)\b', re.I)
+
+
+def fetch(url, mirror=None):
+    if mirror:
+        parts = urlsplit(url)
+        path = os.path.join(mirror, parts.hostname, parts.path.lstrip('/'))
+        with open(path, 'rb') as f:
+            return f.read()
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def verify(data, integrity):
+    """Check a Subresource Integrity hash (e.g. 'sha384-...')"""
+    algorithm, _, expected = integrity.partition('-')
+    actual = base64.b64encode(hashlib.new(algorithm, data).digest()).decode()
+    if actual != expected:
+        raise ValueError(f"integrity mismatch ({algorithm}-{actual})")
+
+
+def write_static(rel_path, data):
+    target = os.path.join(STATIC_DIR, rel_path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+# ============================================
+# LATO
+# ============================================
+
+def nearest_weight(weight, available=LATO_WEIGHTS):
+    """The face a browser picks for a weight (CSS Fonts Level 4 font matching)"""
+    if weight in available:
+        return weight
+    if 400 <= weight <= 500:
+        order = ([w for w in available if weight < w <= 500] +
+                 sorted((w for w in available if w < weight), reverse=True) +
+                 [w for w in available if w > 500])
+    elif weight < 400:
+        order = sorted((w for w in available if w < weight), reverse=True) + [w for w in available if w > weight]
+    else:
+        order = [w for w in available if w > weight] + sorted((w for w in available if w < weight), reverse=True)
+    return order[0]
+
+
+def used_font_faces(family):
+    """
+    {(style, weight)} the site can render `family` in, or an empty set when no
+    rule uses the family. Weights are inherited, so every weight in the
+    site's CSS counts once the family is in use.
+    """
+    css = []
+    for path in SITE_CSS:
+        with open(path, encoding='utf-8') as f:
+            css.append(f.read())
+    html = []
+    for name in sorted(os.listdir(TEMPLATES_DIR)):
+        if name.endswith('.html'):
+            with open(os.path.join(TEMPLATES_DIR, name), encoding='utf-8') as f:
+                html.append(f.read())
+    html = re.sub(r'<!--.*?-->', '', '\n'.join(html), flags=re.S)
+    css.extend(re.findall(r'<style[^>]*>(.*?)</style>', html, re.S))
+    css.extend(re.findall(r'style="([^"]*)"', html))
+
+    declarations = []
+
+    def collect(nodes):
+        for node in nodes:
+            if node[0] == 'group':
+                collect(node[2])
+            elif node[0] == 'rule' and not node[1].startswith('@'):
+                declarations.append(node[2])
+    for text in css:
+        nodes = parse_css(text if '{' in text else f"x{{{text}}}")
+        collect(nodes)
+
+    if not any(re.search(rf'font-family:[^;]*\b{family}\b', d, re.I) for d in declarations):
+        return set()
+
+    keywords = {'normal': 400, 'bold': 700, 'bolder': 700}
+    weights = {400}
+    for declaration in declarations:
+        for value in _WEIGHT_RE.findall(declaration):
+            weight = keywords.get(value.lower()) or (int(value) if value.isdigit() else None)
+            if weight:
+                weights.add(nearest_weight(weight))
+    if _BOLD_TAGS_RE.search(html):
+        weights.add(700)
+    italic = _ITALIC_TAGS_RE.search(html) or any('italic' in d for d in declarations)
+    styles = ('normal', 'italic') if italic else ('normal',)
+    return {(style, weight) for style in styles for weight in weights}
+
+
+def vendor_lato(mirror):
+    """Returns (stylesheet or None when unused, [font files worth preloading])"""
+    faces = used_font_faces('Lato')
+    if not faces:
+        print("   lato.css: no rule uses Lato - dropped")
+        return None, []
+
+    axes = ';'.join(f"{int(style == 'italic')},{weight}" for style, weight in sorted(faces))
+    url = f"https://fonts.googleapis.com/css2?family=Lato:ital,wght@{axes}&display=swap"
+    css = fetch(url, mirror).decode('utf-8')
+
+    rules, preload, total = [], [], 0
+    font_dir = os.path.dirname(TARGETS['lato.css'])
+    for subset, body in _FONT_FACE_RE.findall(css):
+        style = re.search(r'font-style:\s*(\w+)', body).group(1)
+        weight = int(re.search(r'font-weight:\s*(\d+)', body).group(1))
+        if subset not in FONT_SUBSETS or (style, weight) not in faces:
+            continue
+        src = re.search(r'url\(([^)]+)\)', body).group(1).strip('\'"')
+        filename = f"lato-{style}-{weight}-{subset}.woff2"
+        total += write_static(f"{font_dir}/{filename}", fetch(urljoin(url, src), mirror))
+        body = re.sub(r'url\([^)]+\)', f'url({filename})', body)
+        rules.append(f"/* {subset} */\n@font-face {{{body}}}")
+        if (style, weight) == ('normal', 400):
+            preload.append(f"{font_dir}/{filename}")
+
+    print(f"   lato.css: {len(faces)} of 10 styles ({', '.join(f'{s} {w}' for s, w in sorted(faces))}), "
+          f"{len(rules)} files, {total / 1024:.0f} KB")
+    return '\n'.join(rules).encode('utf-8'), preload
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def vendor(mirror=None):
+    """Fetch every third-party asset into static/vendor/ and write the manifest"""
+    print(f"📥 Vendoring third-party assets{f' from {mirror}' if mirror else ''}...")
+    manifest_path = os.path.join(OUTPUT_DIR, MANIFEST_NAME)
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {'files': {}, 'preload': []}
+
+    failed = []
+    for name, asset in THIRD_PARTY_ASSETS.items():
+        try:
+            if name == 'lato.css':
+                data, manifest['preload'] = vendor_lato(mirror)
+            else:
+                data = fetch(asset.url, mirror)
+                if asset.integrity:
+                    verify(data, asset.integrity)
+        except (OSError, ValueError) as e:
+            print(f"❌ {name}: {e}")
+            failed.append(name)
+            continue
+        if data is None:
+            manifest['files'][name] = ''
+            continue
+        size = write_static(TARGETS[name], data)
+        manifest['files'][name] = TARGETS[name]
+        if name != 'lato.css':
+            print(f"   {name}: {asset.url} → {TARGETS[name]} ({size / 1024:.0f} KB)")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    if failed:
+        print(f"⚠️  Still loaded from upstream: {', '.join(failed)}")
+        return 1
+    print(f"✅ Vendored into {OUTPUT_DIR} - restart the app to pick them up")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Self-host third-party CSS, JS and fonts')
+    parser.add_argument('--mirror', help='Read files from DIR/<host>/<path> instead of the network')
+    args = parser.parse_args()
+    return vendor(args.mirror)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
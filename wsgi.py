@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Production entry point for modusvivendioradea.com
+
+    python wsgi.py [--bind 127.0.0.1:8000] [--workers N] [--threads N]
+    gunicorn --preload --workers 4 --threads 8 wsgi:application   # same preloading
+
+Importing this module imports the app and warms it:
+
+    templates   every template compiled into the Jinja cache (and the
+                on-disk bytecode cache)
+    catalogs    the gettext catalogs of every language loaded and all
+                their messages decoded
+    SEO tables  rebuilt if a catalog changed since the app was imported
+    routes      the URL map compiled
+
+then gc.freeze() moves everything allocated so far out of the garbage
+collector's reach, so collections in the workers never write to those
+objects and their memory stays shared copy-on-write after the fork.
+Workers serve their first request without compiling or loading anything.
+
+`python wsgi.py` forks WEB_CONCURRENCY (--workers) processes from the
+warmed master. They share one listening socket, and each serves
+WEB_THREADS (--threads) requests at a time. Idle keep-alive connections
+are closed after --keep-alive seconds. A worker that dies is replaced;
+SIGTERM or Ctrl-C stops the workers (in-flight requests finish) and then
+the master. Run it behind nginx.
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from app import app
+from utils.counters import flush_shared
+from utils.logs import flush_logging
+from utils.templates import warm_templates
+
+
+def preload(app):
+    """Warm everything workers would otherwise load on their first requests"""
+    started = time.perf_counter()
+    compiled, errors = warm_templates(app)
+    messages = app.extensions['catalogs'].preload(app.config['LANGUAGES'])
+    app.extensions['seo_lookup_table'].refresh_if_changed()
+    app.url_map.update()
+    gc.collect()
+    gc.freeze()
+    print(f"🔥 Preloaded {len(compiled)} templates, "
+          f"{sum(messages.values())} catalog messages ({', '.join(messages)}) "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+    for name, error in sorted(errors.items()):
+        print(f"   ⚠️  {name}: {error}")
+    return app
+
+
+application = preload(app)
+
+
+# ============================================
+# PRE-FORKING SERVER
+# ============================================
+
+class PooledWSGIServer(BaseWSGIServer):
+    """werkzeug's WSGI server answering from a fixed pool of threads"""
+
+    multithread = True
+
+    def __init__(self, sock: socket.socket, app, threads: int, keep_alive: float):
+        handler = type('KeepAliveHandler', (WSGIRequestHandler,), {'timeout': keep_alive})
+        host, port = sock.getsockname()[:2]
+        super().__init__(host, port, app, handler=handler, fd=sock.fileno())
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+
+    def process_request(self, request, client_address) -> None:
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        pool = getattr(self, 'pool', None)
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+class Shutdown(Exception):
+    """Raised by the SIGTERM/SIGINT handlers to leave the serving loops"""
+
+
+def _raise_shutdown(signum, frame):
+    raise Shutdown()
+
+
+def run_worker(sock: socket.socket, threads: int, keep_alive: float) -> None:
+    # Ctrl-C reaches the whole process group; only the master reacts to it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _raise_shutdown)
+    server = PooledWSGIServer(sock, application, threads, keep_alive)
+    try:
+        server.serve_forever()
+    except Shutdown:
+        pass
+    finally:
+        try:
+            server.server_close()
+        finally:
+            # Workers end with os._exit(), which skips atexit: publish the
+            # counters and write out the queued log records now
+            flush_shared()
+            flush_logging()
+
+
+def serve(host: str, port: int, workers: int, threads: int, keep_alive: float) -> None:
+    sock = socket.create_server((host, port), backlog=2048)
+    # Idle workers must not block in accept() when another one took the connection
+    sock.setblocking(False)
+    children = {}
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(sock, threads, keep_alive)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    signal.signal(signal.SIGTERM, _raise_shutdown)
+    signal.signal(signal.SIGINT, _raise_shutdown)
+    print(f"🚀 Serving on http://{host}:{port} with {workers} workers × {threads} threads")
+    try:
+        for _ in range(workers):
+            spawn()
+        while True:
+            pid, status = os.wait()
+            started = children.pop(pid, None)
+            if started is None:
+                continue
+            print(f"⚠️  Worker {pid} exited (status {status}), starting a new one")
+            if time.monotonic() - started < 1.0:
+                # Crashing on startup; don't spin
+                time.sleep(1.0)
+            spawn()
+    except Shutdown:
+        print("🛑 Stopping workers...")
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+    finally:
+        sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the site with pre-forked, pre-warmed workers')
+    parser.add_argument('--bind', default=os.environ.get('BIND', '127.0.0.1:8000'), help='HOST:PORT')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 8)))
+    parser.add_argument('--keep-alive', type=float, default=5.0,
+                        help='Seconds an idle keep-alive connection may hold a thread')
+    args = parser.parse_args()
+
+    host, _, port = args.bind.rpartition(':')
+    if not host or not port.isdigit() or args.workers < 1 or args.threads < 1:
+        parser.error('--bind must be HOST:PORT and --workers/--threads at least 1')
+    serve(host.strip('[]'), int(port), args.workers, args.threads, args.keep_alive)
+
+
+if __name__ == '__main__':
+    main()